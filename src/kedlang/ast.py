@@ -1,129 +1,138 @@
-import abc
 from typing import List, Optional, Union
 
 from sly.lex import Token
 
 
-class KedAST(abc.ABC):
+class KedAST:
+    # Nodes are numerous enough for per-instance dicts to dominate memory.
+    # `position` is where the node starts, as a position in
+    # `kedlang.source.SourceMap`; it is only set once the parser locates the
+    # node, so read it with `getattr(node, "position", None)`.
+    __slots__ = ("position",)
+
     def __repr__(self) -> str:
         return f"<{self.__class__.__name__}>"
 
 
-class Expression(KedAST, metaclass=abc.ABCMeta):
-    pass
+class Expression(KedAST):
+    __slots__ = ()
 
 
-class Statement(KedAST, metaclass=abc.ABCMeta):
-    pass
+class Statement(KedAST):
+    __slots__ = ()
 
 
-class Operator(KedAST, metaclass=abc.ABCMeta):
-    pass
+class Operator(KedAST):
+    __slots__ = ()
 
 
-class UnaryOperator(Operator, metaclass=abc.ABCMeta):
-    pass
+class UnaryOperator(Operator):
+    __slots__ = ()
 
 
 class UAdd(UnaryOperator):
-    pass
+    __slots__ = ()
 
 
 class USub(UnaryOperator):
-    pass
+    __slots__ = ()
 
 
 class Not(UnaryOperator):
-    pass
+    __slots__ = ()
 
 
-class BinaryOperator(Operator, metaclass=abc.ABCMeta):
-    pass
+class BinaryOperator(Operator):
+    __slots__ = ()
 
 
 class Add(BinaryOperator):
-    pass
+    __slots__ = ()
 
 
 class Sub(BinaryOperator):
-    pass
+    __slots__ = ()
 
 
 class Mult(BinaryOperator):
-    pass
+    __slots__ = ()
 
 
 class Div(BinaryOperator):
-    pass
+    __slots__ = ()
 
 
 class Mod(BinaryOperator):
-    pass
+    __slots__ = ()
 
 
 class And(BinaryOperator):
-    pass
+    __slots__ = ()
 
 
 class Or(BinaryOperator):
-    pass
+    __slots__ = ()
 
 
 class Concat(BinaryOperator):
-    pass
+    __slots__ = ()
 
 
 class Lt(BinaryOperator):
-    pass
+    __slots__ = ()
 
 
 class LtE(BinaryOperator):
-    pass
+    __slots__ = ()
 
 
 class Gt(BinaryOperator):
-    pass
+    __slots__ = ()
 
 
 class GtE(BinaryOperator):
-    pass
+    __slots__ = ()
 
 
 class Eq(BinaryOperator):
-    pass
+    __slots__ = ()
 
 
 class NotEq(BinaryOperator):
-    pass
+    __slots__ = ()
 
 
 class StrictEq(BinaryOperator):
-    pass
+    __slots__ = ()
 
 
 class NotStrictEq(BinaryOperator):
-    pass
+    __slots__ = ()
 
 
 class Name(Expression):
+    __slots__ = ("value",)
+
     def __init__(self, token: Token) -> None:
-        self.token = token
-        self.value = self.token.value
+        self.value = token.value
 
     def __repr__(self) -> str:
         return f"<{self.__class__.__name__} {self.value}>"
 
 
 class Variable(Expression):
+    __slots__ = ("value",)
+
     def __init__(self, token: Token) -> None:
-        self.token = token
-        self.value = self.token.value
+        self.value = token.value
 
     def __repr__(self) -> str:
         return f"<{self.__class__.__name__} {self.value}>"
 
 
 class Program(KedAST):
+    __slots__ = ("statements",)
+
     def __init__(self, statements: List[Statement]) -> None:
         self.statements = statements
 
@@ -132,6 +141,8 @@ class Program(KedAST):
 
 
 class Declare(Statement):
+    __slots__ = ("variable", "initializer")
+
     def __init__(
         self, variable: Variable, initializer: Optional[Expression] = None
     ) -> None:
@@ -142,6 +153,8 @@ class Declare(Statement):
 
 
 class FunctionDef(Statement):
+    __slots__ = ("name", "__params", "body")
+
     def __init__(self, name: Name, params: List[Variable], body: Statement) -> None:
         self.name, self.__params, self.body = name, params, body
 
@@ -165,6 +178,8 @@ class FunctionDef(Statement):
 
 
 class Static(Statement):
+    __slots__ = ("statement",)
+
     def __init__(self, statement: Statement) -> None:
         self.statement = statement
 
@@ -173,6 +188,8 @@ class Static(Statement):
 
 
 class ClassDef(Statement):
+    __slots__ = ("name", "base", "body")
+
     def __init__(self, name: Name, base: Name, body: Statement) -> None:
         self.name, self.base, self.body = name, base, body
 
@@ -181,6 +198,8 @@ class ClassDef(Statement):
 
 
 class Delete(Statement):
+    __slots__ = ("variable",)
+
     def __init__(self, variable: Variable) -> None:
         self.variable = variable
 
@@ -189,6 +208,8 @@ class Delete(Statement):
 
 
 class Compound(Statement):
+    __slots__ = ("children",)
+
     def __init__(self, children: List[Statement]) -> None:
         self.children = children
 
@@ -197,6 +218,8 @@ class Compound(Statement):
 
 
 class Expr(Statement):
+    __slots__ = ("value",)
+
     def __init__(self, value: Expression) -> None:
         self.value = value
 
@@ -205,6 +228,8 @@ class Expr(Statement):
 
 
 class If(Statement):
+    __slots__ = ("test", "body", "orelse")
+
     def __init__(
         self,
         test: Expression,
@@ -220,6 +245,8 @@ class If(Statement):
 
 
 class Catch(KedAST):
+    __slots__ = ("type", "name", "body")
+
     def __init__(
         self,
         type: Union[Name, Variable],
@@ -235,6 +262,8 @@ class Catch(KedAST):
 
 
 class Try(Statement):
+    __slots__ = ("body", "handlers", "finallybody")
+
     def __init__(
         self,
         body: List[Statement],
@@ -250,6 +279,8 @@ class Try(Statement):
 
 
 class Throw(Statement):
+    __slots__ = ("exc",)
+
     def __init__(self, exc: Expression) -> None:
         self.exc = exc
 
@@ -258,6 +289,8 @@ class Throw(Statement):
 
 
 class While(Statement):
+    __slots__ = ("test", "body")
+
     def __init__(self, test: Expression, body: List[Statement]) -> None:
         self.test = test
         self.body = body
@@ -266,15 +299,31 @@ class While(Statement):
         return f"<{self.__class__.__name__} {self.test} {self.body}>"
 
 
+class For(Statement):
+    __slots__ = ("target", "iter", "body")
+
+    def __init__(
+        self, target: Variable, iter: Expression, body: List[Statement]
+    ) -> None:
+        self.target = target
+        self.iter = iter
+        self.body = body
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.target} {self.iter} {self.body}>"
+
+
 class Continue(Statement):
-    pass
+    __slots__ = ()
 
 
 class Break(Statement):
-    pass
+    __slots__ = ()
 
 
 class Return(Statement):
+    __slots__ = ("value",)
+
     def __init__(self, value: Optional[Expression] = None) -> None:
         self.value = value
 
@@ -282,7 +331,19 @@ class Return(Statement):
         return f"<{self.__class__.__name__} {self.value}>"
 
 
+class Yield(Statement):
+    __slots__ = ("value",)
+
+    def __init__(self, value: Expression) -> None:
+        self.value = value
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.value}>"
+
+
 class Print(Statement):
+    __slots__ = ("value",)
+
     def __init__(self, value: Expression) -> None:
         self.value = value
 
@@ -291,6 +352,8 @@ class Print(Statement):
 
 
 class Import(Statement):
+    __slots__ = ("name", "is_strict")
+
     def __init__(self, name: Expression, is_strict: bool = False) -> None:
         self.name, self.is_strict = name, is_strict
 
@@ -299,6 +362,8 @@ class Import(Statement):
 
 
 class Assign(Expression):
+    __slots__ = ("variable", "expression")
+
     def __init__(self, variable: Variable, expression: Expression) -> None:
         self.variable, self.expression = variable, expression
 
@@ -307,15 +372,18 @@ class Assign(Expression):
 
 
 class BinaryOp(Expression):
+    __slots__ = ("left", "op", "right")
+
     def __init__(self, left: Expression, op: BinaryOperator, right: Expression) -> None:
-        self.left, self.right = left, right
-        self.token = self.op = op
+        self.left, self.op, self.right = left, op, right
 
     def __repr__(self) -> str:
         return f"<{self.__class__.__name__} {self.left} {self.op} {self.right}>"
 
 
 class UnaryOp(Expression):
+    __slots__ = ("op", "operand")
+
     def __init__(self, op: UnaryOperator, operand: Expression) -> None:
         self.op, self.operand = op, operand
 
@@ -324,6 +392,8 @@ class UnaryOp(Expression):
 
 
 class Attribute(Expression):
+    __slots__ = ("value", "attr")
+
     def __init__(self, value: Expression, attr: str) -> None:
         self.value, self.attr = value, attr
 
@@ -332,10 +402,12 @@ class Attribute(Expression):
 
 
 class ScopeResolution(Attribute):
-    pass
+    __slots__ = ()
 
 
 class Subscript(Expression):
+    __slots__ = ("value", "index")
+
     def __init__(self, value: Expression, index: Expression) -> None:
         self.value, self.index = value, index
 
@@ -343,7 +415,24 @@ class Subscript(Expression):
         return f"<{self.__class__.__name__} {self.value} {self.index}>"
 
 
+class Slice(Expression):
+    __slots__ = ("value", "start", "stop")
+
+    def __init__(
+        self,
+        value: Expression,
+        start: Optional[Expression] = None,
+        stop: Optional[Expression] = None,
+    ) -> None:
+        self.value, self.start, self.stop = value, start, stop
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.value} {self.start} {self.stop}>"
+
+
 class Call(Expression):
+    __slots__ = ("func", "args")
+
     def __init__(self, func: Expression, args: List[Expression]) -> None:
         self.func, self.args = func, args
 
@@ -352,6 +441,8 @@ class Call(Expression):
 
 
 class Constructor(Expression):
+    __slots__ = ("class_type", "args")
+
     def __init__(self, class_type: Expression, args: List[Expression]) -> None:
         self.class_type, self.args = class_type, args
 
@@ -360,6 +451,8 @@ class Constructor(Expression):
 
 
 class IsDeclared(Expression):
+    __slots__ = ("variable",)
+
     def __init__(self, variable: Variable) -> None:
         self.variable = variable
 
@@ -367,7 +460,20 @@ class IsDeclared(Expression):
         return f"<{self.__class__.__name__} {self.variable}>"
 
 
+class Map(Expression):
+    __slots__ = ("keys", "values")
+
+    def __init__(self, keys: List[Expression], values: List[Expression]) -> None:
+        self.keys = keys
+        self.values = values
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.keys} {self.values}>"
+
+
 class List(Expression):
+    __slots__ = ("elements",)
+
     def __init__(self, elements: List[Expression]) -> None:
         self.elements = elements
 
@@ -376,6 +482,8 @@ class List(Expression):
 
 
 class Spread(Expression):
+    __slots__ = ("value",)
+
     def __init__(self, value: Expression) -> None:
         self.value = value
 
@@ -384,14 +492,18 @@ class Spread(Expression):
 
 
 class Constant(Expression):
+    __slots__ = ("value",)
+
     def __init__(self, token: Token) -> None:
-        self.token = token
+        self.value = token.value
 
     def __repr__(self) -> str:
-        return f"<{self.__class__.__name__} {self.token.value}>"
+        return f"<{self.__class__.__name__} {self.value}>"
 
 
 class Input(Expression):
+    __slots__ = ("prompt",)
+
     def __init__(self, prompt: Expression) -> None:
         self.prompt = prompt
 
@@ -400,10 +512,12 @@ class Input(Expression):
 
 
 class NoOp(Expression):
-    pass
+    __slots__ = ()
 
 
 class Sleep(Expression):
+    __slots__ = ("value",)
+
     def __init__(self, value: Expression) -> None:
         self.value = value
 
@@ -412,4 +526,4 @@ class Sleep(Expression):
 
 
 class Exit(Expression):
-    pass
+    __slots__ = ()
@@ -0,0 +1,133 @@
+import io
+import math
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, List, Optional
+
+from kedlang.exceptions import BaseKedException
+from kedlang.interpreter import KedInterpreter
+from kedlang.lexer import KedLexer
+from kedlang.parser import KedParser
+from kedlang.streams import InputStream, OutputStream
+from kedlang.tasks import TaskScheduler
+
+# Chunks of scripts sent to each worker process, so that workers that draw
+# quick scripts pick up more of them
+CHUNKS_PER_WORKER = 4
+
+
+class ScriptResult:
+    """How a script run by a `BatchRunner` ended, and what it printed."""
+
+    __slots__ = ("path", "status", "stdout", "stderr", "seconds")
+
+    def __init__(
+        self, path: str, status: int, stdout: str, stderr: str, seconds: float
+    ) -> None:
+        self.path = path
+        self.status = status
+        self.stdout = stdout
+        self.stderr = stderr
+        self.seconds = seconds
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.path} {self.status}>"
+
+    def as_dict(self) -> dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+def read_manifest(path: str) -> List[str]:
+    """Read the script paths listed in a manifest, one per line.
+
+    Blank lines and lines starting with `#` are skipped, and relative paths
+    are taken from the manifest's directory.
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, encoding="utf-8") as manifest:
+        lines = (line.strip() for line in manifest)
+        return [os.path.join(base, line) for line in lines if line and line[0] != "#"]
+
+
+def run_script(path: str, asynchronous: bool = False) -> ScriptResult:
+    """Run a script in a fresh interpreter, capturing what it prints."""
+    stdout, stderr = io.StringIO(), io.StringIO()
+    tasks = TaskScheduler() if asynchronous else None
+    interpreter = KedInterpreter(
+        KedLexer(),
+        KedParser(),
+        cwd=path,
+        output=OutputStream(stdout),
+        # Scripts see the end of input rather than sharing the terminal
+        input=InputStream(io.StringIO()),
+        tasks=tasks,
+    )
+    status = 0
+    start = time.perf_counter()
+    try:
+        interpreter.interpret_file(path)
+    except BaseKedException as exc:
+        print(exc.report(), file=stderr)
+        status = 1
+    except OSError as exc:
+        print(f"{exc.strerror}: '{path}'", file=stderr)
+        status = 1
+    except Exception:
+        traceback.print_exc(file=stderr)
+        status = 1
+    finally:
+        interpreter.shutdown()
+        if tasks is not None:
+            tasks.close()
+    seconds = time.perf_counter() - start
+    return ScriptResult(path, status, stdout.getvalue(), stderr.getvalue(), seconds)
+
+
+class BatchRunner:
+    """Runs many scripts in a pool of worker processes.
+
+    Workers start with the interpreter and its parser tables already loaded
+    and run script after script, each in a fresh interpreter, so the cost of
+    starting Python and building the parser is paid once per worker rather
+    than once per script.
+    """
+
+    __slots__ = ("executor", "jobs", "asynchronous")
+
+    def __init__(self, jobs: Optional[int] = None, asynchronous: bool = False) -> None:
+        self.jobs = jobs or os.cpu_count() or 1
+        self.asynchronous = asynchronous
+        self.executor = ProcessPoolExecutor(self.jobs)
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.jobs} jobs>"
+
+    def __enter__(self) -> "BatchRunner":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
+
+    def run(self, paths: List[str]) -> Iterator[ScriptResult]:
+        """Run scripts, yielding their results in the order they were given.
+
+        If a worker process dies, the scripts that had not finished are
+        reported as failed.
+        """
+        size = max(1, math.ceil(len(paths) / (self.jobs * CHUNKS_PER_WORKER)))
+        flags = [self.asynchronous] * len(paths)
+        finished = 0
+        try:
+            for result in self.executor.map(run_script, paths, flags, chunksize=size):
+                yield result
+                finished += 1
+        except BrokenProcessPool as exc:
+            error = f"{exc.__class__.__name__}: {exc}\n"
+            for path in paths[finished:]:
+                yield ScriptResult(path, 1, "", error, 0.0)
+
+    def shutdown(self) -> None:
+        self.executor.shutdown()
@@ -17,6 +17,8 @@ def check_key(func):
 
 
 class Frame:
+    __slots__ = ("__name", "__parent", "_members")
+
     def __init__(self, name: str, parent: Optional["Frame"] = None) -> None:
         self.__name = name
         self.__parent = parent
@@ -67,6 +69,8 @@ class Frame:
 
 
 class CallStack:
+    __slots__ = ("_frames",)
+
     def __init__(self) -> None:
         self._frames = []
 
@@ -1,16 +1,21 @@
 import argparse
+import json
 import logging
 import os
 import signal
 import sys
+import time
 from typing import List
 
 from kedlang import __version__
 from kedlang.exceptions import BaseKedException
 
+from .batch import BatchRunner, read_manifest
 from .interpreter import KedInterpreter
 from .lexer import KedLexer
 from .parser import KedParser
+from .streams import OutputStream
+from .tasks import TaskScheduler
 
 __author__ = "Eoin O'Brien"
 __copyright__ = "Eoin O'Brien"
@@ -33,13 +38,74 @@ def file_path(value):
         raise FileNotFoundError(value)
 
 
+def buffer_size(value):
+    size = int(value)
+    if size < 0:
+        raise argparse.ArgumentTypeError("buffer size cannot be negative")
+    return size
+
+
+def jobs(value):
+    count = int(value)
+    if count < 1:
+        raise argparse.ArgumentTypeError("jobs must be at least 1")
+    return count
+
+
 def parse_args(args: List[str]) -> argparse.Namespace:
     """Parse command line parameters"""
     parser = argparse.ArgumentParser(description="kedlang")
     parser.add_argument(
         "--version", action="version", version="kedlang {ver}".format(ver=__version__)
     )
-    parser.add_argument(dest="file", help="source file to execute", type=file_path)
+    parser.add_argument(
+        dest="files",
+        help="source files to execute",
+        type=file_path,
+        nargs="*",
+        metavar="file",
+    )
+    parser.add_argument(
+        "-m",
+        "--manifest",
+        dest="manifest",
+        help="also execute the source files listed in a file, one per line",
+        type=file_path,
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        help="execute files in this many worker processes, one per core by default",
+        type=jobs,
+    )
+    parser.add_argument(
+        "--report",
+        dest="report",
+        help="write the status, timing and output of each file as JSON lines",
+        type=argparse.FileType("w", encoding="utf-8"),
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        dest="output",
+        help="write printed output, or how each file went when executing many, "
+        "to a file instead of stdout",
+        type=argparse.FileType("w", encoding="utf-8"),
+    )
+    parser.add_argument(
+        "--buffer-size",
+        dest="buffer_size",
+        help="characters of output to buffer before writing, 0 to write each line, "
+        "when executing a single file",
+        type=buffer_size,
+    )
+    parser.add_argument(
+        "--async",
+        dest="asynchronous",
+        help="run spawned tasks concurrently on an event loop",
+        action="store_true",
+    )
     parser.add_argument(
         "-v",
         "--verbose",
@@ -56,7 +122,18 @@ def parse_args(args: List[str]) -> argparse.Namespace:
         action="store_const",
         const=logging.DEBUG,
     )
-    return parser.parse_args(args)
+    parsed = parser.parse_args(args)
+    # Many files, or options that only make sense for many, run in batch
+    parsed.batch = (
+        len(parsed.files) != 1
+        or parsed.manifest is not None
+        or parsed.jobs is not None
+        or parsed.report is not None
+    )
+    if parsed.batch and parsed.buffer_size is not None:
+        # Each file's output is captured whole, so there is nothing to buffer
+        parser.error("--buffer-size only applies when executing a single file")
+    return parsed
 
 
 def setup_logging(loglevel):
@@ -79,16 +156,63 @@ def main(args):
     """
     args = parse_args(args)
     setup_logging(args.loglevel)
+    if args.manifest is not None:
+        args.files += read_manifest(args.manifest)
+    if args.batch:
+        run_many(args)
+        return
+    args.file = args.files[0]
+
     lexer = KedLexer()
     parser = KedParser()
-    interpreter = KedInterpreter(lexer, parser, cwd=args.file)
-    with open(args.file) as f:
-        code = f.read()
+    output = OutputStream(args.output, args.buffer_size)
+    tasks = TaskScheduler() if args.asynchronous else None
+    interpreter = KedInterpreter(
+        lexer, parser, cwd=args.file, output=output, tasks=tasks
+    )
 
     try:
-        interpreter.interpret(code)
+        interpreter.interpret_file(args.file)
     except BaseKedException as exc:
-        sys.exit(f"{exc.__class__.__name__}: {exc.message}")
+        sys.exit(exc.report())
+    finally:
+        interpreter.shutdown()
+        if tasks is not None:
+            tasks.close()
+        if args.output not in (None, sys.stdout):
+            args.output.close()
+
+
+def run_many(args: argparse.Namespace) -> None:
+    """Execute many files in worker processes and report how each one went
+
+    Args:
+      args (argparse.Namespace): parsed command line parameters
+    """
+    if not args.files:
+        sys.exit("kedlang: no files to execute")
+    output = args.output or sys.stdout
+    failed = 0
+    start = time.perf_counter()
+    with BatchRunner(args.jobs, args.asynchronous) as runner:
+        for result in runner.run(args.files):
+            status = "ok" if result.status == 0 else "failed"
+            line = f"{status:6} {result.seconds:8.3f}s  {result.path}"
+            if result.status != 0:
+                failed += 1
+                line += "\n" + "".join(
+                    f"    {error}\n" for error in result.stderr.splitlines()
+                ).rstrip("\n")
+            print(line, file=output)
+            if args.report is not None:
+                print(json.dumps(result.as_dict()), file=args.report)
+    seconds = time.perf_counter() - start
+    print(f"{len(args.files)} files, {failed} failed in {seconds:.3f}s", file=output)
+    for file in (args.output, args.report):
+        if file is not None:
+            file.close()
+    if failed:
+        sys.exit(1)
 
 
 def run():
@@ -1,9 +1,29 @@
+from typing import Optional
+
+
 class BaseKedException(Exception):
     """Base class for Ked exceptions."""
 
     def __init__(self, message: str) -> None:
         super().__init__(message)
         self.message = message
+        self.path: Optional[str] = None
+        self.lineno: Optional[int] = None
+        self.column: Optional[int] = None
+        # Where it was raised, while no line table for it has been found
+        self.position: Optional[int] = None
+
+    @property
+    def location(self) -> Optional[str]:
+        """Where the exception was raised, as `path:line:column`."""
+        if self.lineno is None:
+            return None
+        return f"{self.path or '<string>'}:{self.lineno}:{self.column}"
+
+    def report(self) -> str:
+        """Describe the exception for a user, after where it was raised."""
+        message = f"{self.__class__.__name__}: {self.message}"
+        return f"{self.location}: {message}" if self.location else message
 
 
 class KedControlFlow(Exception):
@@ -0,0 +1,134 @@
+from array import array
+from typing import Any, Dict, Iterator, List, Tuple, Type
+
+from . import ast
+
+# Pseudo kinds for the non-node values found in node fields
+LIST, VALUE, NONE = 0, 1, 2
+
+# Node kinds follow the pseudo kinds, in the order classes are defined
+KINDS: List[Any] = [list, object, type(None)] + [
+    cls
+    for cls in vars(ast).values()
+    if isinstance(cls, type) and issubclass(cls, ast.KedAST)
+]
+KIND_CODES: Dict[Any, int] = {cls: code for code, cls in enumerate(KINDS)}
+
+
+def node_fields(cls: Type[ast.KedAST]) -> Tuple[str, ...]:
+    """Return the attribute names holding the fields of a node class."""
+    fields = []
+    for base in reversed(cls.__mro__):
+        for name in base.__dict__.get("__slots__", ()):
+            if name == "position":
+                continue
+            if name.startswith("__") and not name.endswith("__"):
+                name = f"_{base.__name__.lstrip('_')}{name}"
+            fields.append(name)
+    return tuple(fields)
+
+
+FIELDS: Dict[Any, Tuple[str, ...]] = {cls: node_fields(cls) for cls in KINDS[3:]}
+
+
+class FlatTree:
+    """An AST stored as parallel arrays rather than as linked node objects.
+
+    Records are laid out in post-order, so every record follows its children
+    and the root is the last one. A record has a kind, a position and a run
+    of child indices in `children` starting at `child_start[i]` and ending
+    where the next record's run starts. Lists are records of kind `LIST`,
+    missing fields are records of kind `NONE`, and any other field value is
+    a record of kind `VALUE` whose single child is an index into `values`.
+    """
+
+    __slots__ = ("kinds", "positions", "child_start", "children", "values")
+
+    def __init__(self) -> None:
+        self.kinds = array("H")
+        self.positions = array("q")
+        self.child_start = array("I", [0])
+        self.children = array("I")
+        self.values: List[Any] = []
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {len(self)} records>"
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    @property
+    def root(self) -> int:
+        return len(self.kinds) - 1
+
+    @classmethod
+    def encode(cls, node: ast.KedAST) -> "FlatTree":
+        tree = cls()
+        tree.add(node)
+        return tree
+
+    def add(self, item: Any) -> int:
+        """Append the records for a node, list or value and return the index
+        of its record."""
+        if isinstance(item, ast.KedAST):
+            kind = KIND_CODES[type(item)]
+            ids = [self.add(getattr(item, name)) for name in FIELDS[type(item)]]
+            position = getattr(item, "position", None)
+            position = -1 if position is None else position
+        elif isinstance(item, list):
+            kind, ids, position = LIST, [self.add(child) for child in item], -1
+        elif item is None:
+            kind, ids, position = NONE, [], -1
+        else:
+            kind, ids, position = VALUE, [len(self.values)], -1
+            self.values.append(item)
+        self.kinds.append(kind)
+        self.positions.append(position)
+        self.children.extend(ids)
+        self.child_start.append(len(self.children))
+        return len(self.kinds) - 1
+
+    def kind(self, index: int) -> Any:
+        """Return the node class of a record, or `list`, `object` or
+        `NoneType` for the pseudo kinds."""
+        return KINDS[self.kinds[index]]
+
+    def children_of(self, index: int) -> array:
+        if self.kinds[index] == VALUE:
+            return array("I")
+        return self.children[self.child_start[index] : self.child_start[index + 1]]
+
+    def value(self, index: int) -> Any:
+        if self.kinds[index] != VALUE:
+            raise ValueError(f"Record {index} does not hold a value")
+        return self.values[self.children[self.child_start[index]]]
+
+    def walk(self) -> Iterator[Tuple[int, Any]]:
+        """Yield the index and kind of every node record, children first."""
+        for index, code in enumerate(self.kinds):
+            if code > NONE:
+                yield index, KINDS[code]
+
+    def decode(self, index: int = -1) -> Any:
+        """Rebuild the node objects of the subtree rooted at a record."""
+        built: List[Any] = []
+        stop = len(self.kinds) if index < 0 else index + 1
+        # Post-order means a single forward pass sees children before parents
+        for i in range(stop):
+            code = self.kinds[i]
+            start, end = self.child_start[i], self.child_start[i + 1]
+            if code == VALUE:
+                built.append(self.values[self.children[start]])
+            elif code == NONE:
+                built.append(None)
+            elif code == LIST:
+                built.append([built[child] for child in self.children[start:end]])
+            else:
+                cls = KINDS[code]
+                node = cls.__new__(cls)
+                for name, child in zip(FIELDS[cls], self.children[start:end]):
+                    setattr(node, name, built[child])
+                position = self.positions[i]
+                node.position = None if position < 0 else position
+                built.append(node)
+        return built[stop - 1]
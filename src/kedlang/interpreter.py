@@ -1,47 +1,220 @@
+import collections.abc
+import contextlib
+import functools
 import itertools
+import math
+import mmap
 import operator
 import os
+import sys
 import time
-from typing import Any, Optional, Union
+from typing import Any, Callable, Iterator, List, Optional, Tuple, Union
 
-from . import ast, exceptions, lexer, parser, visitor
+from . import ast, exceptions, lexer, parser, types, visitor
 from .builtins import get_rebel_class
 from .callstack import CallStack, Frame
 from .cwdstack import CWDStack
-from .symbol import Namespace, NamespacedSymbol, Symbol
-from .types import KedClass, KedFunction, KedList, KedObject
+from .source import LineTable, SourceFile, SourceMap, map_file, normalise_newlines
+from .parallel import ProcessPool
+from .streams import InputStream, OutputStream
+from .tasks import TaskScheduler
+from .symbol import Symbol
+from .types import (
+    KedArray,
+    KedBytes,
+    KedClass,
+    KedFile,
+    KedFunction,
+    KedGenerator,
+    KedList,
+    KedMap,
+    KedObject,
+    KedRange,
+    KedRope,
+    KedTask,
+)
+
+# Values of the same kind are compared by `is` without printing them
+EQUALITY_KINDS = {
+    int: "number",
+    float: "number",
+    str: "string",
+    bool: "boolean",
+    type(None): "null",
+    KedList: "sequence",
+    KedArray: "sequence",
+    KedRange: "sequence",
+    KedBytes: "sequence",
+    KedMap: "map",
+    KedObject: "identity",
+    KedClass: "identity",
+    KedFunction: "identity",
+    KedGenerator: "identity",
+    KedFile: "identity",
+    KedTask: "identity",
+}
+
+# Values printed element by element
+CONTAINERS = (KedList, KedArray, KedRange, KedBytes, KedMap)
+
+# Plain elements rendered in each piece of a container's text
+RENDER_BATCH = 1024
+
+NUMBER_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Mod: operator.mod,
+}
+
+RELATIONAL_OPS = {
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+}
 
 
 class KedInterpreter(visitor.KedASTVisitor):
     def __init__(
-        self, lexer: lexer.KedLexer, parser: parser.KedParser, cwd=None
+        self,
+        lexer: lexer.KedLexer,
+        parser: parser.KedParser,
+        cwd=None,
+        output: Optional[OutputStream] = None,
+        input: Optional[InputStream] = None,
+        tasks: Optional[TaskScheduler] = None,
     ) -> None:
         super().__init__()
+        # Each run parses with its own copies, so interpreters can share a
+        # lexer and parser and still run in different threads
         self.parser = parser
         self.lexer = lexer
 
+        # Printed text is buffered until a flush point
+        self.output = output if output is not None else OutputStream()
+        self.input = input if input is not None else InputStream()
+
+        # Files opened by the program, flushed whenever its output is
+        self.files: List[KedFile] = []
+
+        # Tasks run concurrently only in async mode
+        self.tasks = tasks
+
+        # Worker processes for parallelMap, started when it is first called
+        self.pool: Optional[ProcessPool] = None
+
         # Track the current working directory
         self.cwd_stack = CWDStack()
         self.cwd_stack.push(cwd or os.getcwd())
 
+        # Line tables for locating nodes from every source
+        self.sources = SourceMap()
+
+        # Builtins live in a frame of their own, so programs can shadow them
+        self.builtins = Frame(name="builtins")
+
         # Create global stack frame
         self.call_stack = CallStack()
-        self.call_stack.push(Frame(name="global"))
+        self.call_stack.push(Frame(name="global", parent=self.builtins))
 
         # Exceptions
         self.rebel_class = get_rebel_class()
 
         # Init builtins
-        self.current_scope.declare(Symbol("boolean"), self.to_boolean)
-        self.current_scope.declare(Symbol("number"), self.to_number)
-        self.current_scope.declare(Symbol("string"), self.to_string)
-        self.current_scope.declare(Symbol("len"), self.get_length)
-        self.current_scope.declare(self.rebel_class.name, self.rebel_class)
+        self.builtins.declare(Symbol("boolean"), self.to_boolean)
+        self.builtins.declare(Symbol("number"), self.to_number)
+        self.builtins.declare(Symbol("string"), self.to_string)
+        self.builtins.declare(Symbol("len"), self.get_length)
+        self.builtins.declare(Symbol("append"), self.list_append)
+        self.builtins.declare(Symbol("pop"), self.list_pop)
+        self.builtins.declare(Symbol("insert"), self.list_insert)
+        self.builtins.declare(Symbol("extend"), self.list_extend)
+        self.builtins.declare(Symbol("slice"), self.get_slice)
+        self.builtins.declare(Symbol("split"), self.string_split)
+        self.builtins.declare(Symbol("join"), self.string_join)
+        self.builtins.declare(Symbol("substring"), self.string_substring)
+        self.builtins.declare(Symbol("find"), self.string_find)
+        self.builtins.declare(Symbol("replace"), self.string_replace)
+        self.builtins.declare(Symbol("readAll"), self.read_all)
+        self.builtins.declare(Symbol("readChunk"), self.read_chunk)
+        self.builtins.declare(Symbol("readLines"), self.read_lines)
+        self.builtins.declare(Symbol("open"), self.file_open)
+        self.builtins.declare(Symbol("write"), self.file_write)
+        self.builtins.declare(Symbol("close"), self.file_close)
+        self.builtins.declare(Symbol("readFile"), self.read_file)
+        self.builtins.declare(Symbol("readBytes"), self.read_bytes)
+        self.builtins.declare(Symbol("spawn"), self.task_spawn)
+        self.builtins.declare(Symbol("wait"), self.task_wait)
+        self.builtins.declare(Symbol("has"), self.has_item)
+        self.builtins.declare(Symbol("remove"), self.map_remove)
+        self.builtins.declare(Symbol("keys"), self.map_keys)
+        self.builtins.declare(Symbol("values"), self.map_values)
+        self.builtins.declare(Symbol("map"), self.list_map)
+        self.builtins.declare(Symbol("filter"), self.list_filter)
+        self.builtins.declare(Symbol("reduce"), self.list_reduce)
+        self.builtins.declare(Symbol("parallelMap"), self.parallel_map)
+        self.builtins.declare(Symbol("sort"), self.list_sort)
+        self.builtins.declare(Symbol("range"), self.make_range)
+        self.builtins.declare(Symbol("array"), self.make_array)
+        self.builtins.declare(Symbol("sum"), self.array_sum)
+        self.builtins.declare(Symbol("min"), self.array_min)
+        self.builtins.declare(Symbol("max"), self.array_max)
+        self.builtins.declare(Symbol("mean"), self.array_mean)
+        self.builtins.declare(self.rebel_class.name, self.rebel_class)
 
     def interpret(self, code: str) -> Any:
-        tokens = self.lexer.tokenize(code)
-        ast = self.parser.parse(tokens)
-        return self.visit(ast)
+        base = self.sources.add(LineTable(code))
+        lexer, parser = self.__new_parser()
+        try:
+            ast = parser.parse(lexer.tokenize_chunks([code], base))
+            value = self.visit(ast)
+            self.finish_tasks()
+            return value
+        finally:
+            self.flush()
+            # Errors are located as they are raised, so a long-lived
+            # interpreter need not keep the lines of every string it ran
+            self.sources.drop(base)
+
+    def interpret_file(self, path: str) -> None:
+        """Execute a source file while it is being read.
+
+        The file is decoded incrementally from a memory map and each
+        top-level statement runs as soon as it has been parsed, so neither the
+        whole text nor the whole program is held in memory at once.
+        """
+        try:
+            self.__execute(SourceFile(path), *self.__new_parser())
+            self.finish_tasks()
+        finally:
+            self.flush()
+
+    def finish_tasks(self) -> None:
+        """Run any tasks the program left behind, as it ends with its last task."""
+        if self.tasks is not None:
+            with self.top_level(), self.__switch_tasks():
+                self.tasks.finish()
+
+    def flush(self) -> None:
+        """Write out the text buffered for the output and every open file."""
+        self.files = [file for file in self.files if not file.closed]
+        for file in self.files:
+            file.flush()
+        self.output.flush()
+
+    def locate(self, exc: exceptions.BaseKedException, position: int) -> None:
+        # Where the error was raised comes first, if it was kept, as a
+        # worker process keeps it for the interpreter that started it
+        for candidate in (exc.position, position):
+            location = None if candidate is None else self.sources.locate(candidate)
+            if location is not None:
+                exc.path, exc.lineno, exc.column = location
+                return
+        if exc.position is None:
+            # Kept for the interpreter that loaded the node's source
+            exc.position = position
 
     @property
     def cwd(self) -> str:
@@ -52,9 +225,8 @@ class KedInterpreter(visitor.KedASTVisitor):
         return self.call_stack.peek()
 
     def to_string(self, value="") -> str:
-        if isinstance(value, KedList):
-            elements = [self.to_string(self.resolve(el)) for el in value.elements]
-            return f"[{', '.join(elements)}]"
+        if isinstance(value, CONTAINERS):
+            return "".join(self.render(value))
 
         if value is None:
             return "nuttin"
@@ -64,21 +236,381 @@ class KedInterpreter(visitor.KedASTVisitor):
             return str(int(value)) if value.is_integer() else str(value)
         return str(value)
 
-    def to_number(self, value=None) -> float:
-        if value is None:
-            return 0
+    def render(self, value: Any, active: Optional[set] = None) -> Iterator[str]:
+        """Yield the text of a value in pieces, so that large lists and maps
+        can be written out without building their whole text first.
+
+        A list or map that contains itself is shown as `[...]` where it
+        recurs.
+        """
+        if not isinstance(value, CONTAINERS):
+            yield self.to_string(value)
+            return
+
+        active = set() if active is None else active
+        if id(value) in active:
+            yield "[...]"
+            return
+        active.add(id(value))
         try:
-            return float(value)
-        except ValueError:
-            return float("nan")
+            if isinstance(value, KedMap):
+                if len(value) == 0:
+                    yield "[:]"
+                    return
+                items = ((f"{self.to_string(key)}: ", el) for key, el in value.items())
+            else:
+                items = zip(itertools.repeat(""), value)
+            yield "["
+            yield from self.__render_items(items, active)
+            yield "]"
+        finally:
+            active.discard(id(value))
+
+    def to_number(self, value=None) -> float:
+        return types.to_number(value)
 
     def to_boolean(self, value=None) -> bool:
         return bool(value)
 
+    def is_equal(self, left: Any, right: Any) -> bool:
+        """Test loose equality, as `is` does.
+
+        Values are equal if they print the same. Values of the same kind are
+        compared without printing them: lists, arrays and ranges element by
+        element, maps entry by entry and things, classes and functions by
+        identity.
+
+        A string inside a list or map can print like several of its
+        elements, as `['a, b']` prints like `['a', 'b']`, so lists and maps
+        holding strings that differ element by element are printed after all.
+        """
+        if self.__equal(left, right, set()):
+            return True
+        kind = EQUALITY_KINDS.get(type(left))
+        if kind not in ("sequence", "map") or kind != EQUALITY_KINDS.get(type(right)):
+            return False
+        elif self.__holds_string(left, set()) or self.__holds_string(right, set()):
+            return self.to_string(left) == self.to_string(right)
+        return False
+
+    def __equal(self, left: Any, right: Any, active: set) -> bool:
+        """Compare values of the same kind without printing them.
+
+        A pair of lists or maps met again while comparing their own elements
+        is taken to be equal there, so lists that contain themselves can be
+        compared.
+        """
+        if left is right:
+            return True
+        kind = EQUALITY_KINDS.get(type(left))
+        if kind is None or kind != EQUALITY_KINDS.get(type(right)):
+            return self.to_string(left) == self.to_string(right)
+        elif kind == "number":
+            # NaN prints the same as itself
+            return left == right or left != left and right != right
+        elif kind == "identity":
+            return left is right
+        elif kind not in ("sequence", "map"):
+            return left == right
+
+        pair = (id(left), id(right))
+        if pair in active:
+            return True
+        active.add(pair)
+        try:
+            if len(left) != len(right):
+                return False
+            elif kind == "sequence":
+                return all(self.__equal(a, b, active) for a, b in zip(left, right))
+            return all(
+                key in right and self.__equal(value, right[key], active)
+                for key, value in left.items()
+            )
+        finally:
+            active.discard(pair)
+
+    def __holds_string(self, value: Any, seen: set) -> bool:
+        """Return whether a list or map holds a string, however deeply."""
+        if not isinstance(value, (KedList, KedMap)) or id(value) in seen:
+            return False
+        seen.add(id(value))
+        if isinstance(value, KedMap):
+            value = [*value.keys(), *value.values()]
+        # Collect the kinds of elements without a Python call for each one
+        kinds = set(map(type, value))
+        if str in kinds:
+            return True
+        elif KedList in kinds or KedMap in kinds:
+            return any(
+                self.__holds_string(item, seen)
+                for item in value
+                if isinstance(item, (KedList, KedMap))
+            )
+        return False
+
+    def compare(self, op: Callable[[Any, Any], bool], left: Any, right: Any) -> bool:
+        """Apply a relational operator, comparing both operands as strings
+        when only one of them is a string."""
+        if (type(left) is str) != (type(right) is str):
+            left, right = self.to_string(left), self.to_string(right)
+        try:
+            return op(left, right)
+        except TypeError:
+            raise exceptions.KedSemanticError(
+                f"Cannot compare '{type(left).__name__}' with '{type(right).__name__}'"
+            )
+
     def get_length(self, target: Union[ast.KedAST, Symbol, Any]):
-        return len(self.resolve(target))
+        value = self.resolve(target)
+        try:
+            return len(value)
+        except TypeError:
+            raise exceptions.KedSemanticError(
+                f"'len' expects a string, list, map, array, range or bytes, "
+                f"not '{type(value).__name__}'"
+            )
+
+    def list_append(self, target: KedList, *values: Any) -> int:
+        self.__expect_list("append", target).extend(values)
+        return len(target)
+
+    def list_pop(self, target: KedList, index: Any = -1) -> Any:
+        return self.__expect_list("pop", target).pop(self.__expect_index("pop", index))
+
+    def list_insert(self, target: KedList, index: Any, value: Any = None) -> int:
+        index = self.__expect_index("insert", index)
+        self.__expect_list("insert", target).insert(index, value)
+        return len(target)
+
+    def list_extend(self, target: KedList, *sources: KedList) -> int:
+        self.__expect_list("extend", target)
+        for source in sources:
+            target.extend(self.__expect_list("extend", source).elements)
+        return len(target)
+
+    def get_slice(self, target: Any, start=None, stop=None, step=None) -> Any:
+        start, stop, step = (
+            None if bound is None else self.__expect_index("slice", bound)
+            for bound in (start, stop, step)
+        )
+        if isinstance(target, (KedList, KedArray, KedRange, KedBytes)):
+            return target.slice(start, stop, step)
+        elif isinstance(target, str):
+            if step == 0:
+                raise exceptions.KedSemanticError("Slice step cannot be zero")
+            return target[start:stop:step]
+        raise exceptions.KedSemanticError(
+            f"'slice' expects a list, array, range or string, not '{type(target).__name__}'"
+        )
+
+    def string_split(self, target: str, separator: Optional[str] = None) -> KedList:
+        target = self.__expect_string("split", target)
+        if separator is None:
+            return KedList(target.split())
+        separator = self.to_string(separator)
+        # An empty separator splits a string into its characters
+        return KedList(target.split(separator) if separator else target)
+
+    def string_join(self, values: Any, separator: str = "") -> str:
+        values = self.__expect_sequence("join", values)
+        return self.to_string(separator).join(map(self.to_string, values))
+
+    def string_substring(self, target: str, start: Any, stop: Any = None) -> str:
+        target = self.__expect_string("substring", target)
+        start = self.__expect_index("substring", start)
+        if stop is not None:
+            stop = self.__expect_index("substring", stop)
+        return self.get_slice(target, start, stop)
+
+    def string_find(self, target: str, search: Any, start: Any = 0) -> float:
+        target = self.__expect_string("find", target)
+        start = self.__expect_index("find", start)
+        return float(target.find(self.to_string(search), start))
+
+    def string_replace(self, target: str, old: Any, new: Any) -> str:
+        target = self.__expect_string("replace", target)
+        return target.replace(self.to_string(old), self.to_string(new))
+
+    def read_all(self, source: Optional[KedFile] = None) -> str:
+        return self.__expect_input("readAll", source).read_all()
+
+    def read_chunk(self, size: Any, source: Optional[KedFile] = None) -> Optional[str]:
+        size = self.to_number(size)
+        if not size >= 1:
+            raise exceptions.KedSemanticError(
+                "'readChunk' expects a size of at least 1"
+            )
+        return self.__expect_input("readChunk", source).read_chunk(int(size))
+
+    def read_lines(self, source: Optional[KedFile] = None) -> KedGenerator:
+        return KedGenerator(
+            "readLines", self.__expect_input("readLines", source).lines()
+        )
 
-    def resolve(self, target: Union[ast.KedAST, Symbol, Any]):
+    def file_open(self, path: str, mode: str = "r") -> KedFile:
+        path = self.__file_path("open", path)
+        try:
+            file = KedFile(path, self.to_string(mode))
+        except OSError as exc:
+            raise exceptions.KedSemanticError(f"Cannot open '{path}': {exc.strerror}")
+        self.files.append(file)
+        return file
+
+    def file_write(self, target: KedFile, *values: Any) -> None:
+        file = self.__expect_file("write", target)
+        if file.output is None:
+            raise exceptions.KedSemanticError(
+                f"File '{file.path}' is not open for writing"
+            )
+        for value in values:
+            for chunk in self.render(value):
+                file.output.write(chunk)
+
+    def file_close(self, target: KedFile) -> None:
+        self.__expect_file("close", target).close()
+
+    def read_file(self, path: str) -> str:
+        data = self.__map_file("readFile", path)
+        try:
+            return normalise_newlines(str(data, "utf-8"))
+        except UnicodeDecodeError:
+            raise exceptions.KedSemanticError(
+                f"'{path}' is not UTF-8 text, use 'readBytes' to read it"
+            )
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()
+
+    def read_bytes(self, path: str) -> KedBytes:
+        return KedBytes(self.__map_file("readBytes", path))
+
+    def task_spawn(self, func: Callable, *args: Any) -> KedTask:
+        func = self.__expect_callable("spawn", func)
+        if self.tasks is None:
+            raise exceptions.KedSemanticError(
+                "'spawn' needs tasks to be enabled, run with --async"
+            )
+        name = getattr(getattr(func, "impl", func), "__name__", "task")
+        scope, cwd = self.current_scope, self.cwd
+        return self.tasks.spawn(name, lambda: self.__run_task(scope, cwd, func, args))
+
+    def task_wait(self, task: KedTask) -> Any:
+        if not isinstance(task, KedTask):
+            raise exceptions.KedSemanticError(
+                f"'wait' expects a task, not '{type(task).__name__}'"
+            )
+        self.output.flush()
+        with self.__switch_tasks():
+            if self.tasks.in_task and not task.done:
+                # Other tasks run while this one holds on for the task
+                return self.tasks.pause(task)
+            return self.tasks.wait(task)
+
+    def has_item(self, target: Any, item: Any) -> bool:
+        if isinstance(target, str):
+            return self.to_string(item) in target
+        elif isinstance(target, (KedMap, KedList, KedArray, KedRange, KedBytes)):
+            return item in target
+        raise exceptions.KedSemanticError(
+            f"'has' expects a map, list, array, range or string, "
+            f"not '{type(target).__name__}'"
+        )
+
+    def map_remove(self, target: KedMap, key: Any) -> Any:
+        return self.__expect_map("remove", target).pop(key)
+
+    def map_keys(self, target: KedMap) -> KedList:
+        return KedList(self.__expect_map("keys", target).keys())
+
+    def map_values(self, target: KedMap) -> KedList:
+        return KedList(self.__expect_map("values", target).values())
+
+    def list_map(self, values: Any, func: Callable) -> Union[KedList, KedGenerator]:
+        func = self.__expect_callable("map", func)
+        values = self.__expect_sequence("map", values)
+        # Generators stay lazy
+        if isinstance(values, KedGenerator):
+            return KedGenerator("map", map(func, values))
+        return KedList(map(func, values))
+
+    def list_filter(self, values: Any, func: Callable) -> Union[KedList, KedGenerator]:
+        func = self.__expect_callable("filter", func)
+        values = self.__expect_sequence("filter", values)
+        if isinstance(values, KedGenerator):
+            return KedGenerator("filter", filter(func, values))
+        return KedList(filter(func, values))
+
+    def list_reduce(self, values: Any, func: Callable, *initial: Any) -> Any:
+        values = iter(self.__expect_sequence("reduce", values))
+        func = self.__expect_callable("reduce", func)
+        if not initial:
+            initial = tuple(itertools.islice(values, 1))
+            if not initial:
+                raise exceptions.KedSemanticError(
+                    "Cannot reduce an empty list without an initial value"
+                )
+        return functools.reduce(func, values, *initial)
+
+    def parallel_map(self, values: Any, func: KedFunction) -> KedList:
+        values = list(self.__expect_sequence("parallelMap", values))
+        if not isinstance(func, KedFunction):
+            raise exceptions.KedSemanticError(
+                f"'parallelMap' expects a function, not '{type(func).__name__}'"
+            )
+        if self.pool is None:
+            self.pool = ProcessPool()
+        self.output.flush()
+        return KedList(self.pool.map(func, values, self.builtins, self.cwd))
+
+    def shutdown(self) -> None:
+        """Stop the worker processes started by `parallelMap`, if any."""
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def list_sort(self, values: Any, compare: Optional[Callable] = None) -> KedList:
+        values = self.__expect_sequence("sort", values)
+        if isinstance(values, KedGenerator):
+            values = list(values)
+        if compare is not None:
+            compare = self.__expect_callable("sort", compare)
+            key = functools.cmp_to_key(lambda a, b: self.to_number(compare(a, b)))
+        elif all(isinstance(el, (bool, int, float)) for el in values):
+            key = None
+        else:
+            # Mixed values compare as strings, like the relational operators
+            key = self.to_string
+        return KedList(sorted(values, key=key))
+
+    def make_range(self, *bounds: Any) -> KedRange:
+        if not 1 <= len(bounds) <= 3:
+            raise exceptions.KedSemanticError(
+                f"'range' expects 1 to 3 arguments, not {len(bounds)}"
+            )
+        bounds = [self.to_number(bound) for bound in bounds]
+        if not all(math.isfinite(bound) for bound in bounds):
+            raise exceptions.KedSemanticError("'range' expects finite numbers")
+        bounds = [int(bound) for bound in bounds]
+        if len(bounds) == 3 and bounds[2] == 0:
+            raise exceptions.KedSemanticError("Range step cannot be zero")
+        return KedRange(range(*bounds))
+
+    def make_array(self, values: Any = None) -> KedArray:
+        return KedArray(() if values is None else self.__expect_array("array", values))
+
+    def array_sum(self, values: Any) -> float:
+        return self.__expect_array("sum", values).sum()
+
+    def array_min(self, values: Any) -> float:
+        return self.__expect_array("min", values).min()
+
+    def array_max(self, values: Any) -> float:
+        return self.__expect_array("max", values).max()
+
+    def array_mean(self, values: Any) -> float:
+        return self.__expect_array("mean", values).mean()
+
+    def resolve(self, target: Union[ast.KedAST, Symbol, Any], flatten: bool = True):
         # Visit nodes before resolving
         if isinstance(target, ast.KedAST):
             target = self.visit(target)
@@ -89,14 +621,19 @@ class KedInterpreter(visitor.KedASTVisitor):
 
         # Resolve symbols from the current stack frame
         if isinstance(target, Symbol):
-            return self.current_scope.fetch(target)
+            target = self.current_scope.fetch(target)
+
+        # Ropes are joined where they are used, and kept where they are only
+        # stored in a variable or concatenated
+        if flatten and type(target) is KedRope:
+            return str(target)
 
         # Value types are returned as-is
         return target
 
     def resolve_list(self, target: Union[ast.KedAST, Symbol, Any]):
         if isinstance(target, KedList):
-            return [self.resolve(el) for el in target.elements]
+            return list(target.elements)
         return self.resolve(target)
 
     def resolve_spread(self, target: Union[ast.KedAST, Symbol, Any]):
@@ -106,11 +643,11 @@ class KedInterpreter(visitor.KedASTVisitor):
 
         return list(itertools.chain(*map(resolve_element, target)))
 
-    def visit_Program(self, node: ast.Program) -> None:
+    @contextlib.contextmanager
+    def top_level(self) -> Iterator[None]:
+        """Handle control flow statements that escape a whole program."""
         try:
-            for statement in node.statements:
-                self.visit(statement)
-        # Handle control flow statements
+            yield
         except exceptions.Break:
             raise exceptions.KedSyntaxError("'ahStop' outside loop")
         except exceptions.Continue:
@@ -118,11 +655,40 @@ class KedInterpreter(visitor.KedASTVisitor):
         except exceptions.Return:
             raise exceptions.KedSyntaxError("'return' outside function")
         except exceptions.Exit:
-            pass
+            # Exiting stops any tasks that are still running, once the exit
+            # has reached the main program
+            if self.tasks is not None:
+                if self.tasks.in_task:
+                    raise
+                with self.__switch_tasks():
+                    self.tasks.cancel()
+
+    def __run_task(self, scope: Frame, cwd: str, func: Callable, args: tuple) -> Any:
+        # Tasks run in threads of their own, with call and directory stacks of
+        # their own that start where they were spawned
+        self.call_stack, self.cwd_stack = CallStack(), CWDStack()
+        self.call_stack.push(scope)
+        self.cwd_stack.push(cwd)
+        return func(*args)
+
+    @contextlib.contextmanager
+    def __switch_tasks(self) -> Iterator[None]:
+        """Let tasks run, each with its own stacks, and give this thread back
+        its call and directory stacks when control returns to it."""
+        call_stack, cwd_stack = self.call_stack, self.cwd_stack
+        try:
+            yield
+        finally:
+            self.call_stack, self.cwd_stack = call_stack, cwd_stack
+
+    def visit_Program(self, node: ast.Program) -> None:
+        with self.top_level():
+            for statement in node.statements:
+                self.visit(statement)
 
     def visit_Declare(self, node: ast.Declare) -> None:
         symbol = self.visit(node.variable)
-        initializer = self.resolve(node.initializer)
+        initializer = self.resolve(node.initializer, flatten=False)
         self.current_scope.declare(symbol, initializer)
 
     def visit_Delete(self, node: ast.Delete) -> None:
@@ -130,9 +696,37 @@ class KedInterpreter(visitor.KedASTVisitor):
         self.current_scope.delete(symbol)
 
     def visit_Assign(self, node: ast.Assign) -> Any:
-        symbol = self.visit(node.variable)
-        value = self.resolve(node.expression)
-        self.current_scope.assign(symbol, value)
+        target = node.variable
+        if isinstance(target, ast.Subscript):
+            container = self.resolve(target.value)
+            index = self.resolve(target.index)
+            if not isinstance(container, KedMap):
+                index = self.__expect_index("index", index)
+            value = self.resolve(node.expression)
+            if isinstance(container, str):
+                raise exceptions.KedSemanticError(
+                    "Strings cannot be changed, build a new one instead"
+                )
+            try:
+                container[index] = value
+            except IndexError:
+                raise exceptions.KedSemanticError(f"Index {index} is out of range")
+        elif isinstance(target, ast.Attribute):
+            container = self.resolve(target.value)
+            value = self.resolve(node.expression)
+            if not isinstance(container, (KedObject, KedClass)):
+                raise exceptions.KedSemanticError(
+                    f"Cannot set attribute {target.attr} on '{type(container).__name__}'"
+                )
+            container.assign(target.attr, value)
+        elif isinstance(target, ast.ScopeResolution):
+            container = self.__resolve_class(target)
+            value = self.resolve(node.expression)
+            container.assign(target.attr, value)
+        else:
+            symbol = self.visit(target)
+            value = self.resolve(node.expression, flatten=False)
+            self.current_scope.assign(symbol, value)
         return value
 
     def visit_Compound(self, node: ast.Compound) -> None:
@@ -151,22 +745,8 @@ class KedInterpreter(visitor.KedASTVisitor):
             for stmt in node.body:
                 self.visit(stmt)
         except exceptions.KedException as exc:
-            rebel = self.resolve(exc.value)
-            handler = next(
-                hdlr for hdlr in node.handlers if rebel.extends(self.resolve(hdlr.type))
-            )
-            if handler is not None:
-                # Bind rebel to name in scope
-                name = self.visit(handler.name)
-                if name not in self.current_scope:
-                    self.current_scope.declare(name, rebel)
-                else:
-                    self.current_scope.assign(name, rebel)
-                # Execute handler body
-                for stmt in handler.body:
-                    self.visit(stmt)
-            else:
-                raise exc
+            for stmt in self.__catch(node, exc):
+                self.visit(stmt)
         finally:
             for stmt in node.finallybody:
                 self.visit(stmt)
@@ -188,6 +768,16 @@ class KedInterpreter(visitor.KedASTVisitor):
             except exceptions.Break:
                 break
 
+    def visit_For(self, node: ast.For) -> None:
+        for _ in self.__iterate(node):
+            try:
+                for statement in node.body:
+                    self.visit(statement)
+            except exceptions.Continue:
+                continue
+            except exceptions.Break:
+                break
+
     def visit_Continue(self, node: ast.Continue) -> None:
         raise exceptions.Continue()
 
@@ -197,74 +787,66 @@ class KedInterpreter(visitor.KedASTVisitor):
     def visit_Return(self, node: ast.Return) -> None:
         raise exceptions.Return(self.resolve(node.value))
 
+    def visit_Yield(self, node: ast.Yield) -> None:
+        # Functions that yield run through __generate instead
+        raise exceptions.KedSyntaxError("'giveUs' outside function")
+
     def visit_Print(self, node: ast.Print) -> None:
-        value = self.to_string(self.resolve(node.value))
-        print(value)
+        value = self.resolve(node.value)
+        if isinstance(value, CONTAINERS):
+            for chunk in self.render(value):
+                self.output.write(chunk)
+            self.output.write("\n")
+        else:
+            self.output.write(self.to_string(value) + "\n")
 
     def visit_Import(self, node: ast.Import) -> None:
         import_path = os.path.realpath(os.path.join(self.cwd, self.resolve(node.name)))
         try:
-            with open(import_path) as f:
-                ast = self.parser.parse(self.lexer.tokenize(f.read()))
+            source = SourceFile(import_path)
         except FileNotFoundError:
             if node.is_strict:
                 raise exceptions.KedImportError(
                     f"No such file or directory: '{import_path}'"
                 )
         else:
-            self.cwd_stack.push(import_path)
-            self.visit(ast)
-            self.cwd_stack.pop()
+            # The importing file is still being parsed, so the import needs its
+            # own lexer and parser state
+            self.__execute(source, *self.__new_parser())
 
     def visit_BinaryOp(self, node: ast.BinaryOp) -> None:
-        left = self.resolve(node.left)
-        right = self.resolve(node.right)
         op = node.op.__class__
 
-        number_ops = {
-            ast.Add: operator.add,
-            ast.Sub: operator.sub,
-            ast.Mult: operator.mul,
-            ast.Div: operator.truediv,
-            ast.Mod: operator.mod,
-        }
-
-        if op in number_ops:
-            return number_ops[op](self.to_number(left), self.to_number(right))
-
-        string_ops = {
-            ast.Concat: operator.add,
-        }
-
-        if op in string_ops:
-            return string_ops[op](self.to_string(left), self.to_string(right))
-
-        is_eq = lambda a, b: self.to_string(a) == self.to_string(b)
-        is_strict_eq = lambda a, b: a == b and type(a) == type(b)
-        logic_ops = {
-            ast.And: operator.and_,
-            ast.Or: operator.or_,
-            ast.Eq: is_eq,
-            ast.NotEq: lambda a, b: not is_eq(a, b),
-            ast.StrictEq: is_strict_eq,
-            ast.NotStrictEq: lambda a, b: not is_strict_eq(a, b),
-        }
-
-        if op in logic_ops:
-            return logic_ops[op](left, right)
-
-        relational_ops = {
-            ast.Lt: operator.lt,
-            ast.LtE: operator.le,
-            ast.Gt: operator.gt,
-            ast.GtE: operator.ge,
-        }
-
-        if op in relational_ops:
-            if str in [type(left), type(right)]:
+        if op is ast.Concat:
+            # Extend a rope held by the left operand instead of copying it
+            left = self.resolve(node.left, flatten=False)
+            if type(left) is not KedRope:
                 left = self.to_string(left)
-                right = self.to_string(right)
-            return relational_ops[op](left, right)
+            return KedRope.concat(left, self.to_string(self.resolve(node.right)))
+
+        left = self.resolve(node.left)
+        right = self.resolve(node.right)
+
+        if op in NUMBER_OPS:
+            if isinstance(left, KedArray) or isinstance(right, KedArray):
+                return KedArray.apply(NUMBER_OPS[op], left, right)
+            return NUMBER_OPS[op](self.to_number(left), self.to_number(right))
+
+        if op in RELATIONAL_OPS:
+            return self.compare(RELATIONAL_OPS[op], left, right)
+
+        if op is ast.Eq:
+            return self.is_equal(left, right)
+        elif op is ast.NotEq:
+            return not self.is_equal(left, right)
+        elif op is ast.StrictEq:
+            return left == right and type(left) == type(right)
+        elif op is ast.NotStrictEq:
+            return not (left == right and type(left) == type(right))
+        elif op is ast.And:
+            return operator.and_(left, right)
+        elif op is ast.Or:
+            return operator.or_(left, right)
 
         raise exceptions.KedSyntaxError("Unknown binary operator " + op.__name__)
 
@@ -283,40 +865,87 @@ class KedInterpreter(visitor.KedASTVisitor):
         )
 
     def visit_Input(self, node: ast.Input) -> Optional[str]:
+        prompt = self.to_string(self.resolve(node.prompt))
+        if self.input.source is sys.stdin and self.output.sink is sys.stdout:
+            # Prompt through input(), which edits the line at a terminal
+            read = functools.partial(input, prompt)
+        else:
+            self.output.write(prompt)
+            read = self.input.read_line
+        self.output.flush()
         try:
-            return input(self.resolve(node.prompt))
+            if self.tasks is None or self.input.source is not sys.stdin:
+                return read()
+            with self.__switch_tasks():
+                if self.tasks.in_task:
+                    return self.tasks.pause(read)
+                # Let tasks run while waiting for a line
+                return self.tasks.call(read)
         except EOFError:
-            print()  # Bring the prompt to a new line
+            self.output.write("\n")  # Bring the prompt to a new line
             return None
 
     def visit_NoOp(self, node: ast.NoOp) -> None:
         pass
 
     def visit_Sleep(self, node: ast.Sleep) -> None:
-        time.sleep(self.resolve(node.value))
+        value = self.resolve(node.value)
+        if isinstance(value, KedTask):
+            self.task_wait(value)
+            return
+        elif not isinstance(value, (int, float)) or not value >= 0:
+            raise exceptions.KedSemanticError(
+                f"'holdOn' expects a number of seconds or a task, not {self.to_string(value)!r}"
+            )
+        self.output.flush()
+        if self.tasks is None:
+            time.sleep(value)
+            return
+        with self.__switch_tasks():
+            if self.tasks.in_task:
+                self.tasks.pause(value)
+            else:
+                # Let tasks run while the program holds on
+                self.tasks.sleep(value)
 
     def visit_Exit(self, node: ast.Exit) -> None:
         raise exceptions.Exit()
 
     def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        function = self.make_function(node, self.current_scope)
+        self.current_scope.declare(self.visit(node.name), function)
+
+    def make_function(self, node: ast.FunctionDef, scope: Frame) -> KedFunction:
+        """Create the function `node` defines, closing over `scope`."""
         name = self.visit(node.name)
         params = list(map(self.visit, node.params))
         rest_param = self.visit(node.rest_param)
         body = node.body
+        # The statements that yield, worked out once for every call
+        yielding = set()
+        is_generator = self.__find_yields(body, yielding)
 
-        # Functions bind the scope they're defined in, not the one they're called in
-        bound_scope = self.current_scope
-
-        def func_impl(*args):
+        def bind(args) -> Frame:
             # Pad args to match function arity
             args = list(args) + [None] * min(0, len(params) - len(args))
 
             # Add param symbols to stack frame
-            frame = Frame(name, parent=bound_scope)
-            for (param, arg) in zip(params, args):
+            # Functions bind the scope they're defined in, not the one they're called in
+            frame = Frame(name, parent=scope)
+            for param, arg in zip(params, args):
                 frame.declare(param, arg)
             if rest_param is not None:
-                frame.declare(rest_param, args[len(params) :])
+                frame.declare(rest_param, KedList(args[len(params) :]))
+            return frame
+
+        def func_impl(*args):
+            frame = bind(args)
+
+            # Generators run their body as values are asked for
+            if is_generator:
+                return KedGenerator(
+                    str(name), self.__generate_call(frame, body, yielding)
+                )
 
             # Execute function body
             return_value = None
@@ -331,7 +960,7 @@ class KedInterpreter(visitor.KedASTVisitor):
 
         func_impl.__name__ = str(name)
 
-        self.current_scope.declare(name, KedFunction(func_impl))
+        return KedFunction(func_impl, node, scope)
 
     def visit_Call(self, node: ast.Call) -> Any:
         func = self.resolve(node.func)
@@ -363,13 +992,11 @@ class KedInterpreter(visitor.KedASTVisitor):
 
         # Declare static class members in namespace
         for key, value in static_frame._members.items():
-            symbol = NamespacedSymbol(key.name, class_impl)
-            class_impl[key.name] = symbol
-            self.current_scope.declare(symbol, value)
+            class_impl[key.name] = value
 
         self.current_scope.declare(name, class_impl)
 
-    def visit_Constructor(self, node: ast.Constructor) -> Namespace:
+    def visit_Constructor(self, node: ast.Constructor) -> KedObject:
         class_type = self.resolve(node.class_type)
         args = self.resolve_spread(node.args)
 
@@ -382,7 +1009,7 @@ class KedInterpreter(visitor.KedASTVisitor):
 
         # Invoke constructor if one exists in the inheritance hierarchy
         if "constructor" in instance:
-            constructor = self.current_scope.fetch(instance["constructor"])
+            constructor = instance["constructor"]
             if callable(constructor):
                 constructor(*args)
 
@@ -396,53 +1023,322 @@ class KedInterpreter(visitor.KedASTVisitor):
         return value[node.attr]
 
     def visit_ScopeResolution(self, node: ast.ScopeResolution) -> Any:
-        value = self.resolve(node.value)
-
-        # If value is a namespace, operate on its class
-        if isinstance(value, KedObject):
-            value = value.class_type
-
-        # If value is neither a class nor an object, raise an exception
-        if not isinstance(value, KedClass):
-            raise exceptions.KedSemanticError(
-                f"Operator '::' must be used on a class or thing, not '{type(value).__name__}'"
-            )
-
         # Return attribute from statics
-        return value[node.attr]
+        return self.__resolve_class(node)[node.attr]
 
     def visit_IsDeclared(self, node: ast.IsDeclared) -> bool:
         return self.visit(node.variable) in self.current_scope
 
     def visit_List(self, node: ast.List) -> list:
-        elements = self.resolve_spread(node.elements)
-        list_impl = KedList(size=len(elements))
-        for key, value in enumerate(elements):
-            symbol = NamespacedSymbol(key, list_impl)
-            list_impl[key] = symbol
-            self.current_scope.declare(symbol, self.resolve(value))
-        return list_impl
+        return KedList(self.resolve_spread(node.elements))
 
     def visit_Subscript(self, node: ast.Subscript) -> Any:
         value = self.resolve(node.value)
-        index = int(self.to_number(self.resolve(node.index)))
-        return value[index]
+        index = self.resolve(node.index)
+        if isinstance(value, KedMap):
+            return value[index]
+        index = self.__expect_index("index", index)
+        try:
+            return value[index]
+        except IndexError:
+            raise exceptions.KedSemanticError(f"Index {index} is out of range")
+
+    def visit_Slice(self, node: ast.Slice) -> Any:
+        value = self.resolve(node.value)
+        return self.get_slice(value, self.resolve(node.start), self.resolve(node.stop))
+
+    def visit_Map(self, node: ast.Map) -> KedMap:
+        return KedMap(zip(map(self.resolve, node.keys), map(self.resolve, node.values)))
 
     def visit_Spread(self, node: ast.Spread) -> list:
         return self.resolve(node.value)
 
     def visit_Constant(self, node: ast.Constant) -> str:
-        return node.token.value
+        return node.value
 
     def visit_Name(self, node: ast.Name) -> None:
-        return Symbol(node.token.value)
+        return Symbol(node.value)
 
     def visit_Variable(self, node: ast.Variable) -> None:
-        return Symbol(node.token.value)
+        return Symbol(node.value)
+
+    def __execute(
+        self, source: SourceFile, lexer: lexer.KedLexer, parser: parser.KedParser
+    ) -> None:
+        with source:
+            base = self.sources.add(source.lines)
+            self.cwd_stack.push(source.path)
+            try:
+                with self.top_level():
+                    tokens = lexer.tokenize_chunks(source, base)
+                    parser.parse(tokens, on_statement=self.visit)
+            finally:
+                self.cwd_stack.pop()
+
+    def __new_parser(self) -> Tuple[lexer.KedLexer, parser.KedParser]:
+        return type(self.lexer)(), type(self.parser)()
+
+    def __render_items(self, items: Iterator[tuple], active: set) -> Iterator[str]:
+        # Render runs of plain values together, and containers piece by piece
+        separator, batch = "", []
+        for prefix, value in items:
+            if isinstance(value, CONTAINERS):
+                if batch:
+                    yield separator + ", ".join(batch)
+                    separator, batch = ", ", []
+                yield separator + prefix
+                yield from self.render(value, active)
+                separator = ", "
+            else:
+                batch.append(prefix + self.to_string(value))
+                if len(batch) == RENDER_BATCH:
+                    yield separator + ", ".join(batch)
+                    separator, batch = ", ", []
+        if batch:
+            yield separator + ", ".join(batch)
+
+    def __expect_list(self, name: str, value: Any) -> KedList:
+        if not isinstance(value, KedList):
+            raise exceptions.KedSemanticError(
+                f"'{name}' expects a list, not '{type(value).__name__}'"
+            )
+        return value
+
+    def __iterate(self, node: ast.For) -> Iterator[None]:
+        """Bind the loop variable of `node` to each of its values in turn."""
+        name = self.visit(node.target)
+        values = self.resolve(node.iter)
+        if not isinstance(values, collections.abc.Iterable):
+            raise exceptions.KedSemanticError(
+                f"Cannot loop over '{type(values).__name__}'"
+            )
+
+        # Declare the loop variable unless it is already in scope
+        scope = self.current_scope
+        if name not in scope:
+            scope.declare(name)
+        for value in values:
+            scope.assign(name, value)
+            yield
+
+    def __catch(self, node: ast.Try, exc: exceptions.KedException) -> list:
+        """Bind a rebel to the handler of `node` that catches it and return
+        the handler's body, or re-raise it if there is no such handler."""
+        rebel = self.resolve(exc.value)
+        handler = next(
+            (hdlr for hdlr in node.handlers if rebel.extends(self.resolve(hdlr.type))),
+            None,
+        )
+        if handler is None:
+            raise exc
+
+        # Bind rebel to name in scope
+        name = self.visit(handler.name)
+        if name not in self.current_scope:
+            self.current_scope.declare(name, rebel)
+        else:
+            self.current_scope.assign(name, rebel)
+        return handler.body
+
+    def __find_yields(self, statements: Any, found: set) -> bool:
+        """Add the statements that contain a `giveUs`, outside of nested
+        functions, to `found` and return whether any of `statements` do.
+
+        A generator dropped part way through still runs its finally blocks,
+        but has nothing to give values to, so they cannot yield.
+        """
+        if isinstance(statements, list):
+            return any(
+                [self.__find_yields(statement, found) for statement in statements]
+            )
+        elif isinstance(statements, ast.Yield):
+            contains = True
+        elif isinstance(statements, ast.Compound):
+            contains = self.__find_yields(statements.children, found)
+        elif isinstance(statements, ast.If):
+            contains = self.__find_yields(statements.body + statements.orelse, found)
+        elif isinstance(statements, (ast.While, ast.For)):
+            contains = self.__find_yields(statements.body, found)
+        elif isinstance(statements, ast.Try):
+            if self.__find_yields(statements.finallybody, set()):
+                raise exceptions.KedSyntaxError(
+                    "'giveUs' cannot be used in 'atTheEndOfTheDay'"
+                )
+            contains = self.__find_yields(
+                statements.body + [hdlr.body for hdlr in statements.handlers], found
+            )
+        else:
+            contains = False
+        if contains:
+            found.add(statements)
+        return contains
+
+    def __generate_call(
+        self, frame: Frame, body: ast.Statement, yielding: set
+    ) -> Iterator[Any]:
+        """Run a generator's body with its frame on the call stack, stepping
+        from one `giveUs` to the next each time a value is asked for."""
+        steps = self.__generate([body], yielding)
+        try:
+            while True:
+                self.call_stack.push(frame)
+                try:
+                    value = next(steps)
+                except (StopIteration, exceptions.Return):
+                    return
+                finally:
+                    self.call_stack.pop()
+                yield value
+        finally:
+            # Run the finally blocks of a generator abandoned part way through
+            self.call_stack.push(frame)
+            try:
+                steps.close()
+            finally:
+                self.call_stack.pop()
+
+    def __generate(
+        self, statements: List[ast.Statement], yielding: set
+    ) -> Iterator[Any]:
+        """Execute statements, yielding the value of each `giveUs`.
+
+        This mirrors the visit methods of the statements that can contain a
+        `giveUs`, as Python generators that can be suspended part way
+        through. Other statements, and those not in `yielding`, are visited
+        as usual.
+        """
+        for node in statements:
+            if node not in yielding:
+                self.visit(node)
+            elif isinstance(node, ast.Yield):
+                yield self.resolve(node.value)
+            elif isinstance(node, ast.Compound):
+                yield from self.__generate(node.children, yielding)
+            elif isinstance(node, ast.If):
+                test = self.resolve(node.test)
+                yield from self.__generate(node.body if test else node.orelse, yielding)
+            elif isinstance(node, ast.While):
+                while self.visit(node.test):
+                    try:
+                        yield from self.__generate(node.body, yielding)
+                    except exceptions.Continue:
+                        continue
+                    except exceptions.Break:
+                        break
+            elif isinstance(node, ast.For):
+                for _ in self.__iterate(node):
+                    try:
+                        yield from self.__generate(node.body, yielding)
+                    except exceptions.Continue:
+                        continue
+                    except exceptions.Break:
+                        break
+            elif isinstance(node, ast.Try):
+                try:
+                    yield from self.__generate(node.body, yielding)
+                except exceptions.KedException as exc:
+                    yield from self.__generate(self.__catch(node, exc), yielding)
+                finally:
+                    for stmt in node.finallybody:
+                        self.visit(stmt)
+
+    def __expect_sequence(self, name: str, value: Any) -> Any:
+        if not isinstance(value, (KedList, KedArray, KedRange, KedBytes, KedGenerator)):
+            raise exceptions.KedSemanticError(
+                f"'{name}' expects a list, array, range or generator, "
+                f"not '{type(value).__name__}'"
+            )
+        return value
+
+    def __expect_callable(self, name: str, value: Any) -> Callable:
+        if not callable(value):
+            raise exceptions.KedSemanticError(
+                f"'{name}' expects a function, not '{type(value).__name__}'"
+            )
+        return value
+
+    def __expect_string(self, name: str, value: Any) -> str:
+        if not isinstance(value, str):
+            raise exceptions.KedSemanticError(
+                f"'{name}' expects a string, not '{type(value).__name__}'"
+            )
+        return value
+
+    def __expect_index(self, name: str, value: Any) -> int:
+        """Return a position or bound given as a number, or a string of one."""
+        number = self.to_number(value)
+        if not math.isfinite(number):
+            raise exceptions.KedSemanticError(
+                f"'{name}' expects a number, not '{self.to_string(value)}'"
+            )
+        return int(number)
+
+    def __expect_map(self, name: str, value: Any) -> KedMap:
+        if not isinstance(value, KedMap):
+            raise exceptions.KedSemanticError(
+                f"'{name}' expects a map, not '{type(value).__name__}'"
+            )
+        return value
+
+    def __expect_array(self, name: str, value: Any) -> KedArray:
+        if isinstance(value, KedArray):
+            return value
+        elif isinstance(value, (KedList, KedRange, KedBytes, KedGenerator)):
+            return KedArray(value)
+        raise exceptions.KedSemanticError(
+            f"'{name}' expects a list, array, range or generator, not '{type(value).__name__}'"
+        )
+
+    def __expect_file(self, name: str, value: Any) -> KedFile:
+        if not isinstance(value, KedFile):
+            raise exceptions.KedSemanticError(
+                f"'{name}' expects a file, not '{type(value).__name__}'"
+            )
+        elif value.closed:
+            raise exceptions.KedSemanticError(f"File '{value.path}' is closed")
+        return value
+
+    def __expect_input(self, name: str, source: Optional[KedFile]) -> InputStream:
+        if source is None:
+            # Show any prompt before waiting on standard input
+            self.output.flush()
+            return self.input
+        file = self.__expect_file(name, source)
+        if file.input is None:
+            raise exceptions.KedSemanticError(
+                f"File '{file.path}' is not open for reading"
+            )
+        return file.input
+
+    def __file_path(self, name: str, path: Any) -> str:
+        # Paths are relative to the running file, as imports are
+        return os.path.join(self.cwd, self.__expect_string(name, path))
+
+    def __map_file(self, name: str, path: Any) -> Union[mmap.mmap, bytes]:
+        path = self.__file_path(name, path)
+        try:
+            return map_file(path)
+        except OSError as exc:
+            raise exceptions.KedSemanticError(f"Cannot open '{path}': {exc.strerror}")
+
+    def __resolve_class(self, node: ast.ScopeResolution) -> KedClass:
+        value = self.resolve(node.value)
+
+        # If value is a namespace, operate on its class
+        if isinstance(value, KedObject):
+            value = value.class_type
+
+        # If value is neither a class nor an object, raise an exception
+        if not isinstance(value, KedClass):
+            raise exceptions.KedSemanticError(
+                f"Operator '::' must be used on a class or thing, not '{type(value).__name__}'"
+            )
+
+        return value
 
     def __bind_instance_method(self, func, instance) -> KedFunction:
         def bound_func(*args):
-            bound_frame = Frame(instance.name, parent=self.current_scope)
+            bound_frame = Frame(instance.class_type.name, parent=self.current_scope)
             self.call_stack.push(bound_frame)
             return_value = func(*args)
             self.call_stack.pop()
@@ -456,7 +1352,7 @@ class KedInterpreter(visitor.KedASTVisitor):
         else:
             base_instance = None
 
-        instance = KedObject(class_type)
+        instance = KedObject(class_type, base_instance)
 
         # Execute class body to create attributes
         frame = Frame(class_type.name, parent=self.current_scope)
@@ -468,17 +1364,10 @@ class KedInterpreter(visitor.KedASTVisitor):
             self.visit(stmt)
         self.call_stack.pop()
 
-        # Inherit attributes from base class instance
-        if base_instance is not None:
-            for key in base_instance.namespace:
-                instance[key] = base_instance[key]
-
-        # Inherit attributes from base class instance
+        # Attributes not declared by the class are inherited from base_instance
         for key, value in frame._members.items():
             if isinstance(value, KedFunction):
                 value = self.__bind_instance_method(value, instance)
-            symbol = NamespacedSymbol(key.name, instance)
-            instance[key.name] = symbol
-            self.current_scope.declare(symbol, value)
+            instance[key.name] = value
 
         return instance
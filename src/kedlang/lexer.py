@@ -1,6 +1,12 @@
+import re
+from array import array
+from typing import Any, Iterable, Iterator, Tuple
+
 from sly import Lexer
 from sly.lex import Token
 
+from .source import LineTable
+
 
 def find_column(text: str, token: Token):
     last_cr = text.rfind("\n", 0, token.index)
@@ -10,6 +16,14 @@ def find_column(text: str, token: Token):
     return column
 
 
+def decode_string(text: str) -> str:
+    """Strip the quotes from a string literal and decode its escapes."""
+    value = text[1:-1]
+    if "\\" not in value:
+        return value
+    return value.encode("latin-1", "backslashreplace").decode("unicode-escape")
+
+
 class KedLexer(Lexer):
     # pyright: reportUndefinedVariable=false
 
@@ -25,9 +39,12 @@ class KedLexer(Lexer):
         ELIF,
         ELSE,
         WHILE,
+        FOR,
+        IN,
         BREAK,
         CONTINUE,
         RETURN,
+        YIELD,
         NULL,
         TRUE,
         FALSE,
@@ -67,7 +84,7 @@ class KedLexer(Lexer):
         THROW,
     }
 
-    literals = {"(", ")", "[", "]", "{", "}", "=", "+", "-", ".", ",", "!"}
+    literals = {"(", ")", "[", "]", "{", "}", "=", "+", "-", ".", ",", "!", ":"}
 
     # String containing ignored characters
     ignore = " \t"
@@ -114,9 +131,12 @@ class KedLexer(Lexer):
 
     # Loops
     NAME[r"eraGoOnSure"] = WHILE
+    NAME[r"forEveryWan"] = FOR
+    NAME[r"in"] = IN
     NAME[r"ahStop"] = BREAK
     NAME[r"ahGoOn"] = CONTINUE
     NAME[r"return"] = RETURN
+    NAME[r"giveUs"] = YIELD
 
     # Boolean operators
     NAME[r"not"] = NOT
@@ -165,9 +185,7 @@ class KedLexer(Lexer):
     @_(r"'.*?'")
     @_(r'".*?"')
     def STRING(self, t: Token) -> Token:
-        t.value = (
-            t.value[1:-1].encode("latin-1", "backslashreplace").decode("unicode-escape")
-        )
+        t.value = decode_string(t.value)
         return t
 
     @_(r"[+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?")
@@ -183,6 +201,148 @@ class KedLexer(Lexer):
         self.lineno += t.value.count("\n")
 
     def error(self, t: Token):
-        print("Line %d: Bad character %r" % (self.lineno, t.value[0]))
+        # Leave the parser to report the bad character as a syntax error
         self.index += 1
         return t
+
+    def tokenize_chunks(self, chunks: Iterable[str], base: int = 0) -> Iterator[Token]:
+        """Tokenize text that arrives in chunks ending on line boundaries.
+
+        Token indexes are offsets into the whole text, as if the chunks had
+        been joined and passed to `tokenize`, plus `base`.
+        """
+        lineno, index = 1, base
+        for chunk in chunks:
+            for t in self.tokenize(chunk, lineno):
+                t.index += index
+                t.end += index
+                yield t
+            lineno += chunk.count("\n")
+            index += len(chunk)
+
+    def tokenize_compact(self, text: str) -> "TokenStream":
+        """Tokenize `text` into a compact `TokenStream`.
+
+        This matches the same rules as `tokenize` in a single pass of
+        `COMPACT_PATTERN`, which also swallows ignored characters and covers
+        literals and bad characters, so no Python code runs per skipped
+        character. Each token is stored as a row of parallel arrays instead
+        of a `Token` object, and line starts are recorded as newlines are
+        skipped. Rules that convert token values must be mirrored in
+        `COMPACT_CONVERTERS`.
+        """
+        stream = TokenStream(LineTable())
+        append_type = stream.types.append
+        append_value = stream.values.append
+        append_offset = stream.offsets.append
+        add_line = stream.lines.add_line
+
+        keywords = self._remapping["NAME"]
+        codes = TOKEN_CODES
+        converters = COMPACT_CONVERTERS
+        names = {}
+
+        for m in COMPACT_PATTERN.finditer(text):
+            type_ = m.lastgroup
+            value = m.group(type_)
+            end = m.end()
+            offset = end - len(value)
+            if type_ == "NAME":
+                type_ = keywords.get(value, type_)
+                value = names.setdefault(value, value)
+            elif type_ == "VARIABLE":
+                value = names.setdefault(value, value)
+            elif type_ in converters:
+                value = converters[type_](value)
+            elif type_ == "newline":
+                for line_start in range(offset + 1, end + 1):
+                    add_line(line_start)
+                continue
+            elif type_ == "comment":
+                continue
+            elif type_ == "_literal":
+                type_ = value
+            elif type_ == "_error":
+                t = Token()
+                t.type, t.value, t.index = "ERROR", value, offset
+                self.index, self.lineno = offset, len(stream.lines)
+                self.error(t)
+                type_ = "ERROR"
+
+            append_type(codes[type_])
+            append_value(value)
+            append_offset(offset)
+
+        return stream
+
+
+TOKEN_TYPES = tuple(sorted(KedLexer.tokens | KedLexer.literals)) + ("ERROR",)
+TOKEN_CODES = {name: code for code, name in enumerate(TOKEN_TYPES)}
+
+COMPACT_PATTERN = re.compile(
+    f"[{re.escape(KedLexer.ignore)}]*(?:"
+    + "|".join(
+        [
+            KedLexer._master_re.pattern,
+            f"(?P<_literal>[{re.escape(''.join(sorted(KedLexer.literals)))}])",
+            "(?P<_error>.)",
+        ]
+    )
+    + ")",
+    KedLexer.reflags,
+)
+
+COMPACT_CONVERTERS = {
+    "NULL": lambda value: None,
+    "TRUE": lambda value: True,
+    "FALSE": lambda value: False,
+    "STRING": decode_string,
+    "NUMBER": float,
+}
+
+
+class TokenStream:
+    """Tokens stored as parallel arrays of type code, value and offset.
+
+    A stream holds one small integer per token type and shares a single
+    `LineTable` for positions, so it is far smaller than the equivalent list
+    of `Token` objects. Iterating it yields `Token`s on demand for the
+    parser.
+    """
+
+    __slots__ = ("types", "values", "offsets", "lines")
+
+    def __init__(self, lines: LineTable) -> None:
+        self.types = array("H")
+        self.values = []
+        self.offsets = array("q")
+        self.lines = lines
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {len(self)} tokens>"
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getitem__(self, index: int) -> Tuple[str, Any]:
+        return TOKEN_TYPES[self.types[index]], self.values[index]
+
+    def __iter__(self) -> Iterator[Token]:
+        lines = self.lines.starts
+        count, lineno = len(lines), 1
+        for code, value, offset in zip(self.types, self.values, self.offsets):
+            while lineno < count and lines[lineno] <= offset:
+                lineno += 1
+            t = Token()
+            t.type, t.value, t.lineno, t.index = (
+                TOKEN_TYPES[code],
+                value,
+                lineno,
+                offset,
+            )
+            t.end = None
+            yield t
+
+    def position(self, index: int) -> Tuple[int, int]:
+        """Return the line and column at which a token starts."""
+        return self.lines.locate(self.offsets[index])
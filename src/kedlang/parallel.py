@@ -0,0 +1,173 @@
+import io
+import math
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, List, Optional, Set
+
+from kedlang import ast
+from kedlang.callstack import Frame
+from kedlang.exceptions import KedSemanticError
+from kedlang.source import SourceMap
+from kedlang.symbol import Symbol
+from kedlang.types import KedFunction
+
+# Chunks of values sent to each worker process, so that the cost of sending a
+# function is spread over many calls without leaving workers idle at the end
+CHUNKS_PER_WORKER = 4
+
+# The interpreter each worker process calls functions in
+_worker = None
+
+# The index of the first source a worker loads itself, far above those of the
+# calling interpreter, so that nodes from either are never taken for the other
+WORKER_SOURCES = 1 << 32
+
+
+def free_names(func: ast.FunctionDef) -> Set[str]:
+    """Return the names of the variables and functions a function uses from
+    the scope around it.
+
+    Its parameters and the names its body declares, with `remember` or as
+    functions and classes, belong to each call rather than to that scope, so
+    they are left out even where an outer name is the same.
+    """
+    used: Set[str] = set()
+    declared = {param.value for param in func.params}
+    if func.rest_param is not None:
+        declared.add(func.rest_param.value)
+    _collect_names(func.body, used, declared)
+    return used - declared
+
+
+def _collect_names(node: Any, used: Set[str], declared: Set[str]) -> None:
+    if isinstance(node, (ast.Name, ast.Variable)):
+        used.add(node.value)
+    elif isinstance(node, ast.FunctionDef):
+        declared.add(node.name.value)
+        used.update(free_names(node))
+    elif isinstance(node, ast.ClassDef):
+        declared.add(node.name.value)
+        # Members are declared in the class, not around it
+        _collect_names(node.base, used, declared)
+        _collect_names(node.body, used, set())
+    elif isinstance(node, ast.KedAST):
+        if isinstance(node, ast.Declare):
+            declared.add(node.variable.value)
+        for cls in type(node).__mro__:
+            for slot in getattr(cls, "__slots__", ()):
+                if slot != "position":
+                    _collect_names(getattr(node, slot, None), used, declared)
+    elif isinstance(node, list):
+        for child in node:
+            _collect_names(child, used, declared)
+
+
+class FunctionPickler(pickle.Pickler):
+    """Pickles Ked functions as their definition and the values they use.
+
+    A function is sent as its `FunctionDef` node along with the value of each
+    of its free names that it finds in the scope it closes over, other than
+    builtins. Functions among those values are sent the same way, and a
+    function that calls itself is restored as a single function.
+    """
+
+    def __init__(self, file: io.BytesIO, builtins: Frame) -> None:
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.builtins = builtins
+
+    def reducer_override(self, obj: Any) -> Any:
+        if not isinstance(obj, KedFunction):
+            return NotImplemented
+        elif obj.node is None:
+            raise KedSemanticError(
+                f"{obj} cannot be sent to another process, "
+                "only functions defined with 'remember' can"
+            )
+        return (_load_function, (obj.node,), self.__closure(obj), None, None, _close)
+
+    def __closure(self, func: KedFunction) -> dict:
+        closure = {}
+        for name in free_names(func.node):
+            symbol = Symbol(name)
+            if symbol not in func.scope:
+                continue
+            value = func.scope.fetch(symbol)
+            if symbol in self.builtins and value is self.builtins.fetch(symbol):
+                continue
+            closure[name] = value
+        return closure
+
+
+class ProcessPool:
+    """Maps Ked functions over values in a pool of worker processes.
+
+    Each worker has an interpreter of its own. Errors raised in a worker at
+    nodes from the calling interpreter keep their position, which that
+    interpreter locates in its own line tables, so the pool never needs to
+    restart as more sources are loaded.
+    """
+
+    __slots__ = ("executor", "workers")
+
+    def __init__(self, workers: Optional[int] = None) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(self.workers, initializer=_start_worker)
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.workers} workers>"
+
+    def map(
+        self, func: KedFunction, values: List[Any], builtins: Frame, cwd: str
+    ) -> List[Any]:
+        """Call `func` on each value in `cwd`, returning the results in order."""
+        size = max(1, math.ceil(len(values) / (self.workers * CHUNKS_PER_WORKER)))
+        payloads = [
+            self.__dump((cwd, func, values[start : start + size]), builtins)
+            for start in range(0, len(values), size)
+        ]
+        results = []
+        for chunk in self.executor.map(_map_chunk, payloads):
+            results.extend(chunk)
+        return results
+
+    def shutdown(self) -> None:
+        self.executor.shutdown()
+
+    @staticmethod
+    def __dump(payload: Any, builtins: Frame) -> bytes:
+        file = io.BytesIO()
+        try:
+            FunctionPickler(file, builtins).dump(payload)
+        except (pickle.PicklingError, TypeError, AttributeError) as exc:
+            raise KedSemanticError(f"Cannot send a value to another process: {exc}")
+        return file.getvalue()
+
+
+def _start_worker() -> None:
+    global _worker
+    from kedlang.interpreter import KedInterpreter
+    from kedlang.lexer import KedLexer
+    from kedlang.parser import KedParser
+
+    _worker = KedInterpreter(KedLexer(), KedParser())
+    _worker.sources = SourceMap(WORKER_SOURCES)
+
+
+def _load_function(node: ast.FunctionDef) -> KedFunction:
+    return _worker.make_function(node, Frame("closure", parent=_worker.current_scope))
+
+
+def _close(func: KedFunction, closure: dict) -> None:
+    for name, value in closure.items():
+        func.scope.declare(Symbol(name), value)
+
+
+def _map_chunk(payload: bytes) -> List[Any]:
+    cwd, func, values = pickle.loads(payload)
+    _worker.cwd_stack.push(cwd)
+    try:
+        return [func(value) for value in values]
+    finally:
+        _worker.cwd_stack.pop()
+        _worker.flush()
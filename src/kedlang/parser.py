@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Callable, Iterator, Optional
 from sly import Parser
 from sly.lex import Token
 from sly.yacc import YaccProduction
@@ -12,12 +12,33 @@ def get_token(p: YaccProduction, index: int = 0) -> Token:
     return p._slice[index]
 
 
+def located(p: YaccProduction, node: ast.KedAST) -> ast.KedAST:
+    """Give a node the position of the first token or node in its production."""
+    for symbol in p._slice:
+        if isinstance(symbol, Token):
+            node.position = symbol.index
+            break
+        position = getattr(symbol.value, "position", None)
+        if position is not None:
+            node.position = position
+            break
+    else:
+        node.position = None
+    return node
+
+
 class KedParser(Parser):
 
     # Get the token list from the lexer (required)
     tokens = lexer.KedLexer.tokens
     # debugfile = "parser.out"
 
+    # sly records positions for every reduction in dicts that outlive parsing
+    track_positions = False
+
+    # Receives top-level statements as they are parsed, see `parse`
+    on_statement: Optional[Callable[[ast.Statement], None]] = None
+
     # pyright: reportUndefinedVariable=false
 
     precedence = (
@@ -40,29 +61,62 @@ class KedParser(Parser):
         ("left", "(", "[", ".", ","),
     )
 
-    @_("statements")
+    def parse(
+        self,
+        tokens: Iterator[Token],
+        on_statement: Optional[Callable[[ast.Statement], None]] = None,
+    ) -> ast.Program:
+        """Parse a token stream into a program.
+
+        If `on_statement` is given, each top-level statement is passed to it
+        as soon as it has been reduced instead of being kept in the returned
+        program, so a caller can execute a source while it is still being
+        read.
+        """
+        self.on_statement = on_statement
+        try:
+            return super().parse(tokens)
+        finally:
+            self.on_statement = None
+            # Don't keep the last program alive through the parser's state
+            self.tokens = self.production = None
+            self.statestack = self.symstack = None
+
+    @_("top_level_statements")
     def translation_unit(self, p: YaccProduction):
-        return ast.Program(p.statements)
+        return located(p, ast.Program(p.top_level_statements))
+
+    @_("")
+    def top_level_statements(self, p: YaccProduction):
+        return []
+
+    @_("top_level_statements statement")
+    def top_level_statements(self, p: YaccProduction):
+        if self.on_statement is not None:
+            self.on_statement(p.statement)
+        else:
+            p.top_level_statements.append(p.statement)
+        return p.top_level_statements
 
     @_("DECLARE variable LIKE")
     def variable_declaration(self, p: YaccProduction):
-        return ast.Declare(p.variable)
+        return located(p, ast.Declare(p.variable))
 
     @_('DECLARE variable "=" assignment_expression LIKE')
     def variable_declaration(self, p: YaccProduction):
-        return ast.Declare(p.variable, p.assignment_expression)
+        return located(p, ast.Declare(p.variable, p.assignment_expression))
 
     @_('DECLARE name "(" spread_parameter_list ")" statement')
     def function_declaration(self, p: YaccProduction):
-        return ast.FunctionDef(p.name, p.spread_parameter_list, p.statement)
+        return located(p, ast.FunctionDef(p.name, p.spread_parameter_list, p.statement))
 
     @_("CLASS name class_body")
     def class_declaration(self, p: YaccProduction):
-        return ast.ClassDef(p.name, None, p.class_body)
+        return located(p, ast.ClassDef(p.name, None, p.class_body))
 
     @_("CLASS name superclass class_body")
     def class_declaration(self, p: YaccProduction):
-        return ast.ClassDef(p.name, p.superclass, p.class_body)
+        return located(p, ast.ClassDef(p.name, p.superclass, p.class_body))
 
     @_("EXTENDS name")
     def superclass(self, p: YaccProduction):
@@ -82,7 +136,8 @@ class KedParser(Parser):
 
     @_("class_body_declarations class_body_declaration")
     def class_body_declarations(self, p: YaccProduction):
-        return [*p.class_body_declarations, p.class_body_declaration]
+        p.class_body_declarations.append(p.class_body_declaration)
+        return p.class_body_declarations
 
     @_("field_declaration", "method_declaration")
     def class_body_declaration(self, p: YaccProduction):
@@ -90,31 +145,32 @@ class KedParser(Parser):
 
     @_("variable LIKE")
     def field_declaration(self, p: YaccProduction):
-        return ast.Declare(p.variable)
+        return located(p, ast.Declare(p.variable))
 
     @_('variable "=" assignment_expression LIKE')
     def field_declaration(self, p: YaccProduction):
-        return ast.Declare(p.variable, p.assignment_expression)
+        return located(p, ast.Declare(p.variable, p.assignment_expression))
 
     @_("STATIC field_declaration")
     def field_declaration(self, p: YaccProduction):
-        return ast.Static(p.field_declaration)
+        return located(p, ast.Static(p.field_declaration))
 
     @_('name "(" spread_parameter_list ")" statement')
     def method_declaration(self, p: YaccProduction):
-        return ast.FunctionDef(p.name, p.spread_parameter_list, p.statement)
+        return located(p, ast.FunctionDef(p.name, p.spread_parameter_list, p.statement))
 
     @_("STATIC method_declaration")
     def method_declaration(self, p: YaccProduction):
-        return ast.Static(p.method_declaration)
+        return located(p, ast.Static(p.method_declaration))
 
     @_("UNDECLARE variable LIKE")
     def undeclaration(self, p: YaccProduction):
-        return ast.Delete(p.variable)
+        return located(p, ast.Delete(p.variable))
 
     @_('parameter_list "," spread_parameter')
     def spread_parameter_list(self, p: YaccProduction):
-        return [*p.parameter_list, p.spread_parameter]
+        p.parameter_list.append(p.spread_parameter)
+        return p.parameter_list
 
     @_("spread_parameter")
     def spread_parameter_list(self, p: YaccProduction):
@@ -130,7 +186,8 @@ class KedParser(Parser):
 
     @_('parameter_list "," parameter')
     def parameter_list(self, p: YaccProduction):
-        return [*p.parameter_list, p.parameter]
+        p.parameter_list.append(p.parameter)
+        return p.parameter_list
 
     @_("parameter")
     def parameter_list(self, p: YaccProduction):
@@ -138,7 +195,7 @@ class KedParser(Parser):
 
     @_("SPREAD variable")
     def spread_parameter(self, p: YaccProduction):
-        return ast.Spread(p.variable)
+        return located(p, ast.Spread(p.variable))
 
     @_("variable")
     def parameter(self, p: YaccProduction):
@@ -146,7 +203,7 @@ class KedParser(Parser):
 
     @_('"{" statements "}"')
     def compound_statement(self, p: YaccProduction):
-        return ast.Compound(p.statements)
+        return located(p, ast.Compound(p.statements))
 
     @_("")
     def statements(self, p: YaccProduction):
@@ -154,7 +211,8 @@ class KedParser(Parser):
 
     @_("statements statement")
     def statements(self, p: YaccProduction):
-        return [*p.statements, p.statement]
+        p.statements.append(p.statement)
+        return p.statements
 
     @_(
         "variable_declaration",
@@ -176,27 +234,27 @@ class KedParser(Parser):
 
     @_("LIKE")
     def expression_statement(self, p: YaccProduction):
-        return ast.Expr(ast.NoOp())
+        return located(p, ast.Expr(ast.NoOp()))
 
     @_("expression LIKE")
     def expression_statement(self, p: YaccProduction):
-        return ast.Expr(p.expression)
+        return located(p, ast.Expr(p.expression))
 
     @_('IF "(" expression ")" statement %prec IF')
     def if_statement(self, p: YaccProduction):
-        return ast.If(p.expression, [p.statement], [])
+        return located(p, ast.If(p.expression, [p.statement], []))
 
     @_('IF "(" expression ")" statement else_statement')
     def if_statement(self, p: YaccProduction):
-        return ast.If(p.expression, [p.statement], [p.else_statement])
+        return located(p, ast.If(p.expression, [p.statement], [p.else_statement]))
 
     @_('ELIF "(" expression ")" statement %prec ELIF')
     def else_statement(self, p: YaccProduction):
-        return ast.If(p.expression, [p.statement], [])
+        return located(p, ast.If(p.expression, [p.statement], []))
 
     @_('ELIF "(" expression ")" statement else_statement')
     def else_statement(self, p: YaccProduction):
-        return ast.If(p.expression, [p.statement], [p.else_statement])
+        return located(p, ast.If(p.expression, [p.statement], [p.else_statement]))
 
     @_("ELSE statement")
     def else_statement(self, p: YaccProduction):
@@ -204,15 +262,17 @@ class KedParser(Parser):
 
     @_("TRY statement %prec TRY")
     def try_statement(self, p: YaccProduction):
-        return ast.Try([p.statement], [], [])
+        return located(p, ast.Try([p.statement], [], []))
 
     @_("TRY statement catch_statements %prec CATCH")
     def try_statement(self, p: YaccProduction):
-        return ast.Try([p.statement], p.catch_statements, [])
+        return located(p, ast.Try([p.statement], p.catch_statements, []))
 
     @_("TRY statement catch_statements finally_statement %prec FINALLY")
     def try_statement(self, p: YaccProduction):
-        return ast.Try([p.statement], p.catch_statements, [p.finally_statement])
+        return located(
+            p, ast.Try([p.statement], p.catch_statements, [p.finally_statement])
+        )
 
     @_("catch_statement")
     def catch_statements(self, p: YaccProduction):
@@ -220,11 +280,12 @@ class KedParser(Parser):
 
     @_("catch_statements catch_statement")
     def catch_statements(self, p: YaccProduction):
-        return [*p.catch_statements, p.catch_statement]
+        p.catch_statements.append(p.catch_statement)
+        return p.catch_statements
 
     @_('CATCH "(" identifier variable ")" statement')
     def catch_statement(self, p: YaccProduction):
-        return ast.Catch(p.identifier, p.variable, [p.statement])
+        return located(p, ast.Catch(p.identifier, p.variable, [p.statement]))
 
     @_("FINALLY statement")
     def finally_statement(self, p: YaccProduction):
@@ -232,39 +293,47 @@ class KedParser(Parser):
 
     @_("THROW expression LIKE")
     def throw_statement(self, p: YaccProduction):
-        return ast.Throw(p.expression)
+        return located(p, ast.Throw(p.expression))
 
     @_('WHILE "(" expression ")" statement')
     def iteration_statement(self, p: YaccProduction):
-        return ast.While(p.expression, [p.statement])
+        return located(p, ast.While(p.expression, [p.statement]))
+
+    @_('FOR "(" variable IN expression ")" statement')
+    def iteration_statement(self, p: YaccProduction):
+        return located(p, ast.For(p.variable, p.expression, [p.statement]))
 
     @_("CONTINUE LIKE")
     def jump_statement(self, p: YaccProduction):
-        return ast.Continue()
+        return located(p, ast.Continue())
 
     @_("BREAK LIKE")
     def jump_statement(self, p: YaccProduction):
-        return ast.Break()
+        return located(p, ast.Break())
 
     @_("RETURN LIKE")
     def jump_statement(self, p: YaccProduction):
-        return ast.Return()
+        return located(p, ast.Return())
 
     @_("RETURN expression LIKE")
     def jump_statement(self, p: YaccProduction):
-        return ast.Return(p.expression)
+        return located(p, ast.Return(p.expression))
+
+    @_("YIELD expression LIKE")
+    def jump_statement(self, p: YaccProduction):
+        return located(p, ast.Yield(p.expression))
 
     @_("PRINT expression LIKE")
     def print_statement(self, p: YaccProduction):
-        return ast.Print(p.expression)
+        return located(p, ast.Print(p.expression))
 
     @_("IMPORT expression LIKE")
     def import_statement(self, p: YaccProduction):
-        return ast.Import(p.expression)
+        return located(p, ast.Import(p.expression))
 
     @_("STRICT_IMPORT expression LIKE")
     def import_statement(self, p: YaccProduction):
-        return ast.Import(p.expression, is_strict=True)
+        return located(p, ast.Import(p.expression, is_strict=True))
 
     @_("logical_or_expression")
     def conditional_expression(self, p: YaccProduction):
@@ -276,7 +345,7 @@ class KedParser(Parser):
 
     @_("logical_or_expression OR logical_and_expression")
     def logical_or_expression(self, p: YaccProduction):
-        return ast.BinaryOp(p[0], ast.Or(), p[-1])
+        return located(p, ast.BinaryOp(p[0], ast.Or(), p[-1]))
 
     @_("eq_expression")
     def logical_and_expression(self, p: YaccProduction):
@@ -284,7 +353,7 @@ class KedParser(Parser):
 
     @_("logical_and_expression AND eq_expression")
     def logical_and_expression(self, p: YaccProduction):
-        return ast.BinaryOp(p[0], ast.And(), p[-1])
+        return located(p, ast.BinaryOp(p[0], ast.And(), p[-1]))
 
     @_("relational_expression")
     def eq_expression(self, p: YaccProduction):
@@ -292,19 +361,19 @@ class KedParser(Parser):
 
     @_("eq_expression EQ relational_expression")
     def eq_expression(self, p: YaccProduction):
-        return ast.BinaryOp(p[0], ast.Eq(), p[-1])
+        return located(p, ast.BinaryOp(p[0], ast.Eq(), p[-1]))
 
     @_("eq_expression STRICTEQ relational_expression")
     def eq_expression(self, p: YaccProduction):
-        return ast.BinaryOp(p[0], ast.StrictEq(), p[-1])
+        return located(p, ast.BinaryOp(p[0], ast.StrictEq(), p[-1]))
 
     @_("eq_expression eq_operator NOT relational_expression %prec EQ")
     def eq_expression(self, p: YaccProduction):
-        return ast.BinaryOp(p[0], ast.NotEq(), p[-1])
+        return located(p, ast.BinaryOp(p[0], ast.NotEq(), p[-1]))
 
     @_("eq_expression strict_eq_operator NOT relational_expression %prec STRICTEQ")
     def eq_expression(self, p: YaccProduction):
-        return ast.BinaryOp(p[0], ast.NotStrictEq(), p[-1])
+        return located(p, ast.BinaryOp(p[0], ast.NotStrictEq(), p[-1]))
 
     @_("EQ")
     def eq_operator(self, p: YaccProduction):
@@ -320,19 +389,19 @@ class KedParser(Parser):
 
     @_("relational_expression LT concat_expression")
     def relational_expression(self, p: YaccProduction):
-        return ast.BinaryOp(p[0], ast.Lt(), p[2])
+        return located(p, ast.BinaryOp(p[0], ast.Lt(), p[2]))
 
     @_("relational_expression GT concat_expression")
     def relational_expression(self, p: YaccProduction):
-        return ast.BinaryOp(p[0], ast.Gt(), p[2])
+        return located(p, ast.BinaryOp(p[0], ast.Gt(), p[2]))
 
     @_("relational_expression LTE concat_expression")
     def relational_expression(self, p: YaccProduction):
-        return ast.BinaryOp(p[0], ast.LtE(), p[2])
+        return located(p, ast.BinaryOp(p[0], ast.LtE(), p[2]))
 
     @_("relational_expression GTE concat_expression")
     def relational_expression(self, p: YaccProduction):
-        return ast.BinaryOp(p[0], ast.GtE(), p[2])
+        return located(p, ast.BinaryOp(p[0], ast.GtE(), p[2]))
 
     @_("additive_expression")
     def concat_expression(self, p: YaccProduction):
@@ -340,7 +409,7 @@ class KedParser(Parser):
 
     @_("concat_expression CONCAT additive_expression")
     def concat_expression(self, p: YaccProduction):
-        return ast.BinaryOp(p[0], ast.Concat(), p[2])
+        return located(p, ast.BinaryOp(p[0], ast.Concat(), p[2]))
 
     @_("multiplicative_expression")
     def additive_expression(self, p: YaccProduction):
@@ -348,11 +417,11 @@ class KedParser(Parser):
 
     @_("additive_expression PLUS cast_expression")
     def additive_expression(self, p: YaccProduction):
-        return ast.BinaryOp(p[0], ast.Add(), p[2])
+        return located(p, ast.BinaryOp(p[0], ast.Add(), p[2]))
 
     @_("additive_expression MINUS cast_expression")
     def additive_expression(self, p: YaccProduction):
-        return ast.BinaryOp(p[2], ast.Sub(), p[0])  # reversed
+        return located(p, ast.BinaryOp(p[2], ast.Sub(), p[0]))  # reversed
 
     @_("cast_expression")
     def multiplicative_expression(self, p: YaccProduction):
@@ -360,15 +429,15 @@ class KedParser(Parser):
 
     @_("multiplicative_expression TIMES cast_expression")
     def multiplicative_expression(self, p: YaccProduction):
-        return ast.BinaryOp(p[0], ast.Mult(), p[2])
+        return located(p, ast.BinaryOp(p[0], ast.Mult(), p[2]))
 
     @_("multiplicative_expression DIVIDE cast_expression")
     def multiplicative_expression(self, p: YaccProduction):
-        return ast.BinaryOp(p[2], ast.Div(), p[0])  # reversed
+        return located(p, ast.BinaryOp(p[2], ast.Div(), p[0]))  # reversed
 
     @_("multiplicative_expression MOD cast_expression")
     def multiplicative_expression(self, p: YaccProduction):
-        return ast.BinaryOp(p[0], ast.Mod(), p[2])
+        return located(p, ast.BinaryOp(p[0], ast.Mod(), p[2]))
 
     @_("unary_expression")
     def cast_expression(self, p: YaccProduction):
@@ -380,7 +449,7 @@ class KedParser(Parser):
 
     @_("unary_operator cast_expression %prec UMINUS")
     def unary_expression(self, p: YaccProduction):
-        return ast.UnaryOp(p.unary_operator, p.cast_expression)
+        return located(p, ast.UnaryOp(p.unary_operator, p.cast_expression))
 
     @_("primary_expression")
     def postfix_expression(self, p: YaccProduction):
@@ -388,21 +457,37 @@ class KedParser(Parser):
 
     @_('postfix_expression "[" expression "]"')
     def postfix_expression(self, p: YaccProduction):
-        return ast.Subscript(p.postfix_expression, p.expression)
+        return located(p, ast.Subscript(p.postfix_expression, p.expression))
+
+    @_('postfix_expression "[" expression ":" expression "]"')
+    def postfix_expression(self, p: YaccProduction):
+        return located(p, ast.Slice(p.postfix_expression, p.expression0, p.expression1))
+
+    @_('postfix_expression "[" expression ":" "]"')
+    def postfix_expression(self, p: YaccProduction):
+        return located(p, ast.Slice(p.postfix_expression, p.expression, None))
+
+    @_('postfix_expression "[" ":" expression "]"')
+    def postfix_expression(self, p: YaccProduction):
+        return located(p, ast.Slice(p.postfix_expression, None, p.expression))
+
+    @_('postfix_expression "[" ":" "]"')
+    def postfix_expression(self, p: YaccProduction):
+        return located(p, ast.Slice(p.postfix_expression, None, None))
 
     @_('postfix_expression "(" argument_list ")"')
     def postfix_expression(self, p: YaccProduction):
-        return ast.Call(p.postfix_expression, p.argument_list)
+        return located(p, ast.Call(p.postfix_expression, p.argument_list))
 
     @_('postfix_expression "." NAME')
     @_('postfix_expression "." VARIABLE')
     def postfix_expression(self, p: YaccProduction):
-        return ast.Attribute(p.postfix_expression, p[-1])
+        return located(p, ast.Attribute(p.postfix_expression, p[-1]))
 
     @_("postfix_expression SCOPE_RESOLUTION NAME")
     @_("postfix_expression SCOPE_RESOLUTION VARIABLE")
     def postfix_expression(self, p: YaccProduction):
-        return ast.ScopeResolution(p.postfix_expression, p[-1])
+        return located(p, ast.ScopeResolution(p.postfix_expression, p[-1]))
 
     @_("")
     def argument_list(self, p: YaccProduction):
@@ -410,7 +495,8 @@ class KedParser(Parser):
 
     @_('argument_list "," argument')
     def argument_list(self, p: YaccProduction):
-        return [*p.argument_list, p.argument]
+        p.argument_list.append(p.argument)
+        return p.argument_list
 
     @_("argument")
     def argument_list(self, p: YaccProduction):
@@ -418,7 +504,7 @@ class KedParser(Parser):
 
     @_("SPREAD assignment_expression")
     def argument(self, p: YaccProduction):
-        return ast.Spread(p.assignment_expression)
+        return located(p, ast.Spread(p.assignment_expression))
 
     @_("assignment_expression")
     def argument(self, p: YaccProduction):
@@ -426,7 +512,8 @@ class KedParser(Parser):
 
     @_('element_list "," element')
     def element_list(self, p: YaccProduction):
-        return [*p.element_list, p.element]
+        p.element_list.append(p.element)
+        return p.element_list
 
     @_("element")
     def element_list(self, p: YaccProduction):
@@ -434,7 +521,7 @@ class KedParser(Parser):
 
     @_("SPREAD assignment_expression")
     def element(self, p: YaccProduction):
-        return ast.Spread(p.assignment_expression)
+        return located(p, ast.Spread(p.assignment_expression))
 
     @_("assignment_expression")
     def element(self, p: YaccProduction):
@@ -443,6 +530,7 @@ class KedParser(Parser):
     @_(
         "identifier",
         "array",
+        "map",
         "number",
         "string",
         "boolean",
@@ -455,11 +543,11 @@ class KedParser(Parser):
 
     @_('INPUT "(" expression ")"')
     def input_expression(self, p: YaccProduction):
-        return ast.Input(p.expression)
+        return located(p, ast.Input(p.expression))
 
     @_('NEW identifier "(" argument_list ")"')
     def constructor_expression(self, p: YaccProduction):
-        return ast.Constructor(p.identifier, p.argument_list)
+        return located(p, ast.Constructor(p.identifier, p.argument_list))
 
     @_('"(" expression ")"')
     def primary_expression(self, p: YaccProduction):
@@ -475,59 +563,81 @@ class KedParser(Parser):
 
     @_('postfix_expression "=" assignment_expression')
     def assignment_expression(self, p: YaccProduction):
-        return ast.Assign(p.postfix_expression, p.assignment_expression)
+        return located(p, ast.Assign(p.postfix_expression, p.assignment_expression))
 
     @_("NOT", '"!"')
     def unary_operator(self, p: YaccProduction):
-        return ast.Not()
+        return located(p, ast.Not())
 
     @_('"+"')
     def unary_operator(self, p: YaccProduction):
-        return ast.UAdd()
+        return located(p, ast.UAdd())
 
     @_('"-"')
     def unary_operator(self, p: YaccProduction):
-        return ast.USub()
+        return located(p, ast.USub())
 
     @_('"[" "]" %prec ARRAY')
     def array(self, p: YaccProduction):
-        return ast.List([])
+        return located(p, ast.List([]))
 
     @_('"[" element_list "]" %prec ARRAY')
     def array(self, p: YaccProduction):
-        return ast.List(p.element_list)
+        return located(p, ast.List(p.element_list))
+
+    @_('"[" ":" "]" %prec ARRAY')
+    def map(self, p: YaccProduction):
+        return located(p, ast.Map([], []))
+
+    @_('"[" entry_list "]" %prec ARRAY')
+    def map(self, p: YaccProduction):
+        keys, values = zip(*p.entry_list)
+        return located(p, ast.Map(list(keys), list(values)))
+
+    @_('entry_list "," entry')
+    def entry_list(self, p: YaccProduction):
+        p.entry_list.append(p.entry)
+        return p.entry_list
+
+    @_("entry")
+    def entry_list(self, p: YaccProduction):
+        return [p.entry]
+
+    @_('assignment_expression ":" assignment_expression')
+    def entry(self, p: YaccProduction):
+        return (p.assignment_expression0, p.assignment_expression1)
 
     @_("STRING")
     def string(self, p: YaccProduction):
-        return ast.Constant(get_token(p))
+        return located(p, ast.Constant(get_token(p)))
 
     @_("NUMBER")
     def number(self, p: YaccProduction):
-        return ast.Constant(get_token(p))
+        return located(p, ast.Constant(get_token(p)))
 
     @_("TRUE", "FALSE")
     def boolean(self, p: YaccProduction):
-        return ast.Constant(get_token(p))
+        return located(p, ast.Constant(get_token(p)))
 
     @_("NULL")
     def null(self, p: YaccProduction):
-        return ast.Constant(get_token(p))
+        return located(p, ast.Constant(get_token(p)))
 
     @_('IS_DECLARED "(" variable ")"')
     def boolean(self, p: YaccProduction):
-        return ast.IsDeclared(p.variable)
+        return located(p, ast.IsDeclared(p.variable))
 
     @_('NOOP "(" ")"')
     def expression(self, p: YaccProduction):
-        return ast.NoOp()
+        return located(p, ast.NoOp())
 
     @_('SLEEP "(" expression ")"')
     def expression(self, p: YaccProduction):
-        return ast.Sleep(p.expression)
+        return located(p, ast.Sleep(p.expression))
 
     @_('EXIT "(" ")"')
     def expression(self, p: YaccProduction):
-        return ast.Exit()
+        return located(p, ast.Exit())
 
     @_("variable", "name")
     def identifier(self, p: YaccProduction):
@@ -535,20 +645,24 @@ class KedParser(Parser):
 
     @_("NAME")
     def name(self, p: YaccProduction):
-        return ast.Name(get_token(p))
+        return located(p, ast.Name(get_token(p)))
 
     @_("VARIABLE")
     def variable(self, p: YaccProduction):
-        return ast.Variable(get_token(p))
+        return located(p, ast.Variable(get_token(p)))
 
     def error(self, token: Optional[Token]):
         if token:
             lineno = getattr(token, "lineno", 0)
+            # The lexer passes on characters it cannot match as ERROR tokens
+            found = (
+                f"bad character {token.value[0]!r}"
+                if token.type == "ERROR"
+                else f"token={token.type}"
+            )
             if lineno:
-                raise KedSyntaxError(
-                    f"Syntax error at line {lineno}, token={token.type}"
-                )
+                raise KedSyntaxError(f"Syntax error at line {lineno}, {found}")
             else:
-                raise KedSyntaxError(f"Syntax error, token={token.type}")
+                raise KedSyntaxError(f"Syntax error, {found}")
         else:
             raise KedSyntaxError("Parse error in input. EOF")
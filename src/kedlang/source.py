@@ -0,0 +1,163 @@
+import codecs
+import mmap
+import os
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterator, Optional, Tuple, Union
+
+CHUNK_SIZE = 1 << 20
+
+# Positions keep the index of their source above this many offset bits
+SOURCE_SHIFT = 40
+
+
+def map_file(path: str) -> Union[mmap.mmap, bytes]:
+    """Map a file into memory for reading, without reading it.
+
+    The map keeps its own handle on the file, so none is left open. Empty
+    files cannot be mapped and give empty bytes instead.
+    """
+    with open(path, "rb") as file:
+        if not os.fstat(file.fileno()).st_size:
+            return b""
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def normalise_newlines(text: str) -> str:
+    """Convert Windows and old Mac newlines to `\\n`, as text mode does."""
+    if "\r" not in text:
+        return text
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+class LineTable:
+    """Offsets at which each line of a source file starts.
+
+    Positions are kept as plain character offsets and only converted to a
+    line and column when they are reported, so a single table per file is
+    all that is needed to locate any token or node in it.
+    """
+
+    __slots__ = ("path", "starts")
+
+    def __init__(self, text: str = "", path: Optional[str] = None) -> None:
+        self.path = path
+        self.starts = array("q", [0])
+        if text:
+            self.scan(text)
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.path} {len(self)} lines>"
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def add_line(self, offset: int) -> None:
+        self.starts.append(offset)
+
+    def scan(self, text: str, base: int = 0) -> None:
+        """Record the lines started by the newlines in `text`, which begins at
+        offset `base` of the file."""
+        find, add_line = text.find, self.starts.append
+        index = find("\n")
+        while index >= 0:
+            add_line(base + index + 1)
+            index = find("\n", index + 1)
+
+    def locate(self, offset: int) -> Tuple[int, int]:
+        """Return the 1-based line and column of a character offset."""
+        lineno = bisect_right(self.starts, offset)
+        return lineno, offset - self.starts[lineno - 1] + 1
+
+
+class SourceMap:
+    """The line tables of every source loaded by an interpreter.
+
+    A position is a single integer holding a character offset in its low
+    `SOURCE_SHIFT` bits and the index of its source's line table above them,
+    so nodes from different files can be told apart without storing a
+    reference to their file. Indexes are never reused, so the nodes of a
+    source that has been dropped cannot be located in another one, and they
+    can start at `first` to keep them apart from another map's.
+    """
+
+    __slots__ = ("tables", "next_index")
+
+    def __init__(self, first: int = 0) -> None:
+        self.tables: Dict[int, LineTable] = {}
+        # Indexes below this have been given out, including to dropped sources
+        self.next_index = first
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {list(self.tables.values())}>"
+
+    def add(self, lines: LineTable) -> int:
+        """Register a source and return the base of its positions."""
+        index = self.next_index
+        self.tables[index] = lines
+        self.next_index += 1
+        return index << SOURCE_SHIFT
+
+    def drop(self, base: int) -> None:
+        """Forget the source whose positions start at `base`."""
+        self.tables.pop(base >> SOURCE_SHIFT, None)
+
+    def locate(self, position: int) -> Optional[Tuple[Optional[str], int, int]]:
+        """Return the path, line and column of a position, or None if its
+        source has been dropped."""
+        lines = self.tables.get(position >> SOURCE_SHIFT)
+        if lines is None:
+            return None
+        lineno, column = lines.locate(position & ((1 << SOURCE_SHIFT) - 1))
+        return lines.path, lineno, column
+
+
+class SourceFile:
+    """A source file decoded incrementally from a memory map.
+
+    Iterating a `SourceFile` yields text chunks of roughly `chunk_size` bytes
+    that each end on a line boundary, with newlines normalised as in text
+    mode. No Ked token spans a line, so each chunk can be tokenized on its
+    own and only one chunk of text is alive at a time. Line starts are added
+    to `lines` as chunks are read.
+    """
+
+    def __init__(
+        self, path: str, chunk_size: int = CHUNK_SIZE, encoding: str = "utf-8"
+    ) -> None:
+        self.path = path
+        self.chunk_size = chunk_size
+        self.encoding = encoding
+        self.lines = LineTable(path=path)
+        self._map = map_file(path)
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.path}>"
+
+    def __enter__(self) -> "SourceFile":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[str]:
+        decoder = codecs.getincrementaldecoder(self.encoding)()
+        pending, offset = "", 0
+        for start in range(0, len(self._map), self.chunk_size):
+            text = pending + decoder.decode(self._map[start : start + self.chunk_size])
+            cut = text.rfind("\n") + 1
+            pending = text[cut:]
+            if cut:
+                chunk = normalise_newlines(text[:cut])
+                self.lines.scan(chunk, offset)
+                offset += len(chunk)
+                yield chunk
+        text = pending + decoder.decode(b"", final=True)
+        if text:
+            chunk = normalise_newlines(text)
+            self.lines.scan(chunk, offset)
+            yield chunk
+
+    def close(self) -> None:
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
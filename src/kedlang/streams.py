@@ -0,0 +1,90 @@
+import sys
+from typing import Iterator, List, Optional, TextIO
+
+# Characters held by an output stream before it writes them out
+BUFFER_SIZE = 1 << 16
+
+
+class OutputStream:
+    """Buffers the text printed by a program before writing it to a sink.
+
+    Text is collected until `buffer_size` characters are waiting and then
+    written to the sink in a single call, so printing many short lines costs
+    one write per buffer rather than one per line. The sink is any text
+    stream, such as `sys.stdout`, an open file, a pipe or an `io.StringIO`.
+    A buffer size of zero writes text through as soon as it is printed.
+    """
+
+    __slots__ = ("sink", "buffer_size", "_parts", "_size")
+
+    def __init__(
+        self, sink: Optional[TextIO] = None, buffer_size: Optional[int] = None
+    ) -> None:
+        self.sink = sys.stdout if sink is None else sink
+        if buffer_size is None:
+            # Show output as it is printed to a terminal
+            buffer_size = 0 if self.__interactive() else BUFFER_SIZE
+        self.buffer_size = buffer_size
+        self._parts: List[str] = []
+        self._size = 0
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self._size}/{self.buffer_size}>"
+
+    def write(self, text: str) -> None:
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write out any buffered text and flush the sink."""
+        if self._parts:
+            text = "".join(self._parts)
+            self._parts.clear()
+            self._size = 0
+            self.sink.write(text)
+        self.sink.flush()
+
+    def __interactive(self) -> bool:
+        try:
+            return self.sink.isatty()
+        except (AttributeError, ValueError):
+            return False
+
+
+class InputStream:
+    """Reads the text a program takes as input from a source.
+
+    The source is any text stream, `sys.stdin` by default. Reads go through
+    the source's own buffering, so text can be taken whole, in chunks of a
+    given size or a line at a time without a call into the interpreter per
+    character.
+    """
+
+    __slots__ = ("source",)
+
+    def __init__(self, source: Optional[TextIO] = None) -> None:
+        self.source = sys.stdin if source is None else source
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.source!r}>"
+
+    def read_all(self) -> str:
+        return self.source.read()
+
+    def read_chunk(self, size: int) -> Optional[str]:
+        """Read up to `size` characters, or return None at the end of input."""
+        return self.source.read(size) or None
+
+    def read_line(self) -> Optional[str]:
+        """Read a line without its newline, or return None at the end of input."""
+        line = self.source.readline()
+        if not line:
+            return None
+        return line[:-1] if line.endswith("\n") else line
+
+    def lines(self) -> Iterator[str]:
+        """Yield lines without their newlines as they are read."""
+        for line in self.source:
+            yield line[:-1] if line.endswith("\n") else line
@@ -0,0 +1,210 @@
+import asyncio
+import threading
+from typing import Any, Callable, List, Tuple
+
+from kedlang.exceptions import Exit, KedSemanticError
+from kedlang.types import KedTask
+
+# The task running in each thread, if any
+_current = threading.local()
+
+
+class TaskThread:
+    """The call a Ked task makes, run in a thread of its own.
+
+    The thread and the event loop hand control to each other, so only one of
+    them runs at a time: the thread runs the call until it holds on, and the
+    loop resumes it once what it held on for is done. The thread keeps its
+    whole stack while it waits, so a call can hold on in any function it
+    calls, however deeply.
+    """
+
+    __slots__ = (
+        "call",
+        "thread",
+        "resumed",
+        "paused",
+        "message",
+        "cancelled",
+        "finished",
+    )
+
+    def __init__(self, call: Callable[[], Any]) -> None:
+        self.call = call
+        self.thread = threading.Thread(target=self.__run, daemon=True)
+        self.resumed = threading.Semaphore(0)
+        self.paused = threading.Semaphore(0)
+        # What the side that runs next is sent, as a kind and a value
+        self.message: Tuple[str, Any] = ("value", None)
+        self.cancelled = False
+        self.finished = False
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.thread.name}>"
+
+    @property
+    def started(self) -> bool:
+        return self.thread.ident is not None
+
+    def step(self, kind: str = "value", value: Any = None) -> Tuple[str, Any]:
+        """Run the call until it holds on or ends, first sending it the value
+        or the error that the last thing it held on for gave.
+
+        Return `("pause", reason)`, `("return", value)` or `("raise", error)`.
+        """
+        self.message = (kind, value)
+        if self.started:
+            self.resumed.release()
+        else:
+            self.thread.start()
+        self.paused.acquire()
+        return self.message
+
+    def pause(self, reason: Any) -> Any:
+        """Hand control back to the loop from the thread, until it has done
+        what `reason` asks, and return the result."""
+        if self.cancelled:
+            # A cancelled task runs its finally blocks without holding on
+            return None
+        self.message = ("pause", reason)
+        self.paused.release()
+        self.resumed.acquire()
+        kind, value = self.message
+        if kind == "raise":
+            raise value
+        return value
+
+    def cancel(self) -> None:
+        """Unwind a call that is holding on, running its finally blocks."""
+        if self.started and not self.finished:
+            self.cancelled = True
+            self.step("raise", Exit())
+
+    def __run(self) -> None:
+        _current.thread = self
+        try:
+            self.message = ("return", self.call())
+        except BaseException as exc:
+            self.message = ("raise", exc)
+        finally:
+            self.finished = True
+            self.paused.release()
+
+
+class TaskScheduler:
+    """Runs Ked tasks concurrently on an asyncio event loop.
+
+    Each task runs its call in a `TaskThread`, handing control back to the
+    loop at each `holdOn` it reaches: a number of seconds becomes an
+    `asyncio.sleep`, a task is awaited and a blocking function is called in
+    the loop's executor. The loop runs while the main program holds on, reads
+    input or waits for a task, so any number of tasks can wait at once while
+    only one of them runs at a time.
+    """
+
+    __slots__ = ("loop", "tasks")
+
+    def __init__(self) -> None:
+        self.loop = asyncio.new_event_loop()
+        self.tasks: List[KedTask] = []
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {len(self.tasks)} tasks>"
+
+    @property
+    def in_task(self) -> bool:
+        """Whether the calling thread is running a task, which holds on by
+        handing control back to the loop."""
+        return getattr(_current, "thread", None) is not None
+
+    def spawn(self, name: str, call: Callable[[], Any]) -> KedTask:
+        task = KedTask(name, None)
+        task.future = self.loop.create_task(self.__drive(task, TaskThread(call)))
+        self.tasks.append(task)
+        return task
+
+    def pause(self, reason: Any) -> Any:
+        """Hold on in the task running in this thread, for a number of seconds,
+        another task or a blocking function, returning what it gave."""
+        return _current.thread.pause(reason)
+
+    def sleep(self, seconds: float) -> None:
+        self.loop.run_until_complete(asyncio.sleep(seconds))
+
+    def wait(self, task: KedTask) -> Any:
+        # A task's error is raised where it is waited for, not again at the end
+        self.__forget(task)
+        if task.done:
+            return task.future.result()
+        return self.loop.run_until_complete(task.future)
+
+    def call(self, func: Callable, *args: Any) -> Any:
+        """Call a blocking function in a thread while tasks run."""
+        return self.loop.run_until_complete(
+            self.loop.run_in_executor(None, func, *args)
+        )
+
+    def finish(self) -> None:
+        """Run every task to completion, including those spawned meanwhile,
+        raising the first error of a task that nothing waited for."""
+        while self.tasks:
+            self.loop.run_until_complete(
+                asyncio.wait(
+                    [task.future for task in self.tasks],
+                    return_when=asyncio.FIRST_EXCEPTION,
+                )
+            )
+            done = [task for task in self.tasks if task.done]
+            for task in done:
+                self.tasks.remove(task)
+            for task in done:
+                task.future.result()
+
+    def cancel(self) -> None:
+        """Stop every unfinished task, running the finally blocks it is in."""
+        tasks, self.tasks = self.tasks, []
+        for task in tasks:
+            task.future.cancel()
+        if tasks:
+            self.loop.run_until_complete(
+                asyncio.gather(*(t.future for t in tasks), return_exceptions=True)
+            )
+
+    def close(self) -> None:
+        """Cancel any unfinished tasks and close the loop."""
+        self.cancel()
+        self.loop.run_until_complete(self.loop.shutdown_default_executor())
+        self.loop.close()
+
+    async def __drive(self, task: KedTask, thread: TaskThread) -> Any:
+        reply = ("value", None)
+        try:
+            while True:
+                kind, value = thread.step(*reply)
+                if kind == "return":
+                    return value
+                elif kind == "raise":
+                    raise value
+                try:
+                    reply = ("value", await self.__hold(task, value))
+                except Exception as exc:
+                    # Errors are raised where the task held on
+                    reply = ("raise", exc)
+        finally:
+            # Run the finally blocks of a cancelled task
+            thread.cancel()
+
+    async def __hold(self, task: KedTask, reason: Any) -> Any:
+        if isinstance(reason, KedTask):
+            if reason is task:
+                raise KedSemanticError("A task cannot hold on for itself")
+            self.__forget(reason)
+            # Cancelling a task that holds on leaves the other one running
+            return await asyncio.shield(reason.future)
+        elif callable(reason):
+            return await self.loop.run_in_executor(None, reason)
+        await asyncio.sleep(reason)
+
+    def __forget(self, task: KedTask) -> None:
+        if task in self.tasks:
+            self.tasks.remove(task)
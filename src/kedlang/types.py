@@ -1,10 +1,31 @@
-from typing import Any, Callable, Optional
+import itertools
+import math
+import operator
+from array import array
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
 
 from kedlang.exceptions import KedSemanticError
+from kedlang.streams import BUFFER_SIZE, InputStream, OutputStream
 from kedlang.symbol import Namespace
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def to_number(value: Any = None) -> float:
+    if value is None:
+        return 0
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
 
 class KedBoolean:
+    __slots__ = ("value",)
+
     def __init__(self, value: Optional[Any]) -> None:
         self.value = bool(value)
 
@@ -25,8 +46,14 @@ class KedBoolean:
 
 
 class KedFunction:
-    def __init__(self, impl: Callable) -> None:
+    __slots__ = ("impl", "node", "scope")
+
+    def __init__(self, impl: Callable, node: Any = None, scope: Any = None) -> None:
         self.impl = impl
+        # The definition and the frame it closes over, for functions written
+        # in Ked, so they can be rebuilt in another process
+        self.node = node
+        self.scope = scope
 
     def __repr__(self) -> str:
         return f"<{self.__class__.__name__} {self.impl.__name__}>"
@@ -38,7 +65,60 @@ class KedFunction:
         return self.impl(*args, **kwds)
 
 
+class KedGenerator:
+    """Values produced one at a time by a suspended Ked function call.
+
+    The call runs only as far as its next `giveUs` each time a value is
+    asked for, so a pipeline of generators holds one value at each stage
+    rather than a whole list.
+    """
+
+    __slots__ = ("name", "values")
+
+    def __init__(self, name: str, values: Iterator[Any]) -> None:
+        self.name = name
+        self.values = values
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.name}>"
+
+    def __str__(self) -> str:
+        return f"[generator {self.name}]"
+
+    def __iter__(self) -> "KedGenerator":
+        return self
+
+    def __next__(self) -> Any:
+        return next(self.values)
+
+
+class KedTask:
+    """A Ked function call running concurrently with the rest of a program.
+
+    The call is driven by an asyncio task, which is awaited when the task is
+    waited for.
+    """
+
+    __slots__ = ("name", "future")
+
+    def __init__(self, name: str, future: Any) -> None:
+        self.name = name
+        self.future = future
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.name}>"
+
+    def __str__(self) -> str:
+        return f"[task {self.name}]"
+
+    @property
+    def done(self) -> bool:
+        return self.future.done()
+
+
 class KedClass:
+    __slots__ = ("name", "base", "body", "namespace")
+
     def __init__(self, name, base, body) -> None:
         self.name, self.base, self.body = name, base, body
         self.namespace = Namespace()
@@ -63,6 +143,17 @@ class KedClass:
     def __contains__(self, key) -> bool:
         return key in self.namespace
 
+    def assign(self, key, value) -> None:
+        """Set a static attribute on the class that declares it."""
+        owner = self
+        while key not in owner.namespace:
+            owner = owner.base
+            if owner is None:
+                raise KedSemanticError(
+                    f"Static attribute {key} does not exist on {self}"
+                )
+        owner.namespace[key] = value
+
     def extends(self, class_type: "KedClass") -> bool:
         return (
             self == class_type
@@ -72,8 +163,20 @@ class KedClass:
 
 
 class KedObject:
-    def __init__(self, class_type: KedClass) -> None:
+    """An instance of a Ked class.
+
+    Attributes declared by the class itself live in `namespace`, while
+    inherited ones are looked up in, and assigned on, the instance of the base
+    class that the thing was constructed with.
+    """
+
+    __slots__ = ("class_type", "base", "namespace")
+
+    def __init__(
+        self, class_type: KedClass, base: Optional["KedObject"] = None
+    ) -> None:
         self.class_type = class_type
+        self.base = base
         self.namespace = Namespace()
 
     def __repr__(self) -> str:
@@ -83,45 +186,514 @@ class KedObject:
         return f"[thing {self.class_type.name}]"
 
     def __getitem__(self, key) -> Any:
-        return self.namespace[key]
+        if key in self.namespace:
+            return self.namespace[key]
+        elif self.base is not None:
+            return self.base[key]
+        else:
+            raise KedSemanticError(f"Attribute {key} does not exist on {self}")
 
     def __setitem__(self, key, value) -> None:
         self.namespace[key] = value
 
     def __contains__(self, key) -> bool:
-        return key in self.namespace
+        return key in self.namespace or self.base is not None and key in self.base
+
+    def assign(self, key, value) -> None:
+        """Set an attribute on the instance that declares it."""
+        owner = self
+        while key not in owner.namespace:
+            owner = owner.base
+            if owner is None:
+                raise KedSemanticError(f"Attribute {key} does not exist on {self}")
+        owner.namespace[key] = value
 
     def extends(self, class_type: KedClass) -> bool:
         return self.class_type.extends(class_type)
 
-    @property
-    def name(self):
-        return self.namespace.name
+
+class KedRope:
+    """A string built by concatenation, joined only when its text is used.
+
+    A rope sees the first `count` parts of a list it shares with the ropes
+    made by extending it. Extending the newest rope appends to that list in
+    place, which leaves older ropes unchanged, so building a string one
+    piece at a time takes linear rather than quadratic time.
+    """
+
+    __slots__ = ("parts", "count", "text")
+
+    # Shorter strings are concatenated directly
+    MIN_LENGTH = 64
+
+    def __init__(self, parts: List[str]) -> None:
+        self.parts = parts
+        self.count = len(parts)
+        self.text: Optional[str] = None
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.count} parts>"
+
+    def __str__(self) -> str:
+        if self.text is None:
+            parts = self.parts
+            if len(parts) != self.count:
+                parts = parts[: self.count]
+            self.text = "".join(parts)
+        return self.text
+
+    @classmethod
+    def concat(cls, left: Any, right: str) -> Any:
+        """Concatenate a string or rope with a string."""
+        if isinstance(left, cls):
+            parts = left.parts
+            if len(parts) != left.count:
+                parts = parts[: left.count]
+            parts.append(right)
+            return cls(parts)
+        elif len(left) + len(right) < cls.MIN_LENGTH:
+            return left + right
+        return cls([left, right])
 
 
 class KedList:
-    def __init__(self, size=0) -> None:
-        self.namespace = Namespace()
-        self.elements = [None] * size
+    """A Ked list.
+
+    Slicing a list returns a view that shares its storage, described by a
+    `range` of indices into it. The storage is copied on write: once a view
+    has been taken, whichever side is mutated first takes a private copy,
+    and a view that is mutated keeps only the elements it can see.
+    """
+
+    __slots__ = ("_items", "_view", "_shared")
+
+    def __init__(self, elements: Optional[Iterable[Any]] = None) -> None:
+        self._items = [] if elements is None else list(elements)
+        self._view: Optional[range] = None
+        self._shared = False
 
     def __repr__(self) -> str:
         return f"<{self.__class__.__name__} {self.elements}>"
 
     def __getitem__(self, key) -> Any:
-        return self.elements[key]
+        if self._view is None:
+            return self._items[key]
+        return self._items[self._view[key]]
 
     def __setitem__(self, key, value) -> None:
-        self.elements[key] = value
+        if self._shared:
+            self.__own()
+        self._items[key] = value
 
     def __contains__(self, key) -> bool:
-        return key in self.elements
+        return key in iter(self)
+
+    def __iter__(self) -> Iterator[Any]:
+        if self._view is None:
+            return iter(self._items)
+        return map(self._items.__getitem__, self._view)
 
     def __len__(self) -> int:
-        return len(self.elements)
+        return len(self._items if self._view is None else self._view)
 
-    def extends(self, class_type: KedClass) -> bool:
-        return self.class_type.extends(class_type)
+    @property
+    def elements(self) -> List[Any]:
+        """The elements as a Python list, which must not be modified."""
+        view = self._view
+        if view is None:
+            return self._items
+        elif view.step > 0:
+            return self._items[view.start : view.stop : view.step]
+        return list(self)
+
+    def slice(
+        self,
+        start: Optional[int] = None,
+        stop: Optional[int] = None,
+        step: Optional[int] = None,
+    ) -> "KedList":
+        """Return a view of the elements selected as by a Python slice."""
+        if step == 0:
+            raise KedSemanticError("Slice step cannot be zero")
+        indices = self._view if self._view is not None else range(len(self._items))
+        view = KedList.__new__(KedList)
+        view._items, view._view = self._items, indices[start:stop:step]
+        view._shared = self._shared = True
+        return view
+
+    def append(self, value) -> None:
+        if self._shared:
+            self.__own()
+        self._items.append(value)
+
+    def extend(self, values: Iterable[Any]) -> None:
+        if self._shared:
+            self.__own()
+        self._items.extend(values)
+
+    def insert(self, index: int, value) -> None:
+        if self._shared:
+            self.__own()
+        self._items.insert(index, value)
+
+    def pop(self, index: int = -1) -> Any:
+        if len(self) == 0:
+            raise KedSemanticError("Cannot pop from an empty list")
+        if self._shared:
+            self.__own()
+        try:
+            return self._items.pop(index)
+        except IndexError:
+            raise KedSemanticError(f"List index {index} is out of range")
+
+    def __own(self) -> None:
+        # Stop sharing storage with any view or list the storage came from
+        self._items = list(self.elements)
+        self._view, self._shared = None, False
+
+
+class KedRange:
+    """A read-only sequence of numbers that are computed as they are used.
+
+    A range holds only its bounds, so `range(1000000)` costs no more memory
+    than `range(10)`, and its elements are produced in native code.
+    """
+
+    __slots__ = ("indices",)
+
+    def __init__(self, indices: range) -> None:
+        self.indices = indices
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.indices}>"
+
+    def __getitem__(self, key) -> float:
+        return float(self.indices[key])
+
+    def __contains__(self, key) -> bool:
+        # Test integers arithmetically rather than by scanning the range
+        if isinstance(key, float) and key.is_integer():
+            return int(key) in self.indices
+        return (
+            isinstance(key, int) and not isinstance(key, bool) and key in self.indices
+        )
+
+    def __iter__(self) -> Iterator[float]:
+        return map(float, self.indices)
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def slice(
+        self,
+        start: Optional[int] = None,
+        stop: Optional[int] = None,
+        step: Optional[int] = None,
+    ) -> "KedRange":
+        if step == 0:
+            raise KedSemanticError("Slice step cannot be zero")
+        return KedRange(self.indices[start:stop:step])
+
+
+class KedBytes:
+    """A read-only view of the bytes of a file, usually a memory map.
+
+    Bytes are read from the file only as they are used, and slicing a view
+    gives another view of the same memory, so a large file can be picked
+    apart without being copied.
+    """
+
+    __slots__ = ("view",)
+
+    def __init__(self, data: Any = b"") -> None:
+        self.view = memoryview(data)
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {len(self)} bytes>"
+
+    def __getitem__(self, key) -> float:
+        return float(self.view[key])
+
+    def __setitem__(self, key, value) -> None:
+        raise KedSemanticError("Bytes cannot be changed, build a list instead")
+
+    def __contains__(self, key) -> bool:
+        if isinstance(key, bool) or not isinstance(key, (int, float)):
+            return False
+        return key in range(256) and int(key) in self.view
+
+    def __iter__(self) -> Iterator[float]:
+        return map(float, self.view)
+
+    def __len__(self) -> int:
+        return len(self.view)
+
+    def slice(
+        self,
+        start: Optional[int] = None,
+        stop: Optional[int] = None,
+        step: Optional[int] = None,
+    ) -> "KedBytes":
+        if step == 0:
+            raise KedSemanticError("Slice step cannot be zero")
+        return KedBytes(self.view[start:stop:step])
+
+
+class KedFile:
+    """A file opened by a program for reading, writing or appending.
+
+    Text is read through an `InputStream` and written through an
+    `OutputStream`, so lines and chunks come from the file's buffer and
+    writes reach the file a buffer at a time.
+    """
+
+    MODES = ("r", "w", "a")
+
+    __slots__ = ("path", "mode", "input", "output", "_file")
+
+    def __init__(self, path: str, mode: str = "r") -> None:
+        if mode not in self.MODES:
+            raise KedSemanticError(f"File mode must be 'r', 'w' or 'a', not {mode!r}")
+        self.path = path
+        self.mode = mode
+        self._file = open(path, mode, encoding="utf-8")
+        reading = mode == "r"
+        self.input = InputStream(self._file) if reading else None
+        self.output = None if reading else OutputStream(self._file, BUFFER_SIZE)
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.path} {self.mode}>"
+
+    def __str__(self) -> str:
+        return f"[file {self.path}]"
 
     @property
-    def name(self):
-        return self.namespace.name
+    def closed(self) -> bool:
+        return self._file.closed
+
+    def flush(self) -> None:
+        if self.output is not None and not self.closed:
+            self.output.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
+
+
+class _BooleanKey:
+    """Stands in for a boolean map key, which would otherwise collide with
+    the numbers 0 and 1 that Python considers equal to it."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: bool) -> None:
+        self.value = value
+
+    def __reduce__(self) -> tuple:
+        # Keys are compared by identity, so unpickle to the shared instance
+        return (_boolean_key, (self.value,))
+
+
+def _boolean_key(value: bool) -> _BooleanKey:
+    return BOOLEAN_KEYS[value]
+
+
+BOOLEAN_KEYS = {True: _BooleanKey(True), False: _BooleanKey(False)}
+
+
+def describe_key(key: Any) -> str:
+    """Describe a map key as it is written in Ked."""
+    if isinstance(key, str):
+        return repr(key)
+    elif key is None:
+        return "nattin"
+    elif isinstance(key, bool):
+        return "gospel" if key else "bull"
+    elif isinstance(key, float) and key.is_integer():
+        return str(int(key))
+    return str(key)
+
+
+class KedMap:
+    """A Ked map from keys to values, stored in a dict.
+
+    Keys may be strings, numbers, booleans or nattin. They hash as Python
+    hashes them, so numbers that are equal are the same key, except that
+    booleans are replaced with keys of their own. Entries keep the order in
+    which they were first set.
+    """
+
+    __slots__ = ("entries",)
+
+    def __init__(self, entries: Optional[Iterable[Tuple[Any, Any]]] = None) -> None:
+        self.entries = {}
+        for key, value in entries or ():
+            self[key] = value
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.entries}>"
+
+    @staticmethod
+    def key(key: Any) -> Any:
+        """Return the dict key that stands for a Ked map key."""
+        if isinstance(key, str) or key is None:
+            return key
+        elif isinstance(key, bool):
+            return BOOLEAN_KEYS[key]
+        elif isinstance(key, (int, float)):
+            if key != key:
+                raise KedSemanticError("Map keys cannot be NaN")
+            return key
+        raise KedSemanticError(
+            "Map keys must be strings, numbers, booleans or nattin, "
+            f"not '{type(key).__name__}'"
+        )
+
+    def __getitem__(self, key) -> Any:
+        try:
+            return self.entries[self.key(key)]
+        except KeyError:
+            raise KedSemanticError(f"Key {describe_key(key)} does not exist in map")
+
+    def __setitem__(self, key, value) -> None:
+        self.entries[self.key(key)] = value
+
+    def __contains__(self, key) -> bool:
+        return self.key(key) in self.entries
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def keys(self) -> List[Any]:
+        """The keys, copied so that the map can change while they are used."""
+        return [
+            key.value if isinstance(key, _BooleanKey) else key for key in self.entries
+        ]
+
+    def values(self) -> List[Any]:
+        return list(self.entries.values())
+
+    def items(self) -> Iterator[Tuple[Any, Any]]:
+        return zip(self.keys(), self.values())
+
+    def pop(self, key) -> Any:
+        value = self[key]
+        del self.entries[self.key(key)]
+        return value
+
+
+class KedArray:
+    """A dense array of numbers.
+
+    Elements are stored unboxed in a NumPy array when NumPy is installed and
+    in an `array.array` of doubles otherwise. Arithmetic applies element-wise
+    in native code rather than through the interpreter.
+    """
+
+    __slots__ = ("data",)
+
+    def __init__(self, values: Iterable[Any] = ()) -> None:
+        values = map(to_number, values)
+        if numpy is not None:
+            self.data = numpy.fromiter(values, dtype=float)
+        else:
+            self.data = array("d", values)
+
+    @classmethod
+    def wrap(cls, data) -> "KedArray":
+        """Make an array that owns `data` without copying it."""
+        instance = cls.__new__(cls)
+        instance.data = data
+        return instance
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {list(self.data)}>"
+
+    def __getitem__(self, key) -> float:
+        return float(self.data[key])
+
+    def __setitem__(self, key, value) -> None:
+        self.data[key] = to_number(value)
+
+    def __iter__(self) -> Iterator[float]:
+        return map(float, self.data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def slice(
+        self,
+        start: Optional[int] = None,
+        stop: Optional[int] = None,
+        step: Optional[int] = None,
+    ) -> "KedArray":
+        if step == 0:
+            raise KedSemanticError("Slice step cannot be zero")
+        data = self.data[start:stop:step]
+        # NumPy slices are views, but Ked arrays don't share elements
+        return KedArray.wrap(data.copy() if numpy is not None else data)
+
+    @classmethod
+    def apply(cls, op: Callable[[float, float], float], left, right) -> "KedArray":
+        """Apply a binary number operator element-wise, broadcasting a number
+        operand across the elements of an array operand.
+
+        Lists, ranges, bytes and generators are converted to arrays first.
+        """
+        left, right = cls.__operand(left), cls.__operand(right)
+        if isinstance(left, KedArray) and isinstance(right, KedArray):
+            if len(left) != len(right):
+                raise KedSemanticError(
+                    f"Cannot combine arrays of length {len(left)} and {len(right)}"
+                )
+            left, right = left.data, right.data
+        elif isinstance(left, KedArray):
+            left, right = left.data, float(to_number(right))
+        else:
+            left, right = float(to_number(left)), right.data
+
+        if numpy is not None:
+            if op in (operator.truediv, operator.mod) and numpy.any(right == 0):
+                raise KedSemanticError("Division by zero")
+            return cls.wrap(op(left, right))
+
+        if isinstance(left, float):
+            left = itertools.repeat(left)
+        elif isinstance(right, float):
+            right = itertools.repeat(right)
+        try:
+            return cls.wrap(array("d", map(op, left, right)))
+        except ZeroDivisionError:
+            raise KedSemanticError("Division by zero")
+
+    @staticmethod
+    def __operand(value: Any) -> Any:
+        if isinstance(value, (KedList, KedRange, KedBytes, KedGenerator)):
+            return KedArray(value)
+        elif isinstance(value, KedMap):
+            raise KedSemanticError("Cannot combine an array with a map")
+        return value
+
+    def sum(self) -> float:
+        if numpy is not None:
+            return float(self.data.sum())
+        return math.fsum(self.data)
+
+    def min(self) -> float:
+        self.__check_not_empty("min")
+        return float(self.data.min() if numpy is not None else min(self.data))
+
+    def max(self) -> float:
+        self.__check_not_empty("max")
+        return float(self.data.max() if numpy is not None else max(self.data))
+
+    def mean(self) -> float:
+        self.__check_not_empty("mean")
+        return self.sum() / len(self.data)
+
+    def __check_not_empty(self, name: str) -> None:
+        if len(self.data) == 0:
+            raise KedSemanticError(f"Cannot take the {name} of an empty array")
@@ -1,7 +1,8 @@
 import abc
-from typing import Optional
+from typing import Any, Callable, Dict, Optional
 
 from . import ast
+from .exceptions import BaseKedException
 
 
 class KedASTVisitor(abc.ABC):
@@ -11,12 +12,35 @@ class KedASTVisitor(abc.ABC):
     identify the exact class of the component that it's dealing with.
     """
 
+    # Visiting functions by node class, filled in per visitor class on demand
+    _dispatch: Dict[type, Callable[[Any, ast.KedAST], Any]] = {}
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._dispatch = {}
+
     def visit(self, node: Optional[ast.KedAST]):
         if node is None:
             return None
-        method_name = "visit_" + type(node).__name__
-        visitor = getattr(self, method_name, self.fallback)
-        return visitor(node)
+        try:
+            visitor = self._dispatch[type(node)]
+        except KeyError:
+            method_name = "visit_" + type(node).__name__
+            visitor = getattr(type(self), method_name, type(self).fallback)
+            self._dispatch[type(node)] = visitor
+        try:
+            return visitor(self, node)
+        except BaseKedException as exc:
+            # Locate errors at the innermost node that has a position
+            if exc.lineno is None:
+                position = getattr(node, "position", None)
+                if position is not None:
+                    self.locate(exc, position)
+            raise
+
+    def locate(self, exc: BaseKedException, position: int) -> None:
+        """Record where an error was raised, from the position of the node
+        being visited. Visitors that know where nodes come from override it."""
 
     def fallback(self, node: ast.KedAST):
         raise NotImplementedError("No visit_{} method".format(type(node).__name__))
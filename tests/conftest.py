@@ -1,10 +1,21 @@
 # -*- coding: utf-8 -*-
 """
-    Dummy conftest.py for kedlang.
+Fixtures shared by the kedlang tests.
 
-    If you don't know what this is for, just leave it empty.
-    Read more about conftest.py under:
-    https://pytest.org/latest/plugins.html
+Read more about conftest.py under:
+https://pytest.org/latest/plugins.html
 """
 
-# import pytest
+import pytest
+from kedlang import types
+
+
+@pytest.fixture(params=["array", "numpy"])
+def backend(request, monkeypatch):
+    """Run a test with both the array.array and the NumPy storage."""
+    if request.param == "numpy":
+        numpy = pytest.importorskip("numpy")
+        monkeypatch.setattr(types, "numpy", numpy)
+    else:
+        monkeypatch.setattr(types, "numpy", None)
+    return request.param
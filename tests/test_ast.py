@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+import glob
+import os
+
+import pytest
+from kedlang import ast
+from kedlang.flat import FIELDS, KINDS, VALUE, FlatTree
+from kedlang.lexer import KedLexer
+from kedlang.parser import KedParser
+
+__author__ = "Eoin O'Brien"
+__copyright__ = "Eoin O'Brien"
+__license__ = "gpl3"
+
+EXAMPLES = sorted(
+    glob.glob(os.path.join(os.path.dirname(__file__), "..", "examples", "*.ked"))
+)
+
+
+def parse(code):
+    return KedParser().parse(KedLexer().tokenize(code))
+
+
+def dump(item):
+    """Render a tree with its positions so that round trips can be compared."""
+    if isinstance(item, list):
+        return [dump(child) for child in item]
+    if isinstance(item, ast.KedAST):
+        fields = [dump(getattr(item, name)) for name in FIELDS[type(item)]]
+        return (type(item).__name__, getattr(item, "position", None), fields)
+    return item
+
+
+@pytest.mark.parametrize("cls", KINDS[3:], ids=lambda cls: cls.__name__)
+def test_nodes_have_no_instance_dict(cls):
+    assert not hasattr(cls.__new__(cls), "__dict__")
+
+
+def test_function_def_fields():
+    (node,) = parse("remember f(€a, ...€rest) { return €a like }\n").statements
+    assert [param.value for param in node.params] == ["€a"]
+    assert node.rest_param.value == "€rest"
+    assert FIELDS[ast.FunctionDef] == ("name", "_FunctionDef__params", "body")
+
+
+@pytest.mark.parametrize("path", EXAMPLES, ids=os.path.basename)
+def test_flat_tree_round_trip(path):
+    with open(path) as f:
+        program = parse(f.read())
+    tree = FlatTree.encode(program)
+    assert tree.kind(tree.root) is ast.Program
+    assert dump(tree.decode()) == dump(program)
+
+
+def test_flat_tree_layout():
+    tree = FlatTree.encode(parse("remember €x = 1 plus 2 like\n"))
+    kinds = [kind for _, kind in tree.walk()]
+    assert kinds == [
+        ast.Variable,
+        ast.Constant,
+        ast.Add,
+        ast.Constant,
+        ast.BinaryOp,
+        ast.Declare,
+        ast.Program,
+    ]
+
+    # Children always precede their parent
+    for index in range(len(tree)):
+        if tree.kinds[index] == VALUE:
+            continue
+        assert all(child < index for child in tree.children_of(index))
+
+    binary_op = [index for index, kind in tree.walk() if kind is ast.BinaryOp][0]
+    left, op, right = tree.children_of(binary_op)
+    assert tree.kind(op) is ast.Add
+    assert tree.value(tree.children_of(left)[0]) == 1
+    assert tree.value(tree.children_of(right)[0]) == 2
+    assert tree.positions[binary_op] == 14
+    assert tree.decode(binary_op).right.value == 2
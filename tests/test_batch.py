@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+
+import pytest
+from kedlang import cli
+from kedlang.batch import BatchRunner, read_manifest, run_script
+
+__author__ = "Eoin O'Brien"
+__copyright__ = "Eoin O'Brien"
+__license__ = "gpl3"
+
+
+@pytest.fixture
+def scripts(tmp_path):
+    paths = []
+    for i in range(6):
+        path = tmp_path / f"script{i}.ked"
+        path.write_text(f"saysI 'script {i}' like\n")
+        paths.append(str(path))
+    return paths
+
+
+def test_results_keep_their_order(scripts):
+    with BatchRunner(jobs=2) as runner:
+        results = list(runner.run(scripts))
+    assert [result.path for result in results] == scripts
+    assert [result.stdout for result in results] == [f"script {i}\n" for i in range(6)]
+    assert all(result.status == 0 and result.seconds >= 0 for result in results)
+
+
+def test_failures_are_captured(tmp_path):
+    path = tmp_path / "broken.ked"
+    path.write_text(
+        "saysI 'before' like\nsaysI storyBoi('> ') like\nsaysI €nope like\n"
+    )
+    result = run_script(str(path))
+    assert result.status == 1
+    # Scripts get no input, so storyBoi gives nuttin
+    assert result.stdout == "before\n> nuttin\n"
+    assert (
+        result.stderr
+        == f"{path}:3:1: KedSemanticError: Symbol €nope does not exist in scope <Frame builtins>\n"
+    )
+
+
+def test_missing_script(tmp_path):
+    result = run_script(str(tmp_path / "missing.ked"))
+    assert result.status == 1 and "No such file" in result.stderr
+
+
+def test_read_manifest(tmp_path):
+    (tmp_path / "nightly").mkdir()
+    manifest = tmp_path / "nightly" / "scripts.txt"
+    manifest.write_text("# nightly\na.ked\n\n  sub/b.ked  \n/abs/c.ked\n")
+    assert read_manifest(str(manifest)) == [
+        str(tmp_path / "nightly" / "a.ked"),
+        str(tmp_path / "nightly" / "sub" / "b.ked"),
+        "/abs/c.ked",
+    ]
+
+
+def test_run_many_from_the_command_line(tmp_path, scripts, capsys):
+    (tmp_path / "bad.ked").write_text("saysI €nope like\n")
+    manifest = tmp_path / "scripts.txt"
+    manifest.write_text("bad.ked\n")
+    report = tmp_path / "report.jsonl"
+    with pytest.raises(SystemExit) as info:
+        cli.main([*scripts, "-m", str(manifest), "-j", "2", "--report", str(report)])
+    assert info.value.code == 1
+
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].startswith("ok") and lines[0].endswith("script0.ked")
+    assert lines[6].startswith("failed") and "€nope" in lines[7]
+    assert lines[-1].startswith("7 files, 1 failed in")
+
+    results = [json.loads(line) for line in report.read_text().splitlines()]
+    assert [result["status"] for result in results] == [0] * 6 + [1]
+    assert results[0]["stdout"] == "script 0\n"
+
+
+def test_report_runs_a_single_file_in_batch(scripts, tmp_path, capsys):
+    report = tmp_path / "report.jsonl"
+    cli.main([scripts[0], "--report", str(report)])
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].startswith("ok") and lines[-1].startswith("1 files, 0 failed")
+    assert json.loads(report.read_text())["stdout"] == "script 0\n"
+
+
+def test_summary_goes_to_output(scripts, tmp_path, capsys):
+    summary = tmp_path / "summary.txt"
+    cli.main([*scripts[:2], "-o", str(summary)])
+    assert capsys.readouterr().out == ""
+    assert summary.read_text().splitlines()[-1].startswith("2 files, 0 failed")
+
+
+def test_buffer_size_is_rejected_in_batch(scripts, capsys):
+    with pytest.raises(SystemExit) as info:
+        cli.main([*scripts[:2], "--buffer-size", "0"])
+    assert info.value.code == 2
+    assert "--buffer-size only applies" in capsys.readouterr().err
+
+
+def test_broken_pool_fails_unfinished_scripts(scripts):
+    with BatchRunner(jobs=1) as runner:
+        # A worker that dies breaks the pool for every script after it
+        runner.executor.submit(os._exit, 1).exception()
+        results = list(runner.run(scripts))
+    assert [result.path for result in results] == scripts
+    assert all(result.status == 1 for result in results)
+    assert results[0].stderr.startswith("BrokenProcessPool: ")
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+import io
+
+import pytest
+from kedlang.exceptions import KedSemanticError
+from kedlang.interpreter import KedInterpreter
+from kedlang.lexer import KedLexer
+from kedlang.parser import KedParser
+from kedlang.streams import OutputStream
+from kedlang.types import KedBytes
+
+__author__ = "Eoin O'Brien"
+__copyright__ = "Eoin O'Brien"
+__license__ = "gpl3"
+
+
+def run(code: str, cwd) -> str:
+    sink = io.StringIO()
+    interpreter = KedInterpreter(
+        KedLexer(), KedParser(), cwd=str(cwd), output=OutputStream(sink)
+    )
+    interpreter.interpret(code)
+    return sink.getvalue()
+
+
+def test_read_file(tmp_path):
+    (tmp_path / "data.txt").write_bytes("one\r\ntwo\rthree €".encode("utf-8"))
+    assert run("saysI readFile('data.txt') like\n", tmp_path) == "one\ntwo\nthree €\n"
+
+
+def test_read_empty_file(tmp_path):
+    (tmp_path / "empty.txt").write_bytes(b"")
+    assert run("saysI len(readFile('empty.txt')) like\n", tmp_path) == "0\n"
+
+
+def test_read_file_that_is_not_text(tmp_path):
+    (tmp_path / "blob.bin").write_bytes(b"\xff\xfe")
+    with pytest.raises(KedSemanticError, match="readBytes"):
+        run("readFile('blob.bin') like\n", tmp_path)
+
+
+def test_read_bytes(tmp_path):
+    (tmp_path / "blob.bin").write_bytes(b"\x00\x01\xffAB")
+    code = """
+    remember €bytes = readBytes('blob.bin') like
+    saysI €bytes like
+    saysI €bytes[2] em ' ' em €bytes[1:3] em ' ' em len(€bytes) like
+    saysI has(€bytes, 255) em ' ' em has(€bytes, 2) like
+    saysI sum(€bytes[3:]) like
+    """
+    assert (
+        run(code, tmp_path) == "[0, 1, 255, 65, 66]\n255 [1, 255] 5\ngospel bull\n131\n"
+    )
+
+
+def test_byte_slices_share_memory(tmp_path):
+    view = KedBytes(b"abcdef")
+    part = view.slice(1, None, 2)
+    assert part.view.obj is view.view.obj
+    assert list(part) == [98, 100, 102]
+    with pytest.raises(KedSemanticError, match="cannot be changed"):
+        part[0] = 1
+
+
+def test_write_and_append(tmp_path):
+    code = """
+    remember €out = open('out.txt', 'w') like
+    write(€out, 'a', 1, [2, 3], '\\n') like
+    close(€out) like
+    €out = open('out.txt', 'a') like
+    write(€out, 'b\\n') like
+    saysI €out like
+    """
+    assert run(code, tmp_path) == f"[file {tmp_path / 'out.txt'}]\n"
+    # Files left open are flushed when the program ends
+    assert (tmp_path / "out.txt").read_text() == "a1[2, 3]\nb\n"
+
+
+def test_read_an_open_file(tmp_path):
+    (tmp_path / "data.txt").write_text("abcdef\nghi\njkl\n")
+    code = """
+    remember €in = open('data.txt') like
+    saysI readChunk(3, €in) like
+    forEveryWan (€line in readLines(€in)) {
+        saysI '<' em €line em '>' like
+        ahStop like
+    }
+    saysI readAll(€in) like
+    """
+    assert run(code, tmp_path) == "abc\n<def>\nghi\njkl\n\n"
+
+
+def test_paths_are_relative_to_the_running_file(tmp_path):
+    (tmp_path / "lib").mkdir()
+    (tmp_path / "lib" / "data.txt").write_text("nested")
+    (tmp_path / "lib" / "read.ked").write_text("saysI readFile('data.txt') like\n")
+    assert run("hereLa 'lib/read.ked' like\n", tmp_path) == "nested\n"
+
+
+@pytest.mark.parametrize(
+    "code, message",
+    [
+        ("open('missing.txt') like", "Cannot open"),
+        ("readBytes('missing.txt') like", "Cannot open"),
+        ("open('out.txt', 'rw') like", "File mode"),
+        ("write(1, 'x') like", "expects a file"),
+        ("readAll(open('out.txt', 'w')) like", "not open for reading"),
+        ("write(open('data.txt'), 'x') like", "not open for writing"),
+        (
+            "remember €f = open('data.txt') like close(€f) like readAll(€f) like",
+            "is closed",
+        ),
+    ],
+)
+def test_file_errors(tmp_path, code, message):
+    (tmp_path / "data.txt").write_text("data")
+    with pytest.raises(KedSemanticError, match=message):
+        run(code + "\n", tmp_path)
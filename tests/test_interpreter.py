@@ -0,0 +1,451 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+from kedlang.exceptions import KedSemanticError, KedSyntaxError
+from kedlang.interpreter import KedInterpreter
+from kedlang.lexer import KedLexer
+from kedlang.parser import KedParser
+
+__author__ = "Eoin O'Brien"
+__copyright__ = "Eoin O'Brien"
+__license__ = "gpl3"
+
+
+def run(code: str, capsys) -> str:
+    KedInterpreter(KedLexer(), KedParser()).interpret(code)
+    return capsys.readouterr().out
+
+
+def test_list_outlives_the_frame_that_built_it(capsys):
+    code = """
+    remember make() {
+        remember €l = [1, 2, 3] like
+        return €l like
+    }
+    remember €l = make() like
+    €l[1] = 'two' like
+    saysI €l like
+    """
+    assert run(code, capsys) == "[1, two, 3]\n"
+
+
+def test_inherited_attributes_are_shared_with_the_base_instance(capsys):
+    code = """
+    class Counter {
+        €count = 0 like
+        bump() {
+            youKnowYourself.€count = youKnowYourself.€count plus 1 like
+        }
+        static €made = 0 like
+    }
+    class Named isTheBulbOff Counter {
+        €name = 'named' like
+    }
+    remember €n = new Named() like
+    €n.€count = 10 like
+    €n.bump() like
+    Counter::€made = 1 like
+    saysI €n.€count em ' ' em €n.€name em ' ' em Named::€made like
+    """
+    assert run(code, capsys) == "11 named 1\n"
+
+
+def test_assigning_an_undeclared_attribute():
+    interpreter = KedInterpreter(KedLexer(), KedParser())
+    with pytest.raises(KedSemanticError, match="€nope does not exist"):
+        interpreter.interpret(
+            "class A {}\nremember €a = new A() like\n€a.€nope = 1 like\n"
+        )
+
+
+def test_list_growth_builtins(capsys):
+    code = """
+    remember €l = [] like
+    remember €i = 0 like
+    eraGoOnSure (€i isDoonshierThan 5) {
+        append(€l, €i) like
+        €i = €i plus 1 like
+    }
+    saysI €l em ' ' em len(€l) like
+    saysI pop(€l) em ' ' em pop(€l, 0) em ' ' em €l like
+    saysI insert(€l, 1, 'x') em ' ' em €l like
+    saysI extend(€l, €l, [9]) em ' ' em €l like
+    saysI append(€l, 'a', 'b') em ' ' em €l like
+    """
+    assert run(code, capsys) == (
+        "[0, 1, 2, 3, 4] 5\n"
+        "4 0 [1, 2, 3]\n"
+        "4 [1, x, 2, 3]\n"
+        "9 [1, x, 2, 3, 1, x, 2, 3, 9]\n"
+        "11 [1, x, 2, 3, 1, x, 2, 3, 9, a, b]\n"
+    )
+
+
+@pytest.mark.parametrize(
+    "code, message",
+    [
+        ("pop([]) like", "empty list"),
+        ("pop([1], 3) like", "out of range"),
+        ("pop([1], 'x') like", "'pop' expects a number, not 'x'"),
+        ("append('string', 1) like", "'append' expects a list, not 'str'"),
+    ],
+)
+def test_list_growth_errors(code, message):
+    interpreter = KedInterpreter(KedLexer(), KedParser())
+    with pytest.raises(KedSemanticError, match=message):
+        interpreter.interpret(code + "\n")
+
+
+def test_rest_parameter_is_a_list(capsys):
+    code = """
+    remember collect(€first, ...€rest) {
+        append(€rest, €first) like
+        return €rest like
+    }
+    saysI collect(1, 2, 3) like
+    """
+    assert run(code, capsys) == "[2, 3, 1]\n"
+
+
+def test_slice_syntax(capsys):
+    code = """
+    remember €l = [1, 2, 3, 4, 5] like
+    saysI €l[1:3] em €l[:2] em €l[3:] em €l[:] em €l[-2:] like
+    saysI slice(€l, 4, nattin, -2) em ' ' em 'hello'[1:3] like
+    """
+    assert (
+        run(code, capsys) == "[2, 3][1, 2][4, 5][1, 2, 3, 4, 5][4, 5]\n[5, 3, 1] el\n"
+    )
+
+
+def test_array_operators(capsys, backend):
+    code = """
+    remember €a = array([1, 2, 3]) like
+    saysI €a plus 1 em ' ' em €a times [2, 2, 2] em ' ' em 2 into €a like
+    saysI sum(€a) em ' ' em min(€a) em ' ' em max(€a) em ' ' em mean([2, 4]) like
+    saysI €a plus range(3) em ' ' em slice(€a, 1) times €a[1:] like
+    """
+    assert run(code, capsys) == (
+        "[2, 3, 4] [2, 4, 6] [0.5, 1, 1.5]\n6 1 3 3\n[1, 3, 5] [4, 9]\n"
+    )
+
+
+def test_higher_order_builtins(capsys):
+    code = """
+    remember double(€x) {
+        return €x times 2 like
+    }
+    remember small(€x) {
+        return €x isDoonshierThan 3 like
+    }
+    remember add(€a, €b) {
+        return €a plus €b like
+    }
+    remember descending(€a, €b) {
+        return €a awayFrom €b like
+    }
+    saysI map(range(4), double) em ' ' em filter([5, 1, 4, 2], small) like
+    saysI reduce(range(1, 5), add) em ' ' em reduce([], add, 'empty') like
+    saysI sort([3, 1, 2]) em sort([3, 1, 2], descending) em sort([10, 'b', 9]) like
+    """
+    assert run(code, capsys) == (
+        "[0, 2, 4, 6] [1, 2]\n10 empty\n[1, 2, 3][3, 2, 1][10, 9, b]\n"
+    )
+
+
+def test_builtins_can_be_shadowed(capsys):
+    code = """
+    remember sort(€l) {
+        return 'mine' like
+    }
+    saysI sort([2, 1]) like
+    """
+    assert run(code, capsys) == "mine\n"
+
+
+@pytest.mark.parametrize(
+    "code, message",
+    [
+        ("map([1], 2) like", "'map' expects a function, not 'float'"),
+        (
+            "filter('ab', number) like",
+            "'filter' expects a list, array, range or generator",
+        ),
+        ("reduce([], number) like", "without an initial value"),
+        ("range(0, 5, 0) like", "step cannot be zero"),
+        ("range() like", "1 to 3 arguments"),
+    ],
+)
+def test_higher_order_errors(code, message):
+    interpreter = KedInterpreter(KedLexer(), KedParser())
+    with pytest.raises(KedSemanticError, match=message):
+        interpreter.interpret(code + "\n")
+
+
+def test_for_each_loop(capsys):
+    code = """
+    remember €seen = [] like
+    forEveryWan (€x in [1, 2, 3, 4, 5]) {
+        eh (€x is 2) {
+            ahGoOn like
+        }
+        eh (€x is 4) {
+            ahStop like
+        }
+        append(€seen, €x) like
+    }
+    remember €chars = '' like
+    forEveryWan (€c in 'ab'[:]) €chars = €c em €chars like
+    forEveryWan (€i in range(0)) saysI 'never' like
+    saysI €seen em ' ' em €chars em ' ' em €x like
+    """
+    assert run(code, capsys) == "[1, 3] ba 4\n"
+
+
+def test_for_each_over_a_non_iterable():
+    interpreter = KedInterpreter(KedLexer(), KedParser())
+    with pytest.raises(KedSemanticError, match="Cannot loop over 'float'"):
+        interpreter.interpret("forEveryWan (€x in 1) saysI €x like\n")
+
+
+def test_generators_run_lazily(capsys):
+    code = """
+    remember countUp(€n) {
+        remember €i = 0 like
+        eraGoOnSure (€i isDoonshierThan €n) {
+            saysI 'giving ' em €i like
+            giveUs €i like
+            €i = €i plus 1 like
+        }
+    }
+    remember square(€x) {
+        return €x times €x like
+    }
+    remember €squares = map(countUp(3), square) like
+    saysI €squares like
+    forEveryWan (€x in €squares) saysI 'got ' em €x like
+    """
+    assert run(code, capsys) == (
+        "[generator map]\n" "giving 0\ngot 0\ngiving 1\ngot 1\ngiving 2\ngot 4\n"
+    )
+
+
+def test_generator_control_flow(capsys):
+    code = """
+    remember steps() {
+        forEveryWan (€x in [1, 2, 3, 4]) {
+            eh (€x is 2) {
+                ahGoOn like
+            }
+            giveItALash {
+                giveUs €x like
+                eh (€x is 3) {
+                    release new Rebel('three') like
+                }
+            } jaHearYourMan (Rebel €e) {
+                giveUs €e.€msg like
+                return like
+            }
+        }
+    }
+    remember add(€a, €b) {
+        return €a em €b like
+    }
+    saysI [...steps()] em ' ' em reduce(steps(), add) like
+    """
+    assert run(code, capsys) == "[1, 3, three] 13three\n"
+
+
+def test_yield_outside_function():
+    interpreter = KedInterpreter(KedLexer(), KedParser())
+    with pytest.raises(KedSyntaxError, match="'giveUs' outside function"):
+        interpreter.interpret("giveUs 1 like\n")
+
+
+def test_generator_finally_runs_when_dropped(capsys):
+    code = """
+    remember steps() {
+        giveItALash {
+            giveUs 1 like
+            giveUs 2 like
+        } jaHearYourMan (Rebel €e) {
+            saysI 'caught' like
+        } atTheEndOfTheDay {
+            saysI 'done' like
+        }
+    }
+    forEveryWan (€x in steps()) {
+        saysI €x like
+        ahStop like
+    }
+    saysI 'after' like
+    """
+    assert run(code, capsys) == "1\ndone\nafter\n"
+
+
+def test_yield_in_finally():
+    interpreter = KedInterpreter(KedLexer(), KedParser())
+    code = """
+    remember steps() {
+        giveItALash {
+            giveUs 1 like
+        } jaHearYourMan (Rebel €e) {
+            saysI 'caught' like
+        } atTheEndOfTheDay {
+            giveUs 2 like
+        }
+    }
+    """
+    with pytest.raises(
+        KedSyntaxError, match="'giveUs' cannot be used in 'atTheEndOfTheDay'"
+    ):
+        interpreter.interpret(code)
+
+
+def test_generators_have_no_length():
+    interpreter = KedInterpreter(KedLexer(), KedParser())
+    code = """
+    remember steps() {
+        giveUs 1 like
+    }
+    saysI len(steps()) like
+    """
+    with pytest.raises(KedSemanticError, match="'len' expects .* not 'KedGenerator'"):
+        interpreter.interpret(code)
+
+
+def test_maps(capsys):
+    code = """
+    remember €ages = ['Mary': 30, 'Paddy': 41] like
+    €ages['Siobhan'] = 25 like
+    €ages['Mary'] = €ages['Mary'] plus 1 like
+    saysI €ages em ' ' em len(€ages) em ' ' em has(€ages, 'Paddy') like
+    saysI remove(€ages, 'Paddy') em ' ' em keys(€ages) em values(€ages) like
+    forEveryWan (€name in €ages) saysI €name like
+    saysI [:] em [1: 'one', gospel: 'yes'][gospel] like
+    """
+    assert run(code, capsys) == (
+        "[Mary: 31, Paddy: 41, Siobhan: 25] 3 gospel\n"
+        "41 [Mary, Siobhan][31, 25]\n"
+        "Mary\nSiobhan\n"
+        "[:]yes\n"
+    )
+
+
+@pytest.mark.parametrize(
+    "code, message",
+    [
+        ("saysI ['a': 1]['b'] like", "Key 'b' does not exist in map"),
+        ("remove([1], 1) like", "'remove' expects a map, not 'KedList'"),
+        ("remember €m = [[]: 1] like", "Map keys must be strings"),
+    ],
+)
+def test_map_errors(code, message):
+    interpreter = KedInterpreter(KedLexer(), KedParser())
+    with pytest.raises(KedSemanticError, match=message):
+        interpreter.interpret(code + "\n")
+
+
+def test_concatenated_strings_behave_as_strings(capsys):
+    code = """
+    remember €s = '' like
+    remember €i = 0 like
+    eraGoOnSure (€i isDoonshierThan 40) {
+        €s = €s em €i mod 10 like
+        €i = €i plus 1 like
+    }
+    remember €t = €s em '!' like
+    remember €m = [:] like
+    €m[€s] = 'found' like
+    saysI len(€s) em ' ' em len(€t) em ' ' em €s[11] em ' ' em €m[€s] like
+    saysI (€s isTheAbsoluteHeadOff €s[:]) em has(€t, '9!') em (€s isDoonshierThan €t) like
+    """
+    assert run(code, capsys) == "40 41 1 found\ngospelgospelgospel\n"
+
+
+def test_string_builtins(capsys):
+    code = """
+    remember €csv = 'a,b,,c' like
+    saysI split(€csv, ',') em len(split(€csv, ',')) em split(' x  y ') like
+    saysI join(split(€csv, ','), '-') em ' ' em join(range(3)) like
+    saysI substring('kedlang', 3) em ' ' em substring('kedlang', 0, -4) like
+    saysI find('banana', 'an') em find('banana', 'an', 2) em find('banana', 'x') like
+    saysI replace('banana', 'a', 'o') like
+    """
+    assert run(code, capsys) == (
+        "[a, b, , c]4[x, y]\na-b--c 012\nlang ked\n13-1\nbonono\n"
+    )
+
+
+@pytest.mark.parametrize(
+    "code, message",
+    [
+        ("split(1, ',') like", "'split' expects a string, not 'float'"),
+        ("saysI 'abc'[3] like", "Index 3 is out of range"),
+        ("remember €s = 'abc' like\n€s[0] = 'x' like", "Strings cannot be changed"),
+        ("find('abc', 'b', 'x') like", "'find' expects a number, not 'x'"),
+        ("substring('abc', 'x') like", "'substring' expects a number, not 'x'"),
+        ("substring('abc', 0, [1]) like", r"'substring' expects a number, not '\[1\]'"),
+        ("slice('abc', 0, 1, 'x') like", "'slice' expects a number, not 'x'"),
+        ("saysI 'abc'['x'] like", "'index' expects a number, not 'x'"),
+    ],
+)
+def test_string_errors(code, message):
+    interpreter = KedInterpreter(KedLexer(), KedParser())
+    with pytest.raises(KedSemanticError, match=message):
+        interpreter.interpret(code + "\n")
+
+
+def test_loose_equality(capsys):
+    code = """
+    class Point {}
+    remember €p = new Point() like
+    saysI ([1, [2, 'x']] is [1, [2, 'x']]) em ([1, 2] is [1, 3]) em ([1] is [1, 1]) like
+    saysI ([0, 1] is range(2)) em (array([1, 2]) is [1, 2]) em ('[1, 2]' is [1, 2]) like
+    saysI (['a': 1, 'b': 2] is ['b': 2, 'a': 1]) em (['a': 1] is ['a': 2]) like
+    saysI (€p is €p) em (€p is new Point()) em (3 is '3') em (gospel is 1) like
+    saysI (number('x') is number('y')) em (nattin is 'nuttin') em (1 is not 2) like
+    saysI (['a, b'] is ['a', 'b']) em ([] is ['']) em ([['a, b']] is [['a', 'b']]) like
+    saysI (['x': 'a, y: b'] is ['x': 'a', 'y': 'b']) em (['a, b'] is ['a', 'c']) like
+    saysI (['1', 2] is [1, '2']) em ([1, 'x'] is [1, 'y']) like
+    """
+    assert run(code, capsys) == (
+        "gospelbullbull\n"
+        "gospelgospelgospel\n"
+        "gospelbull\n"
+        "gospelbullgospelbull\n"
+        "gospelgospelgospel\n"
+        "gospelgospelgospel\n"
+        "gospelbull\n"
+        "gospelbull\n"
+    )
+
+
+def test_loose_equality_of_lists_that_contain_themselves(capsys):
+    code = """
+    remember €a = [1] like
+    append(€a, €a) like
+    remember €b = [1] like
+    append(€b, €b) like
+    remember €m = ['self': nattin] like
+    €m['self'] = €m like
+    saysI (€a is €a) em (€a is €b) em (€a is [1, €a]) em (€a is [1, 2]) like
+    saysI (€m is €m) em (€m is ['self': €m]) em (€m is ['self': 1]) like
+    """
+    assert run(code, capsys) == "gospelgospelgospelbull\ngospelgospelbull\n"
+
+
+def test_relational_operators(capsys):
+    code = """
+    saysI (2 isDoonshierThan 10) em ('2' isDoonshierThan '10') em (2 isDoonshierThan '10') like
+    saysI ('b' isLankierThanOrIs 'b') em (gospel isLankierThan 0) em (nattin isDoonshierThan 'o') like
+    """
+    assert run(code, capsys) == "gospelbullbull\ngospelgospelgospel\n"
+
+
+def test_incomparable_values():
+    interpreter = KedInterpreter(KedLexer(), KedParser())
+    with pytest.raises(
+        KedSemanticError, match="Cannot compare 'NoneType' with 'float'"
+    ):
+        interpreter.interpret("saysI nattin isDoonshierThan 1 like\n")
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+
+import glob
+import os
+
+import pytest
+from kedlang.lexer import KedLexer, decode_string
+from kedlang.parser import KedParser
+
+__author__ = "Eoin O'Brien"
+__copyright__ = "Eoin O'Brien"
+__license__ = "gpl3"
+
+EXAMPLES = sorted(
+    glob.glob(os.path.join(os.path.dirname(__file__), "..", "examples", "*.ked"))
+)
+
+
+def as_tuples(tokens):
+    return [(t.type, t.value, t.lineno, t.index) for t in tokens]
+
+
+@pytest.mark.parametrize("path", EXAMPLES, ids=os.path.basename)
+def test_compact_stream_matches_tokenize(path):
+    with open(path) as f:
+        code = f.read()
+    expected = as_tuples(KedLexer().tokenize(code))
+    assert as_tuples(KedLexer().tokenize_compact(code)) == expected
+
+
+def test_compact_stream_parses_like_tokenize():
+    code = "remember €x = 'a\\tb' em -1.5e3 like // comment\n\n  saysI €x like\n"
+    expected = KedParser().parse(KedLexer().tokenize(code))
+    actual = KedParser().parse(iter(KedLexer().tokenize_compact(code)))
+    assert repr(actual) == repr(expected)
+
+
+def test_compact_stream_positions():
+    stream = KedLexer().tokenize_compact("saysI 1 like\n\n  saysI 'two' like\n")
+    assert len(stream) == 6
+    assert stream[4] == ("STRING", "two")
+    assert stream.position(3) == (3, 3)
+    assert stream.position(4) == (3, 9)
+
+
+def test_decode_string():
+    assert decode_string("'plain — text'") == "plain — text"
+    assert decode_string("'tab\\there'") == "tab\there"
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+import gc
+import sys
+import tracemalloc
+
+import pytest
+from kedlang.interpreter import KedInterpreter
+from kedlang.lexer import KedLexer
+from kedlang.parser import KedParser
+from kedlang.symbol import Symbol
+
+__author__ = "Eoin O'Brien"
+__copyright__ = "Eoin O'Brien"
+__license__ = "gpl3"
+
+N = 2000
+
+# Each Ked call recurses through several Python frames
+DEPTH = 20
+
+CLASS = "class Point { " + " ".join(f"€f{i} = 0 like" for i in range(N)) + " }\n"
+
+RECURSE = """
+remember down(€n) {
+    eh (€n isLankierThan 0) {
+        return down(1 awayFrom €n) like
+    }
+    return probe() like
+}
+"""
+
+GENERATE = """
+remember countUp(€n) {
+    remember €i = 0 like
+    eraGoOnSure (€i isDoonshierThan €n) {
+        giveUs €i like
+        €i = €i plus 1 like
+    }
+}
+remember double(€x) {
+    return €x times 2 like
+}
+"""
+
+
+def measure(setup: str, code: str):
+    """Return the bytes still allocated after running `code` in an interpreter
+    that has already run `setup`, and the bytes in use at each `probe()` call
+    made by `code`."""
+    interpreter = KedInterpreter(KedLexer(), KedParser())
+    samples = []
+    interpreter.current_scope.declare(
+        Symbol("probe"), lambda: samples.append(tracemalloc.get_traced_memory()[0])
+    )
+    interpreter.interpret(setup)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        interpreter.interpret(code)
+        gc.collect()
+        current = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return current - before, [sample - before for sample in samples]
+
+
+def report(what: str, size: float) -> None:
+    print(f"{what}: {size:.0f} bytes")
+
+
+def test_bytes_per_list_element():
+    elements = ", ".join("0" for _ in range(N))
+    empty, _ = measure("", "remember €l = [] like\n")
+    full, _ = measure("", f"remember €l = [{elements}] like\n")
+    per_element = (full - empty) / N
+    report("list element", per_element)
+    # A pointer in the list plus the number it holds
+    assert per_element < 64
+
+
+def test_bytes_per_object_field():
+    two, _ = measure(CLASS, "remember €a = new Point() like\nremember €b = €a like\n")
+    both, _ = measure(
+        CLASS, "remember €a = new Point() like\nremember €b = new Point() like\n"
+    )
+    per_field = (both - two) / N
+    report("object field", per_field)
+    # A dict entry for the field
+    assert per_field < 128
+
+
+@pytest.mark.skipif(
+    sys.gettrace() is not None,
+    reason="tracers such as coverage keep a Python frame object per call alive",
+)
+def test_bytes_per_call_frame():
+    _, (shallow,) = measure(RECURSE, "down(0) like\n")
+    _, (deep,) = measure(RECURSE, f"down({DEPTH}) like\n")
+    per_frame = (deep - shallow) / DEPTH
+    report("call frame", per_frame)
+    assert per_frame < 1280
+
+
+def test_bytes_per_slice():
+    elements = ", ".join("0" for _ in range(N))
+    setup = f"remember €l = [{elements}] like\nremember €u = €l[2:] like\n"
+    sliced, _ = measure(setup, "remember €v = €l[1:] like\n")
+    assigned, _ = measure(setup, "remember €v = 0 like\n")
+    retained = sliced - assigned
+    report("slice", retained)
+    # A view, not a copy of the elements
+    assert retained < 256
+
+
+def test_bytes_per_generated_value():
+    pipeline = (
+        "forEveryWan (€x in map(countUp({0}), double)) "
+        "eh (€x is 2 times (1 awayFrom {0})) probe() like\n"
+    )
+    _, (few,) = measure(GENERATE, pipeline.format(10))
+    _, (many,) = measure(GENERATE, pipeline.format(N))
+    per_value = (many - few) / N
+    report("generated value", per_value)
+    # Values are consumed as they are produced, not collected in a list
+    assert per_value < 8
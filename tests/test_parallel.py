@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+import io
+
+import pytest
+from kedlang.exceptions import KedSemanticError
+from kedlang.interpreter import KedInterpreter
+from kedlang.lexer import KedLexer
+from kedlang.parallel import FunctionPickler, free_names
+from kedlang.parser import KedParser
+from kedlang.streams import OutputStream
+from kedlang.symbol import Symbol
+
+__author__ = "Eoin O'Brien"
+__copyright__ = "Eoin O'Brien"
+__license__ = "gpl3"
+
+FIB = """
+remember fib(€n) {
+    eh (€n isDoonshierThan 2) {
+        return €n like
+    }
+    return fib(1 awayFrom €n) plus fib(2 awayFrom €n) like
+}
+"""
+
+
+@pytest.fixture
+def run():
+    interpreters = []
+
+    def run(code: str) -> str:
+        sink = io.StringIO()
+        interpreter = KedInterpreter(KedLexer(), KedParser(), output=OutputStream(sink))
+        interpreters.append(interpreter)
+        interpreter.interpret(code)
+        return sink.getvalue()
+
+    yield run
+    for interpreter in interpreters:
+        interpreter.shutdown()
+
+
+def test_parallel_map_keeps_order(run):
+    code = FIB + "saysI parallelMap(range(12), fib) like\n"
+    assert run(code) == "[0, 1, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89]\n"
+
+
+def test_functions_take_their_closure(run):
+    code = """
+    remember €offset = 100 like
+    remember €names = [gospel: 'yes', 1: 'one'] like
+    remember name(€key) {
+        return €names[€key] like
+    }
+    remember shift(€key) {
+        return name(€key) em €offset like
+    }
+    saysI parallelMap([gospel, 1], shift) like
+    """
+    assert run(code) == "[yes100, one100]\n"
+
+
+def test_errors_are_located_in_the_worker(run):
+    code = "remember broken(€x) {\n    return €missing like\n}\n"
+    with pytest.raises(KedSemanticError, match="€missing") as info:
+        run(code + "parallelMap([1], broken) like\n")
+    assert info.value.lineno == 2
+
+
+@pytest.mark.parametrize(
+    "code, message",
+    [
+        ("parallelMap([1], len) like\n", "expects a function"),
+        ("parallelMap(1, len) like\n", "expects a list"),
+        (
+            "remember count() {\n    giveUs 1 like\n}\n"
+            "remember €counter = count() like\n"
+            "remember next(€x) {\n    return €counter like\n}\n"
+            "parallelMap([1], next) like\n",
+            "Cannot send",
+        ),
+    ],
+)
+def test_parallel_map_errors(run, code, message):
+    with pytest.raises(KedSemanticError, match=message):
+        run(code)
+
+
+def test_closures_hold_only_the_names_used():
+    interpreter = KedInterpreter(KedLexer(), KedParser())
+    interpreter.interpret(FIB + "remember €unused = 'left behind' like\n")
+    fib = interpreter.current_scope.fetch(Symbol("fib"))
+    # Its parameter is bound by each call, not taken from around it
+    assert free_names(fib.node) == {"fib"}
+    file = io.BytesIO()
+    FunctionPickler(file, interpreter.builtins).dump(fib)
+    assert b"left behind" not in file.getvalue()
+
+
+def test_closures_leave_out_names_declared_in_the_function(run):
+    code = """
+    remember count() {
+        giveUs 1 like
+    }
+    remember €x = count() like
+    remember €total = count() like
+    remember double(€x) {
+        remember €total = €x times 2 like
+        return €total like
+    }
+    saysI parallelMap([1, 2], double) like
+    """
+    # The generators around them cannot be sent, but they are not needed
+    assert run(code) == "[2, 4]\n"
+
+
+def test_pool_is_kept_as_sources_are_loaded():
+    interpreter = KedInterpreter(
+        KedLexer(), KedParser(), output=OutputStream(io.StringIO())
+    )
+    try:
+        interpreter.interpret(FIB + "parallelMap([1], fib) like\n")
+        pool = interpreter.pool
+        code = "\nremember broken(€x) {\n    return €missing like\n}\n"
+        with pytest.raises(KedSemanticError, match="€missing") as info:
+            interpreter.interpret(code + "parallelMap([1], broken) like\n")
+        assert interpreter.pool is pool
+        assert info.value.lineno == 3
+    finally:
+        interpreter.shutdown()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from kedlang.lexer import KedLexer
+from kedlang.parser import KedParser
+
+__author__ = "Eoin O'Brien"
+__copyright__ = "Eoin O'Brien"
+__license__ = "gpl3"
+
+SIZE = 5000
+
+# Programs of n items, and the number of tokens in each
+GENERATORS = {
+    "statements": (
+        lambda n: "".join(f"remember €v{i} = {i} like\n" for i in range(n)),
+        lambda n: 5 * n,
+    ),
+    "elements": (
+        lambda n: "[" + ", ".join(str(i) for i in range(n)) + "] like\n",
+        lambda n: 2 * n + 2,
+    ),
+    "arguments": (
+        lambda n: "f(" + ", ".join(f"€a{i}" for i in range(n)) + ") like\n",
+        lambda n: 2 * n + 3,
+    ),
+}
+
+# Programs parsed at each of these sizes by the opt-in scaling benchmark
+BENCHMARK_SIZES = [2000, 8000, 32000]
+
+# Timings run in a fresh interpreter so that coverage tracing, which slows the
+# parser loop but not list copies, does not mask a quadratic accumulation.
+BENCHMARK = """
+import gc, json, sys, time
+from kedlang.lexer import KedLexer
+from kedlang.parser import KedParser
+from test_parser import GENERATORS
+
+generate, _ = GENERATORS[{generator!r}]
+timings = {{}}
+for size in {sizes}:
+    tokens = list(KedLexer().tokenize(generate(size)))
+    best = float("inf")
+    for _ in range(3):
+        parser = KedParser()
+        gc.disable()
+        start = time.perf_counter()
+        parser.parse(iter(tokens))
+        best = min(best, time.perf_counter() - start)
+        gc.enable()
+    timings[size] = best
+json.dump(timings, sys.stdout)
+"""
+
+
+def parse_items(generator: str, size: int) -> list:
+    """Parse a generated program and return the list it has `size` items of."""
+    generate, _ = GENERATORS[generator]
+    statements = KedParser().parse(KedLexer().tokenize(generate(size))).statements
+    if generator == "statements":
+        return statements
+    expression = statements[0].value
+    return expression.elements if generator == "elements" else expression.args
+
+
+def parse_times(generator: str, sizes) -> dict:
+    path = [os.path.dirname(__file__), *sys.path]
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(path))
+    code = BENCHMARK.format(generator=generator, sizes=list(sizes))
+    result = subprocess.run(
+        [sys.executable, "-c", code], env=env, capture_output=True, check=True
+    )
+    return {int(size): time for size, time in json.loads(result.stdout).items()}
+
+
+@pytest.mark.parametrize("generator", sorted(GENERATORS))
+def test_lists_are_extended_in_place(generator):
+    # A list grown by appending keeps room to spare, while copying it on
+    # every reduction, which makes parsing quadratic, gives an exact fit
+    items = parse_items(generator, 1000)
+    assert sys.getsizeof(items) > sys.getsizeof(list(items))
+
+
+@pytest.mark.skipif(
+    not os.environ.get("KEDLANG_BENCHMARK"),
+    reason="timings are only reliable on a quiet machine, set KEDLANG_BENCHMARK=1",
+)
+@pytest.mark.parametrize("generator", sorted(GENERATORS))
+def test_parse_time_scales_linearly(generator):
+    timings = parse_times(generator, BENCHMARK_SIZES)
+    small, large = BENCHMARK_SIZES[0], BENCHMARK_SIZES[-1]
+
+    # Per-item cost drifts a little with cache effects, but a quadratic
+    # accumulation grows it roughly in proportion to the input size.
+    growth = (timings[large] / large) / (timings[small] / small)
+    assert growth < 1.8, f"per-item parse time grew {growth:.1f}x ({timings})"
+
+
+@pytest.mark.parametrize("generator", sorted(GENERATORS))
+def test_parse_large_lists(generator):
+    generate, count_tokens = GENERATORS[generator]
+    tokens = list(KedLexer().tokenize(generate(SIZE)))
+    assert len(tokens) == count_tokens(SIZE)
+    assert len(parse_items(generator, SIZE)) == SIZE
+
+
+def test_parse_keeps_statement_order():
+    code = "".join(f"remember €v{i} = {i} like\n" for i in range(100))
+    program = KedParser().parse(KedLexer().tokenize(code))
+    names = [stmt.variable.value for stmt in program.statements]
+    assert names == [f"€v{i}" for i in range(100)]
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+from kedlang.exceptions import KedSemanticError, KedSyntaxError
+from kedlang.interpreter import KedInterpreter
+from kedlang.lexer import KedLexer
+from kedlang.parser import KedParser
+from kedlang.source import LineTable, SourceFile
+
+__author__ = "Eoin O'Brien"
+__copyright__ = "Eoin O'Brien"
+__license__ = "gpl3"
+
+
+def test_chunks_end_on_line_boundaries(tmp_path):
+    code = "".join(f"saysI '€{i} — ok' like\r\n" for i in range(50))
+    path = tmp_path / "chunks.ked"
+    path.write_bytes(code.encode("utf-8"))
+
+    with SourceFile(str(path), chunk_size=7) as source:
+        chunks = list(source)
+
+    assert all(chunk.endswith("\n") for chunk in chunks)
+    assert "".join(chunks) == code.replace("\r\n", "\n")
+
+
+def test_chunked_tokens_match_whole_text(tmp_path):
+    code = "remember €x = 'a' like\n// comment\n\nsaysI €x em 2 like"
+    path = tmp_path / "tokens.ked"
+    path.write_text(code, encoding="utf-8")
+
+    def as_tuples(tokens):
+        return [(t.type, t.value, t.lineno, t.index, t.end) for t in tokens]
+
+    with SourceFile(str(path), chunk_size=5) as source:
+        chunked = as_tuples(KedLexer().tokenize_chunks(source))
+    assert chunked == as_tuples(KedLexer().tokenize(code))
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / "empty.ked"
+    path.write_text("")
+    with SourceFile(str(path)) as source:
+        assert list(source) == []
+
+
+def test_statements_run_while_file_is_parsed(tmp_path, capsys):
+    path = tmp_path / "partial.ked"
+    path.write_text("saysI 'first' like\nsaysI 'second' like\nsaysI saysI like\n")
+    interpreter = KedInterpreter(KedLexer(), KedParser(), cwd=str(path))
+
+    with pytest.raises(KedSyntaxError):
+        interpreter.interpret_file(str(path))
+    assert capsys.readouterr().out == "first\nsecond\n"
+
+
+def test_streamed_import(tmp_path, capsys):
+    (tmp_path / "target.ked").write_text("remember €value = 'imported' like\n")
+    path = tmp_path / "main.ked"
+    path.write_text("cmereToMeWilla 'target.ked' like\nsaysI €value like\n")
+    interpreter = KedInterpreter(KedLexer(), KedParser(), cwd=str(path))
+
+    interpreter.interpret_file(str(path))
+    assert capsys.readouterr().out == "imported\n"
+
+
+def test_line_table_locate():
+    lines = LineTable("ab\ncd\n\nef")
+    assert len(lines) == 4
+    assert lines.locate(0) == (1, 1)
+    assert lines.locate(4) == (2, 2)
+    assert lines.locate(7) == (4, 1)
+
+
+def test_errors_are_located_in_their_own_file(tmp_path):
+    (tmp_path / "lib.ked").write_text("remember broken() {\n    saysI €nope like\n}\n")
+    path = tmp_path / "main.ked"
+    path.write_text("hereLa 'lib.ked' like\n\nbroken() like\n")
+    interpreter = KedInterpreter(KedLexer(), KedParser(), cwd=str(path))
+
+    with pytest.raises(KedSemanticError) as excinfo:
+        interpreter.interpret_file(str(path))
+    assert excinfo.value.path.endswith("lib.ked")
+    assert (excinfo.value.lineno, excinfo.value.column) == (2, 5)
+
+
+def test_interpreted_code_is_located():
+    interpreter = KedInterpreter(KedLexer(), KedParser())
+    with pytest.raises(KedSemanticError) as excinfo:
+        interpreter.interpret("saysI 1 like\n  €missing = 2 like\n")
+    assert excinfo.value.location == "<string>:2:3"
+
+
+def test_interpreted_code_is_not_kept():
+    interpreter = KedInterpreter(KedLexer(), KedParser())
+    interpreter.interpret("remember broken() {\n    saysI €nope like\n}\n")
+    for _ in range(100):
+        interpreter.interpret("saysI 1 like\n")
+    assert not interpreter.sources.tables
+
+    # Code from an earlier run is located where this run called it
+    with pytest.raises(KedSemanticError) as excinfo:
+        interpreter.interpret("saysI 1 like\nbroken() like\n")
+    assert excinfo.value.location == "<string>:2:1"
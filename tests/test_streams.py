@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+
+import io
+import tracemalloc
+from typing import Optional
+
+import pytest
+from kedlang.exceptions import KedSemanticError
+from kedlang.interpreter import KedInterpreter
+from kedlang.lexer import KedLexer
+from kedlang.parser import KedParser
+from kedlang.streams import InputStream, OutputStream
+from kedlang.symbol import Symbol
+
+__author__ = "Eoin O'Brien"
+__copyright__ = "Eoin O'Brien"
+__license__ = "gpl3"
+
+
+class CountingSink(io.StringIO):
+    def __init__(self) -> None:
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text: str) -> int:
+        self.writes += 1
+        return super().write(text)
+
+
+class NullSink(io.TextIOBase):
+    def write(self, text: str) -> int:
+        return len(text)
+
+
+def interpret(code: str, output: OutputStream, text: Optional[str] = None) -> None:
+    source = None if text is None else InputStream(io.StringIO(text))
+    KedInterpreter(KedLexer(), KedParser(), output=output, input=source).interpret(code)
+
+
+def filter_text(code: str, text: Optional[str]) -> str:
+    sink = io.StringIO()
+    interpret(code, OutputStream(sink), text)
+    return sink.getvalue()
+
+
+def test_output_is_written_in_batches():
+    sink = CountingSink()
+    output = OutputStream(sink, buffer_size=100)
+    interpret("forEveryWan (€i in range(100)) saysI 'line ' em €i like\n", output)
+    assert sink.getvalue() == "".join(f"line {i}\n" for i in range(100))
+    assert sink.writes < 10
+
+
+def test_zero_buffer_size_writes_every_line():
+    sink = CountingSink()
+    interpret("saysI 1 like\nsaysI 2 like\n", OutputStream(sink, buffer_size=0))
+    assert sink.getvalue() == "1\n2\n" and sink.writes == 2
+
+
+def test_output_is_flushed_before_input(monkeypatch):
+    sink = io.StringIO()
+    monkeypatch.setattr("sys.stdout", sink)
+    output = OutputStream(sink, buffer_size=1 << 16)
+    seen = []
+    monkeypatch.setattr("builtins.input", lambda prompt: seen.append(sink.getvalue()))
+    interpret("saysI 'first' like\nstoryBoi('> ') like\nsaysI 'last' like\n", output)
+    assert seen == ["first\n"]
+    assert sink.getvalue() == "first\nlast\n"
+
+
+def test_prompt_is_written_to_the_output_stream(monkeypatch):
+    # Only a program printing to stdout prompts through input()
+    monkeypatch.setattr("sys.stdin", io.StringIO("yes\n"))
+    monkeypatch.setattr("builtins.input", pytest.fail)
+    code = "saysI storyBoi('? ') like\nsaysI storyBoi(1) like\n"
+    assert filter_text(code, None) == "? yes\n1nuttin\n"
+
+
+def test_output_is_flushed_on_error():
+    sink = io.StringIO()
+    with pytest.raises(KedSemanticError):
+        interpret("saysI 'before' like\nsaysI €missing like\n", OutputStream(sink))
+    assert sink.getvalue() == "before\n"
+
+
+def test_self_referential_values_are_printed_once():
+    sink = io.StringIO()
+    code = """
+    remember €l = [1] like
+    append(€l, €l, [€l]) like
+    remember €m = ['self': nattin] like
+    €m['self'] = €m like
+    saysI €l like
+    saysI [€m, €m] em ' ' em €m like
+    """
+    interpret(code, OutputStream(sink))
+    assert sink.getvalue() == (
+        "[1, [...], [[...]]]\n[[self: [...]], [self: [...]]] [self: [...]]\n"
+    )
+
+
+def test_printing_a_large_list_streams_it():
+    interpreter = KedInterpreter(
+        KedLexer(), KedParser(), output=OutputStream(NullSink(), 1 << 12)
+    )
+    interpreter.interpret("remember €l = [...range(100000), [1, [2]]] like\n")
+    text = interpreter.to_string(interpreter.current_scope.fetch(Symbol("€l")))
+    tracemalloc.start()
+    try:
+        interpreter.interpret("saysI €l like\n")
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert text.endswith("99999, [1, [2]]]")
+    assert peak < len(text) / 4
+
+
+def test_read_all_input():
+    assert filter_text("saysI len(readAll()) like\n", "ab\ncd\n") == "6\n"
+
+
+def test_read_input_in_chunks():
+    code = """
+    remember €chunk = readChunk(4) like
+    eraGoOnSure (not (€chunk is nattin)) {
+        saysI '<' em €chunk em '>' like
+        €chunk = readChunk(4) like
+    }
+    """
+    assert filter_text(code, "abcdefghij") == "<abcd>\n<efgh>\n<ij>\n"
+
+
+def test_chunk_size_must_be_positive():
+    with pytest.raises(KedSemanticError, match="at least 1"):
+        filter_text("readChunk(0) like\n", "abc")
+
+
+class LoggingSource(io.StringIO):
+    def __init__(self, text: str, log: list) -> None:
+        super().__init__(text)
+        self.log = log
+
+    def __next__(self) -> str:
+        line = super().__next__()
+        self.log.append(f"read {line!r}")
+        return line
+
+
+class LoggingSink(io.TextIOBase):
+    def __init__(self, log: list) -> None:
+        self.log = log
+
+    def write(self, text: str) -> int:
+        self.log.append(f"wrote {text!r}")
+        return len(text)
+
+
+def test_read_lines_lazily():
+    log = []
+    code = "forEveryWan (€line in readLines()) saysI €line like\n"
+    KedInterpreter(
+        KedLexer(),
+        KedParser(),
+        output=OutputStream(LoggingSink(log), buffer_size=0),
+        input=InputStream(LoggingSource("one\ntwo", log)),
+    ).interpret(code)
+    # Each line is printed before the next one is read
+    assert log == ["read 'one\\n'", "wrote 'one\\n'", "read 'two'", "wrote 'two\\n'"]
+
+
+def test_story_boi_reads_from_the_input_stream():
+    code = "saysI storyBoi('? ') like\nsaysI storyBoi('? ') like\nsaysI storyBoi('') like\n"
+    assert filter_text(code, "yes\nno") == "? yes\n? no\nnuttin\n"
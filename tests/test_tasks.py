@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+
+import io
+import time
+
+import pytest
+from kedlang.exceptions import KedSemanticError
+from kedlang.interpreter import KedInterpreter
+from kedlang.lexer import KedLexer
+from kedlang.parser import KedParser
+from kedlang.streams import OutputStream
+from kedlang.tasks import TaskScheduler
+
+__author__ = "Eoin O'Brien"
+__copyright__ = "Eoin O'Brien"
+__license__ = "gpl3"
+
+TICK = """
+remember tick(€name, €n) {
+    remember €i = 0 like
+    eraGoOnSure (€i isDoonshierThan €n) {
+        saysI €name em €i like
+        holdOn(0) like
+        €i = €i plus 1 like
+    }
+    return €name em ' done' like
+}
+"""
+
+
+@pytest.fixture
+def tasks():
+    scheduler = TaskScheduler()
+    yield scheduler
+    scheduler.close()
+
+
+def run(code: str, tasks=None) -> str:
+    sink = io.StringIO()
+    interpreter = KedInterpreter(
+        KedLexer(), KedParser(), output=OutputStream(sink), tasks=tasks
+    )
+    interpreter.interpret(code)
+    return sink.getvalue()
+
+
+def test_tasks_take_turns(tasks):
+    code = TICK + """
+    remember €a = spawn(tick, 'a', 3) like
+    remember €b = spawn(tick, 'b', 2) like
+    saysI €a like
+    saysI wait(€b) like
+    saysI wait(€a) like
+    """
+    assert run(code, tasks) == "[task tick]\na0\nb0\na1\nb1\na2\nb done\na done\n"
+
+
+def test_tasks_sleep_concurrently(tasks):
+    code = """
+    remember nap() {
+        holdOn(0.2) like
+    }
+    remember €naps = [] like
+    forEveryWan (€i in range(100)) append(€naps, spawn(nap)) like
+    forEveryWan (€nap in €naps) wait(€nap) like
+    """
+    start = time.perf_counter()
+    run(code, tasks)
+    assert time.perf_counter() - start < 2
+
+
+def test_tasks_hold_on_for_each_other(tasks):
+    code = TICK + """
+    remember follow(€task) {
+        holdOn(€task) like
+        return 'after ' em wait(€task) like
+    }
+    saysI wait(spawn(follow, spawn(tick, 'a', 2))) like
+    """
+    assert run(code, tasks) == "a0\na1\nafter a done\n"
+
+
+def test_main_program_holds_on_while_tasks_run(tasks):
+    code = TICK + "spawn(tick, 'a', 2) like\nholdOn(0.01) like\nsaysI 'main' like\n"
+    assert run(code, tasks) == "a0\na1\nmain\n"
+
+
+def test_program_finishes_its_tasks(tasks):
+    code = TICK + "spawn(tick, 'a', 2) like\nsaysI 'main' like\n"
+    assert run(code, tasks) == "main\na0\na1\n"
+
+
+def test_tasks_hold_on_in_the_functions_they_call(tasks):
+    code = """
+    remember nap(€name, €i) {
+        saysI €name em €i like
+        holdOn(0) like
+    }
+    remember work(€name, €n) {
+        forEveryWan (€i in range(€n)) nap(€name, €i) like
+        return €name em ' done' like
+    }
+    remember €a = spawn(work, 'a', 3) like
+    remember €b = spawn(work, 'b', 2) like
+    saysI wait(€b) like
+    saysI wait(€a) like
+    """
+    assert run(code, tasks) == "a0\nb0\na1\nb1\na2\nb done\na done\n"
+
+
+def test_tasks_keep_their_own_call_stacks(tasks):
+    code = """
+    remember countdown(€name, €n) {
+        eh (€n isDoonshierThan 1) {
+            return €name like
+        }
+        holdOn(0) like
+        remember €rest = countdown(€name, 1 awayFrom €n) like
+        return €rest em €n like
+    }
+    remember €a = spawn(countdown, 'a', 3) like
+    remember €b = spawn(countdown, 'b', 4) like
+    saysI countdown('main', 2) em ' ' em wait(€a) em ' ' em wait(€b) like
+    """
+    assert run(code, tasks) == "main12 a123 b1234\n"
+
+
+def test_tasks_hold_on_for_tasks_in_the_functions_they_call(tasks):
+    code = TICK + """
+    remember result(€task) {
+        holdOn(€task) like
+        return wait(€task) like
+    }
+    remember follow(€task) {
+        return 'after ' em result(€task) like
+    }
+    saysI wait(spawn(follow, spawn(tick, 'a', 2))) like
+    """
+    assert run(code, tasks) == "a0\na1\nafter a done\n"
+
+
+def test_task_errors_reach_the_tasks_holding_on_for_them(tasks):
+    code = """
+    remember fail() {
+        holdOn(0) like
+        release new Rebel('failed') like
+    }
+    remember follow(€task) {
+        giveItALash {
+            wait(€task) like
+        } jaHearYourMan (Rebel €e) {
+            return 'caught ' em €e.€msg like
+        }
+    }
+    remember €task = spawn(fail) like
+    spawn(follow, spawn(fail)) like
+    saysI wait(spawn(follow, €task)) like
+    giveItALash {
+        wait(€task) like
+    } jaHearYourMan (Rebel €e) {
+        saysI 'main caught ' em €e.€msg like
+    }
+    """
+    # Errors caught where they were waited for are not raised again at the end
+    assert run(code, tasks) == "caught failed\nmain caught failed\n"
+
+
+def test_spawn_a_builtin(tasks):
+    assert run("saysI wait(spawn(len, 'four')) like\n", tasks) == "4\n"
+
+
+def test_exiting_cancels_tasks(tasks):
+    code = """
+    remember forever() {
+        giveItALash {
+            eraGoOnSure (gospel) holdOn(1) like
+        } jaHearYourMan (Rebel €e) {
+            saysI €e like
+        } atTheEndOfTheDay {
+            saysI 'cancelled' like
+        }
+    }
+    spawn(forever) like
+    holdOn(0) like
+    stopTheLights() like
+    """
+    assert run(code, tasks) == "cancelled\n"
+
+
+def test_exiting_cancels_tasks_holding_on_in_the_functions_they_call(tasks):
+    code = """
+    remember nap() {
+        giveItALash {
+            holdOn(1) like
+        } jaHearYourMan (Rebel €e) {
+            saysI €e like
+        } atTheEndOfTheDay {
+            saysI 'nap cancelled' like
+            holdOn(1) like
+        }
+    }
+    remember forever() {
+        giveItALash {
+            eraGoOnSure (gospel) nap() like
+        } jaHearYourMan (Rebel €e) {
+            saysI €e like
+        } atTheEndOfTheDay {
+            saysI 'forever cancelled' like
+        }
+    }
+    spawn(forever) like
+    holdOn(0) like
+    stopTheLights() like
+    """
+    start = time.perf_counter()
+    assert run(code, tasks) == "nap cancelled\nforever cancelled\n"
+    # A cancelled task does not hold on in its finally blocks
+    assert time.perf_counter() - start < 1
+
+
+def test_task_errors_are_raised_by_wait(tasks):
+    code = "remember fail() {\n  holdOn(0) like\n  return €missing like\n}\n"
+    with pytest.raises(KedSemanticError, match="missing"):
+        run(code + "wait(spawn(fail)) like\n", tasks)
+
+
+@pytest.mark.parametrize(
+    "code, message",
+    [
+        ("remember f() {}\nspawn(f) like\n", "--async"),
+        ("wait(1) like\n", "expects a task"),
+        ("holdOn(len) like\n", "expects a number of seconds or a task"),
+        ("holdOn(-1) like\n", "expects a number of seconds or a task"),
+    ],
+)
+def test_task_errors(code, message):
+    with pytest.raises(KedSemanticError, match=message):
+        run(code)
+
+
+def test_a_task_cannot_hold_on_for_itself(tasks):
+    code = """
+    remember self() {
+        holdOn(0) like
+        wait(€task) like
+    }
+    remember €task = spawn(self) like
+    wait(€task) like
+    """
+    with pytest.raises(KedSemanticError, match="cannot hold on for itself"):
+        run(code, tasks)
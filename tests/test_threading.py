@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+import io
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from kedlang.exceptions import KedSemanticError
+from kedlang.interpreter import KedInterpreter
+from kedlang.lexer import KedLexer
+from kedlang.parser import KedParser
+from kedlang.streams import OutputStream
+
+__author__ = "Eoin O'Brien"
+__copyright__ = "Eoin O'Brien"
+__license__ = "gpl3"
+
+THREADS = 16
+
+PROGRAM = """
+remember €id = {id} like
+remember fib(€n) {{
+    eh (€n isDoonshierThan 2) {{
+        return €n like
+    }}
+    return fib(1 awayFrom €n) plus fib(2 awayFrom €n) like
+}}
+class Counter {{
+    €count = 0 like
+    add() {{
+        youKnowYourself.€count = youKnowYourself.€count plus €id like
+    }}
+}}
+remember €counter = new Counter() like
+remember €names = [:] like
+forEveryWan (€i in range(50)) {{
+    €counter.add() like
+    €names['n' em €i] = €id times €i like
+}}
+saysI €id em ': ' em fib(€id mod 3 plus 10) em ' ' em €counter.€count like
+saysI join(map(keys(€names), string), ',') em ' ' em sum(values(€names)) like
+giveItALash {{
+    release new Rebel('thread ' em €id) like
+}} jaHearYourMan (Rebel €e) {{
+    saysI €e.€msg like
+}}
+"""
+
+
+@pytest.fixture
+def frequent_switches():
+    """Switch threads often, so runs interleave as much as they can."""
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def run_alone(code: str) -> str:
+    sink = io.StringIO()
+    KedInterpreter(KedLexer(), KedParser(), output=OutputStream(sink)).interpret(code)
+    return sink.getvalue()
+
+
+def test_interpreters_run_in_parallel_threads(frequent_switches):
+    programs = [PROGRAM.format(id=i) for i in range(THREADS)]
+    expected = [run_alone(program) for program in programs]
+
+    # Interpreters share a lexer and parser, as an embedding service might
+    lexer, parser = KedLexer(), KedParser()
+    start = threading.Barrier(THREADS)
+
+    def run(program: str) -> str:
+        sink = io.StringIO()
+        start.wait()
+        for _ in range(5):
+            output = OutputStream(sink)
+            KedInterpreter(lexer, parser, output=output).interpret(program)
+        return sink.getvalue()
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        results = list(pool.map(run, programs))
+    assert results == [alone * 5 for alone in expected]
+
+
+def test_errors_stay_with_their_interpreter(tmp_path, frequent_switches):
+    lexer, parser = KedLexer(), KedParser()
+    start = threading.Barrier(THREADS)
+
+    def run(i: int) -> KedSemanticError:
+        path = tmp_path / f"script{i}.ked"
+        path.write_text("saysI 1 like\n" * i + f"saysI €missing{i} like\n")
+        interpreter = KedInterpreter(lexer, parser, output=OutputStream(io.StringIO()))
+        start.wait()
+        with pytest.raises(KedSemanticError) as info:
+            interpreter.interpret_file(str(path))
+        return info.value
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        errors = list(pool.map(run, range(THREADS)))
+    for i, error in enumerate(errors):
+        assert f"€missing{i} " in error.message
+        assert error.path.endswith(f"script{i}.ked") and error.lineno == i + 1
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+import operator
+
+import pytest
+from kedlang.exceptions import KedSemanticError
+from kedlang.types import (
+    KedArray,
+    KedBytes,
+    KedGenerator,
+    KedList,
+    KedMap,
+    KedRange,
+    KedRope,
+)
+
+__author__ = "Eoin O'Brien"
+__copyright__ = "Eoin O'Brien"
+__license__ = "gpl3"
+
+
+def test_slice_shares_storage():
+    source = KedList(range(10))
+    view = source.slice(2, 8, 2)
+    assert view._items is source._items
+    assert list(view) == [2, 4, 6]
+    assert view[-1] == 6
+    assert len(view) == 3
+    assert 4 in view and 3 not in view
+
+
+def test_slice_of_slice_composes():
+    source = KedList(range(10))
+    view = source.slice(1, 9).slice(None, None, -3)
+    assert view._items is source._items
+    assert view.elements == [8, 5, 2]
+
+
+def test_writing_a_view_copies_only_its_elements():
+    source = KedList(range(5))
+    view = source.slice(1, 4)
+    view[0] = "x"
+    assert view.elements == ["x", 2, 3]
+    assert source.elements == [0, 1, 2, 3, 4]
+    assert view._items is not source._items
+
+
+def test_writing_the_source_leaves_views_unchanged():
+    source = KedList(range(5))
+    view = source.slice(1, 4)
+    source.append(5)
+    source[1] = "x"
+    assert view.elements == [1, 2, 3]
+    assert source.elements == [0, "x", 2, 3, 4, 5]
+
+
+@pytest.mark.parametrize("operation", ["append", "pop", "insert", "extend"])
+def test_growing_a_view_owns_its_storage(operation):
+    source = KedList(range(5))
+    view = source.slice(None, None, 2)
+    args = {"append": (9,), "pop": (), "insert": (0, 9), "extend": ([9],)}
+    getattr(view, operation)(*args[operation])
+    assert source.elements == [0, 1, 2, 3, 4]
+    assert view._view is None
+
+
+def test_zero_step():
+    with pytest.raises(KedSemanticError):
+        KedList(range(5)).slice(None, None, 0)
+
+
+def test_range_is_lazy():
+    numbers = KedRange(range(0, 10**12, 2))
+    assert len(numbers) == 5 * 10**11
+    assert numbers[-1] == 10**12 - 2 and isinstance(numbers[0], float)
+    assert 4.0 in numbers and 3 not in numbers and True not in numbers
+    assert list(numbers.slice(1, 4)) == [2, 4, 6]
+
+
+def test_rope_extends_in_place():
+    base = KedRope.concat("x" * KedRope.MIN_LENGTH, "a")
+    left = KedRope.concat(base, "b")
+    assert left.parts is base.parts
+    right = KedRope.concat(base, "c")
+    assert right.parts is not base.parts
+    assert str(base).endswith("xa")
+    assert str(left).endswith("xab") and str(right).endswith("xac")
+
+
+def test_short_strings_are_not_ropes():
+    assert KedRope.concat("a", "b") == "ab"
+
+
+def test_map_keys():
+    entries = KedMap([(1.0, "float"), (True, "true"), ("1", "string"), (None, "null")])
+    entries[1] = "int"
+    assert len(entries) == 4
+    assert entries[1.0] == "int" and entries[True] == "true"
+    assert entries.keys() == [1.0, True, "1", None]
+    assert False not in entries and 0 not in entries
+
+
+@pytest.mark.parametrize("key", [float("nan"), KedList(), KedMap()])
+def test_unhashable_map_keys(key):
+    with pytest.raises(KedSemanticError, match="Map keys"):
+        KedMap()[key] = 1
+
+
+def test_array_arithmetic(backend):
+    values = KedArray([1, 2, 3, 4])
+    assert list(KedArray.apply(operator.add, values, 1)) == [2, 3, 4, 5]
+    assert list(KedArray.apply(operator.sub, 10, values)) == [9, 8, 7, 6]
+    assert list(KedArray.apply(operator.mul, values, values)) == [1, 4, 9, 16]
+    assert list(KedArray.apply(operator.truediv, values, 2)) == [0.5, 1, 1.5, 2]
+    assert list(KedArray.apply(operator.mod, values, 3)) == [1, 2, 0, 1]
+
+
+def test_array_arithmetic_converts_sequences(backend):
+    values = KedArray([1, 2, 3])
+    generator = KedGenerator("count", iter([3, 2, 1]))
+    assert list(KedArray.apply(operator.add, values, KedList([1, 1, 1]))) == [2, 3, 4]
+    assert list(KedArray.apply(operator.mul, KedRange(range(3)), values)) == [0, 2, 6]
+    assert list(KedArray.apply(operator.sub, values, generator)) == [-2, 0, 2]
+    data = KedBytes(memoryview(b"\x01\x02\x04"))
+    assert list(KedArray.apply(operator.truediv, data, values)) == [1, 1, 4 / 3]
+    with pytest.raises(KedSemanticError, match="length 3 and 2"):
+        KedArray.apply(operator.add, values, KedRange(range(2)))
+    with pytest.raises(KedSemanticError, match="with a map"):
+        KedArray.apply(operator.add, values, KedMap())
+
+
+def test_array_errors(backend):
+    values = KedArray([1, 0])
+    with pytest.raises(KedSemanticError, match="Division by zero"):
+        KedArray.apply(operator.truediv, 1, values)
+    with pytest.raises(KedSemanticError, match="length 2 and 3"):
+        KedArray.apply(operator.add, values, KedArray([1, 2, 3]))
+    with pytest.raises(KedSemanticError, match="empty array"):
+        KedArray().mean()
+
+
+def test_array_reductions(backend):
+    values = KedArray([3, None, "4", 1])
+    assert list(values) == [3, 0, 4, 1]
+    assert (values.sum(), values.min(), values.max(), values.mean()) == (8, 0, 4, 2)
+    assert KedArray().sum() == 0
+
+
+def test_array_slices_are_copies(backend):
+    values = KedArray([1, 2, 3, 4])
+    part = values.slice(1, None, 2)
+    part[0] = 9
+    assert list(part) == [9, 4]
+    assert list(values) == [1, 2, 3, 4]